@@ -1,16 +1,42 @@
 import time
+import asyncio
 import concurrent.futures
 from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Iterator, Tuple
 from fact_checking.FactChecker import FactChecker
+from fact_checking.AsyncFactChecker import AsyncFactChecker
+from fact_checking.ClaimClusterer import ClaimClusterer
 from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
-from scraper.EvidenceFileHandler import EvidenceFileHandler
+from scraper.AsyncEvidenceRetrieveHandler import AsyncEvidenceRetrieveHandler
+from scraper.EvidenceCompactor import EvidenceCompactor
+from runtime.StageScheduler import StageScheduler
+from runtime.ExecutorRegistry import BoundedExecutor, get_default_registry
+from runtime.MetricsRegistry import MetricsRegistry, get_metrics
 
-def real_analyze_claims(checker: FactChecker, text: str):
+# 送給 verify_claim 的證據：摘要 + 與論點最相關的原文句子，約 600 tokens
+DEFAULT_COMPACTOR = EvidenceCompactor(token_budget=600)
+# 不精簡證據 (compactor=None) 又沒有摘要時，每個結果最多取文章的前幾個字
+FALLBACK_ARTICLE_CHARS = 2000
+# 字面幾乎相同 (且主詞、數字、否定詞、方向詞一致) 的論點只查一次，結果套用到每個重複的論點
+# 合併有誤判風險，預設不啟用；需要時傳入 clusterer=DEFAULT_CLUSTERER
+DEFAULT_CLUSTERER = ClaimClusterer(threshold=0.85)
+
+def real_analyze_claims(
+        checker: FactChecker,
+        text: str,
+        scheduler: StageScheduler = None,
+        *,
+        metrics: MetricsRegistry = None,
+):
     """
     對接 State 2a: 分析文章，提取客觀論點
     """
-    result = checker.analyze_article(text)
-    
+    with _stage_timer(metrics, "analyze"):
+        result = _staged(scheduler, "analyze", 0, checker.analyze_article, text)
+    return _summarize_analysis(result)
+
+def _summarize_analysis(result):
     if result is None:
         return None
         
@@ -23,85 +49,440 @@ def real_analyze_claims(checker: FactChecker, text: str):
     
     return {"is_subjective": False, "claims": result.get("claims", [])}
 
-def real_fact_check(checker: FactChecker, scraper_handler: EvidenceRetrieveHandler, claims: list, article_context: str):
+def real_fact_check(
+        checker: FactChecker,
+        scraper_handler: EvidenceRetrieveHandler,
+        claims: list,
+        article_context: str,
+        *,
+        batched: bool = False,
+        fan_out: bool = False,
+        scheduler: StageScheduler = None,
+        executor: BoundedExecutor = None,
+        compactor: EvidenceCompactor = DEFAULT_COMPACTOR,
+        clusterer: ClaimClusterer = None,
+        metrics: MetricsRegistry = None,
+        on_result: Callable[[int, dict], None] = None,
+):
     """
     對接 State 3a: 採用 Multi-threading 併發處理
+
+    batched=True 時改為跨論點批次處理：所有論點的搜尋計畫一次生成、
+    證據分組一次驗證，LLM 呼叫次數由 3N 次降為約 1 + N/5 次。
+
+    fan_out=True 時搜尋計畫中的所有問題會同時送出並合併證據 (依 URL 去重)，
+    相關度分數足夠時提早取消其餘搜尋，而不是只用 questions[0]。
+
+    scheduler 有值時，所有 LLM 呼叫都經由全域 StageScheduler 排程 (速率限制 + 併發上限)，
+    並以論點在文章中的順序作為優先權，讓每位使用者的前幾個論點先被處理。
+    搜尋的排程則由 scraper_handler 建立時傳入的 scheduler 負責。
+
+    executor 為全站共用的長駐執行緒池 (預設取自 ExecutorRegistry 的 "claims")，
+    不再每次呼叫都建立、關閉一個 ThreadPoolExecutor。
+
+    compactor 會把搜尋結果的 chunks / article 依與論點的相關度挑句，
+    組成有 token 上限的證據區塊交給 verify_claim；傳入 None 則只送 Tavily 摘要。
+
+    各階段 (plan / keywords / search / verify) 的耗時與成敗記錄在 metrics
+    (預設為全域的 MetricsRegistry)。
+
+    on_result(index, result) 會在每個論點完成時 (依完成順序) 被呼叫，
+    回傳值仍是依 claims 順序排列的完整結果列表。
+
+    傳入 clusterer (如 DEFAULT_CLUSTERER) 時，查核前先合併重複的論點
+    (同一個數據在導言與內文各說一次)，每組只跑一次 plan → search → verify，
+    結果再對應回組內每個論點。預設 clusterer=None：每個論點都獨立查核。
     """
-    
-    def process_single_claim(claim):
+    final_results = [None] * len(claims)
+    for index, result in iter_fact_check(
+            checker, scraper_handler, claims, article_context,
+            batched=batched, fan_out=fan_out, scheduler=scheduler,
+            executor=executor, compactor=compactor, clusterer=clusterer, metrics=metrics,
+    ):
+        final_results[index] = result
+        if on_result is not None:
+            on_result(index, result)
+
+    return final_results
+
+def iter_fact_check(
+        checker: FactChecker,
+        scraper_handler: EvidenceRetrieveHandler,
+        claims: list,
+        article_context: str,
+        *,
+        batched: bool = False,
+        fan_out: bool = False,
+        scheduler: StageScheduler = None,
+        executor: BoundedExecutor = None,
+        compactor: EvidenceCompactor = DEFAULT_COMPACTOR,
+        clusterer: ClaimClusterer = None,
+        metrics: MetricsRegistry = None,
+) -> Iterator[Tuple[int, dict]]:
+    """
+    real_fact_check 的串流版本：每個論點一完成就 yield (index, result)，
+    不必等整篇文章的論點都查完。參數同 real_fact_check。
+
+    batched=True 時驗證是整批進行，所有結果會在最後一起 yield。
+    提早關閉 generator 會取消尚未開始的論點。
+    """
+    clusters = _cluster_claims(claims, clusterer, metrics)
+    unique_claims = [claims[cluster[0]] for cluster in clusters]
+    for cluster_index, result in _iter_unique_claims(
+            checker, scraper_handler, unique_claims, article_context,
+            batched=batched, fan_out=fan_out, scheduler=scheduler,
+            executor=executor, compactor=compactor, metrics=metrics,
+    ):
+        for index in clusters[cluster_index]:
+            yield index, _member_result(result, claims[index])
+
+def _iter_unique_claims(
+        checker: FactChecker,
+        scraper_handler: EvidenceRetrieveHandler,
+        claims: list,
+        article_context: str,
+        *,
+        batched: bool,
+        fan_out: bool,
+        scheduler: StageScheduler,
+        executor: BoundedExecutor,
+        compactor: EvidenceCompactor,
+        metrics: MetricsRegistry,
+) -> Iterator[Tuple[int, dict]]:
+    """iter_fact_check 去除重複論點後的實際查核"""
+    if executor is None:
+        executor = get_default_registry().get("claims")
+
+    if batched:
+        yield from enumerate(_real_fact_check_batched(
+            checker, scraper_handler, claims, article_context,
+            fan_out=fan_out, scheduler=scheduler, executor=executor, compactor=compactor, metrics=metrics,
+        ))
+        return
+
+    def process_single_claim(claim, index=0):
         """
         封裝單個論點的查核邏輯
         """
         try:
             # 1. 取得 LLM 生成的搜尋計畫 (包含區域、時間範圍與問題)
-            query_plan = checker.generate_search_questions(claim, article_context)
+            with _stage_timer(metrics, "plan"):
+                query_plan = _staged(scheduler, "plan", index, checker.generate_search_questions, claim, article_context)
             
             # 2. 檢查是否生成了有效問題。若無則不呼叫 Scraper 直接返回警告。
             questions = query_plan.get("questions")
             if not questions or not isinstance(questions, list) or len(questions) == 0:
-                return {
-                    "claim": claim,
-                    "fact": "⚠️ 該論點無法生成良好搜尋字串，查核終止。",
-                    "url": "#",
-                    "status": "incorrect"
-                }
+                return _unsearchable_result(claim)
             
             # 3. 根據先前要求：使用關鍵字生成器優化第一條問題
             # 確保傳給 Tavily 的是精簡的關鍵字而非冗長問題
-            keywords = checker.generate_search_keywords(questions[0])
+            with _stage_timer(metrics, "keywords"):
+                keywords = _staged(scheduler, "plan", index, checker.generate_search_keywords, questions[0])
             primary_query = keywords[0] if (keywords and len(keywords) > 0) else questions[0]
 
             # 4. 組合搜尋 Payload
-            search_payload = {
-                "query": primary_query,
-                "search_region": query_plan.get("search_region", "Taiwan"),
-                "search_duration": query_plan.get("search_duration", "all_time")
-            }
+            search_payload = _search_payload(primary_query, query_plan)
                 
             # 5. 執行搜尋 (此時已確保 query 非 None)
-            search_result = scraper_handler.query(
-                search_payload, 
-                use_local_TF=True, 
-                level=EvidenceRetrieveHandler.ADVANCED
-            )
-            
-            # 6. 取得證據數據
-            evidence_data = None
-            if isinstance(search_result, EvidenceFileHandler):
-                evidence_data = search_result.read()
-                search_result.close()
-            elif isinstance(search_result, Future):
-                evidence_data = search_result.result()
-
-            if not evidence_data:
-                evidence_text = "搜尋失敗 (API 無回傳)"
-                evidence_url = "#"
-            else:
-                evidence_text = evidence_data.get("summary", "搜尋結果無摘要")
-                results = evidence_data.get("results", [])
-                evidence_url = results[0].get("link", "#") if results else "#"
+            with _stage_timer(metrics, "search"):
+                if fan_out:
+                    # 6. 所有問題同時搜尋，合併後的證據直接回傳
+                    evidence_data = scraper_handler.query_many(
+                        _fan_out_payloads(primary_query, questions, query_plan),
+                        use_local_TF=True,
+                        level=EvidenceRetrieveHandler.ADVANCED,
+                        priority=index
+                    )
+                else:
+                    search_result = scraper_handler.query(
+                        search_payload, 
+                        use_local_TF=True, 
+                        level=EvidenceRetrieveHandler.ADVANCED,
+                        priority=index
+                    )
+                
+                    # 6. 取得證據數據
+                    evidence_data = _resolve_search_result(search_result)
+
+            evidence_text, evidence_url = _extract_evidence(evidence_data, claim, compactor)
 
             # 7. 讓 LLM 進行最後真偽判定
-            verification = checker.verify_claim(claim, evidence_text)
+            with _stage_timer(metrics, "verify"):
+                verification = _staged(scheduler, "verify", index, checker.verify_claim, claim, evidence_text)
             
-            return {
-                "claim": claim,
-                "fact": verification.get("reason"),
-                "url": evidence_url,
-                "status": "correct" if verification.get("verdict") == "Correct" else "incorrect"
-            }
+            return _verdict_result(claim, verification, evidence_url)
         except Exception as e:
             # 單個論點出錯時的備案，避免毀掉整個報告
-            return {
-                "claim": claim,
-                "fact": f"查核過程發生錯誤：{str(e)}",
-                "url": "#",
-                "status": "incorrect"
-            }
-
-    # [cite_start]使用 ThreadPoolExecutor 並發執行 [cite: 2]
-    max_workers = min(len(claims), 10) if claims else 1
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        final_results = list(executor.map(process_single_claim, claims))
-        
-    return final_results
\ No newline at end of file
+            return _error_result(claim, e)
+
+    # [cite_start]使用共用執行緒池並發執行 [cite: 2]
+    futures = {
+        executor.submit(process_single_claim, claim, index): index
+        for index, claim in enumerate(claims)
+    }
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def _real_fact_check_batched(
+        checker: FactChecker,
+        scraper_handler: EvidenceRetrieveHandler,
+        claims: list,
+        article_context: str,
+        *,
+        fan_out: bool = False,
+        scheduler: StageScheduler = None,
+        executor: BoundedExecutor = None,
+        compactor: EvidenceCompactor = DEFAULT_COMPACTOR,
+        metrics: MetricsRegistry = None,
+):
+    """
+    批次版查核流程：plan (1 次 LLM) -> 併發搜尋 -> verify (每組 1 次 LLM)
+    """
+    if not claims:
+        return []
+
+    # 1. 一次生成所有論點的搜尋計畫
+    # 批次請求與解析失敗時退回的逐一請求各自排進 scheduler，每個 LLM 請求都取得自己的 rate-limit token
+    with _stage_timer(metrics, "plan"):
+        plans = checker.plan_searches_batch(claims, article_context, run=_stage_runner(scheduler, "plan"))
+
+    # 2. 併發送出搜尋 (Future 由 scraper 的執行緒池處理)
+    results = [None] * len(claims)
+    pending = {}
+    search_started = time.perf_counter()
+    for i, (claim, plan) in enumerate(zip(claims, plans)):
+        questions = plan.get("questions") or []
+        if not questions:
+            results[i] = _unsearchable_result(claim)
+            continue
+
+        keywords = plan.get("keywords") or []
+        primary_query = keywords[0] if keywords else questions[0]
+        try:
+            if fan_out:
+                pending[i] = executor.submit(
+                    scraper_handler.query_many,
+                    _fan_out_payloads(primary_query, questions, plan),
+                    use_local_TF=True,
+                    level=EvidenceRetrieveHandler.ADVANCED,
+                    priority=i
+                )
+            else:
+                pending[i] = scraper_handler.query(
+                    _search_payload(primary_query, plan),
+                    use_local_TF=True,
+                    level=EvidenceRetrieveHandler.ADVANCED,
+                    priority=i
+                )
+        except Exception as e:
+            results[i] = _error_result(claim, e)
+
+    # 3. 收集證據
+    to_verify = []
+    for i, search_result in pending.items():
+        try:
+            # 搜尋同時送出，每個論點的耗時由送出算到取得證據為止
+            with _stage_timer(metrics, "search", start=search_started):
+                evidence_data = _resolve_search_result(search_result)
+            evidence_text, evidence_url = _extract_evidence(evidence_data, claims[i], compactor)
+            to_verify.append((i, evidence_text, evidence_url))
+        except Exception as e:
+            results[i] = _error_result(claims[i], e)
+
+    # 4. 分組批次驗證
+    try:
+        with _stage_timer(metrics, "verify"):
+            verifications = checker.verify_claims_batch(
+                [(claims[i], text) for i, text, _ in to_verify],
+                run=_stage_runner(scheduler, "verify"),
+            )
+        for (i, _, url), verification in zip(to_verify, verifications):
+            results[i] = _verdict_result(claims[i], verification, url)
+    except Exception as e:
+        for i, _, _ in to_verify:
+            results[i] = _error_result(claims[i], e)
+
+    return results
+
+def _cluster_claims(claims, clusterer, metrics):
+    """回傳論點分組 (每組第一個為代表)，並記錄獨立 / 重複的論點數 (factcheck_claims_total)"""
+    if clusterer is None or len(claims) < 2:
+        clusters = [[i] for i in range(len(claims))]
+    else:
+        clusters = clusterer.cluster(claims)
+
+    counter = (metrics or get_metrics()).counter(
+        "factcheck_claims_total", "Claims received, by whether they were checked or merged", labels=("kind",)
+    )
+    counter.inc(len(clusters), kind="unique")
+    counter.inc(len(claims) - len(clusters), kind="duplicate")
+    return clusters
+
+def _member_result(result, claim):
+    """代表論點的結果套用到組內的論點 (保留該論點自己的文字)"""
+    if result is None:
+        return None
+    return dict(result, claim=claim)
+
+def _staged(scheduler, stage, priority, fn, *args, **kwargs):
+    """有 scheduler 時經由該 stage 的佇列執行，否則直接呼叫"""
+    if scheduler is None:
+        return fn(*args, **kwargs)
+    return scheduler.run(stage, fn, *args, priority=priority, **kwargs)
+
+def _stage_runner(scheduler, stage):
+    """FactChecker 批次方法的 `run`：每個 LLM 請求各自經由 _staged 執行，以論點順序為優先權"""
+    def run(priority, fn, *args):
+        return _staged(scheduler, stage, priority, fn, *args)
+    return run
+
+@contextmanager
+def _stage_timer(metrics, stage, start=None):
+    """記錄一個階段的耗時 (factcheck_stage_seconds) 與成敗 (factcheck_stage_total)"""
+    metrics = metrics or get_metrics()
+    start = time.perf_counter() if start is None else start
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        metrics.histogram(
+            "factcheck_stage_seconds", "Pipeline stage latency", labels=("stage",)
+        ).observe(time.perf_counter() - start, stage=stage)
+        metrics.counter(
+            "factcheck_stage_total", "Pipeline stage runs by outcome", labels=("stage", "outcome")
+        ).inc(stage=stage, outcome=outcome)
+
+def _resolve_search_result(search_result):
+    """把 scraper.query 的回傳值 (Future / 快取 handler / None) 轉成證據 dict"""
+    if isinstance(search_result, Future):
+        return search_result.result()
+    if search_result is not None:
+        # 命中快取：EvidenceFileHandler 或 EvidenceDatabaseHandler
+        evidence_data = search_result.read()
+        search_result.close()
+        return evidence_data
+    return None
+
+async def async_real_analyze_claims(checker: AsyncFactChecker, text: str):
+    """
+    real_analyze_claims 的 asyncio 版本
+    """
+    result = await checker.analyze_article(text)
+    return _summarize_analysis(result)
+
+async def async_real_fact_check(
+        checker: AsyncFactChecker,
+        scraper_handler: AsyncEvidenceRetrieveHandler,
+        claims: list,
+        article_context: str,
+        *,
+        compactor: EvidenceCompactor = DEFAULT_COMPACTOR,
+        clusterer: ClaimClusterer = None,
+):
+    """
+    real_fact_check 的 asyncio 版本：所有論點在同一個 event loop 上併發，
+    併發上限由 AsyncOllamaClient(max_concurrency) 與
+    AsyncEvidenceRetrieveHandler(max_search_requests) 的 semaphore 控制，不佔用額外執行緒。
+
+    同步程式可用 `asyncio.run(async_real_fact_check(...))` 呼叫；同一組 checker / scraper
+    可以跨多次 asyncio.run 重複使用 (連線池與 semaphore 會依 event loop 重建)。
+    """
+
+    async def process_single_claim(claim):
+        try:
+            query_plan = await checker.generate_search_questions(claim, article_context)
+
+            questions = query_plan.get("questions")
+            if not questions or not isinstance(questions, list) or len(questions) == 0:
+                return _unsearchable_result(claim)
+
+            keywords = await checker.generate_search_keywords(questions[0])
+            primary_query = keywords[0] if (keywords and len(keywords) > 0) else questions[0]
+
+            evidence_data = await scraper_handler.query(
+                _search_payload(primary_query, query_plan),
+                use_local_TF=True,
+                level=AsyncEvidenceRetrieveHandler.ADVANCED
+            )
+            evidence_text, evidence_url = _extract_evidence(evidence_data, claim, compactor)
+
+            verification = await checker.verify_claim(claim, evidence_text)
+
+            return _verdict_result(claim, verification, evidence_url)
+        except Exception as e:
+            return _error_result(claim, e)
+
+    clusters = _cluster_claims(claims, clusterer, None)
+    unique_results = await asyncio.gather(*(process_single_claim(claims[c[0]]) for c in clusters))
+
+    final_results = [None] * len(claims)
+    for cluster, result in zip(clusters, unique_results):
+        for index in cluster:
+            final_results[index] = _member_result(result, claims[index])
+    return final_results
+
+def _search_payload(primary_query: str, query_plan: dict) -> dict:
+    return {
+        "query": primary_query,
+        "search_region": query_plan.get("search_region", "Taiwan"),
+        "search_duration": query_plan.get("search_duration", "all_time")
+    }
+
+def _fan_out_payloads(primary_query: str, questions: list, query_plan: dict) -> list:
+    """主要關鍵字排第一，其餘問題依序在後 (去除重複)"""
+    ordered = [primary_query] + [q for q in questions if q != primary_query]
+    return [_search_payload(q, query_plan) for q in ordered]
+
+def _extract_evidence(evidence_data, claim=None, compactor=None):
+    """回傳 (給 LLM 的證據文字, 來源連結)；有 compactor 時證據依論點精簡"""
+    if not evidence_data:
+        return "搜尋失敗 (API 無回傳)", "#"
+
+    results = evidence_data.get("results") or []
+    if compactor is not None and claim:
+        evidence_text = compactor.compact(claim, evidence_data)
+    else:
+        # 本地語料庫的結果沒有摘要 (summary 為 None)，改用各結果的片段或文章
+        evidence_text = evidence_data.get("summary") or _results_text(results)
+    evidence_url = results[0].get("link", "#") if results else "#"
+    return evidence_text or "搜尋結果無摘要", evidence_url
+
+def _results_text(results):
+    parts = []
+    for i, res in enumerate(results, start=1):
+        if not isinstance(res, dict):
+            continue
+        chunks = [c for c in (res.get("chunks") or []) if isinstance(c, str) and c.strip()]
+        body = "\n".join(chunks) or (res.get("article") or "")[:FALLBACK_ARTICLE_CHARS]
+        if body.strip():
+            parts.append(f"<result {i}>:\n{body.strip()}")
+    return "\n\n".join(parts)
+
+def _unsearchable_result(claim):
+    return {
+        "claim": claim,
+        "fact": "⚠️ 該論點無法生成良好搜尋字串，查核終止。",
+        "url": "#",
+        "status": "incorrect"
+    }
+
+def _verdict_result(claim, verification, evidence_url):
+    return {
+        "claim": claim,
+        "fact": verification.get("reason"),
+        "url": evidence_url,
+        "status": "correct" if verification.get("verdict") == "Correct" else "incorrect"
+    }
+
+def _error_result(claim, e):
+    return {
+        "claim": claim,
+        "fact": f"查核過程發生錯誤：{str(e)}",
+        "url": "#",
+        "status": "incorrect"
+    }
\ No newline at end of file
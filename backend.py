@@ -0,0 +1,93 @@
+"""
+後端組裝：main.py (Streamlit) 與 batch_check.py 共用的限制設定與元件建立，不依賴 Streamlit。
+
+    checker, scraper, scheduler, evictor = build_backend()
+"""
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fact_checking.OllamaClient import OllamaClient
+from fact_checking.FactChecker import FactChecker
+from fact_checking.ResponseCache import ResponseCache
+from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from scraper.Retriever import Retriever
+from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+from scraper.CompressedEvidenceHandler import CompressedEvidenceHandler
+from scraper.EvidenceCacheEvictor import EvidenceCacheEvictor
+from runtime.StageScheduler import StageScheduler
+from runtime.SingleFlight import SingleFlight
+from runtime.Cassette import Cassette
+
+# 各後端的真實速率限制與併發上限，全站只在這裡設定
+# (批次與線上服務同時跑時共用同一組額度，請一併調低)
+BACKEND_LIMITS = {
+    "llm": {"rate": 5.0, "burst": 10, "max_in_flight": 10},     # NCKU API Gateway
+    "search": {"rate": 2.0, "burst": 5, "max_in_flight": 5},    # Tavily
+}
+
+# 全站共用的執行緒池；排滿時 engine 最多等 30 秒 (畫面顯示排隊中)，之後回報系統忙碌
+EXECUTOR_LIMITS = {
+    "engine": {"max_workers": 8, "max_queue": 32, "policy": "wait", "wait_timeout": 30.0},
+    "claims": {"max_workers": 32, "max_queue": 256, "policy": "wait", "wait_timeout": None},
+}
+
+# 證據快取上限，背景每 5 分鐘依 LRU 淘汰
+EVIDENCE_CACHE_BYTES = 500 * 1024 * 1024
+
+def build_backend() -> Tuple[FactChecker, EvidenceRetrieveHandler, StageScheduler, Optional[EvidenceCacheEvictor]]:
+    """
+    Builds the shared checker / scraper / scheduler (and starts the cache evictor).
+
+    With a cassette (CASSETTE_MODE set) the evidence store, local index and
+    LLM reply cache live in a temporary directory, and there is no evictor.
+
+    Returns:
+        (checker, scraper, scheduler, evictor): The caller stops the evictor
+            (None with a cassette) and shuts the scraper down when it exits.
+    """
+    # 所有請求共用同一個排程器，依後端限制與論點優先權分配呼叫
+    scheduler = StageScheduler(backends=BACKEND_LIMITS)
+    # 設定 CASSETTE_MODE=record/replay 時錄製或重播 LLM 與 Tavily 的回應 (重現問題用)
+    cassette = Cassette.from_env()
+    if cassette is not None:
+        # 錄製與重播都從空的暫存證據庫 / 本地語料庫 / LLM 快取開始：
+        # 快取命中不會經過 cassette，且重播不可寫入真實的資料
+        workdir = Path(tempfile.mkdtemp(prefix=f"factcheck_{cassette.mode}_"))
+        atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+        storage = CompressedEvidenceHandler.in_directory(workdir / "evidence_compact")
+        response_cache = ResponseCache(workdir / "llm_cache")
+        local_index = LocalEvidenceIndex(workdir / "evidence_index.sqlite3", storage=storage)
+        evictor = None
+    else:
+        storage = CompressedEvidenceHandler
+        response_cache = ResponseCache()
+        # 證據以壓縮格式儲存 (文章本文另存、用到才讀)；舊的 JSON 證據第一次啟動時轉換
+        storage.migrate_from_json()
+        # 本地語料庫：已抓過的文章可直接回答，相關度不足才呼叫 Tavily (索引只存參照，本文從證據庫讀)
+        local_index = LocalEvidenceIndex(storage=storage)
+        local_index.index_storage()
+        # 本地語料庫的索引一併計入容量上限，被淘汰的證據也會從索引移除
+        evictor = EvidenceCacheEvictor(
+            storage, max_bytes=EVIDENCE_CACHE_BYTES, policy=EvidenceCacheEvictor.LRU,
+            local_index=local_index,
+        ).start()
+    # 所有 FactChecker 共用同一個 keep-alive 連線池，避免每次呼叫都重新握手
+    client = OllamaClient(
+        session=OllamaClient.get_shared_session(pool_size=BACKEND_LIMITS["llm"]["max_in_flight"]),
+        cache=response_cache,
+        single_flight=SingleFlight(),   # 相同的 prompt 同時送出時只打一次 API
+        cassette=cassette,
+    )
+    checker = FactChecker(client)
+    scraper = EvidenceRetrieveHandler(
+        max_search_requests=BACKEND_LIMITS["search"]["max_in_flight"],
+        storage=storage,
+        scheduler=scheduler,
+        retriever=Retriever(cassette=cassette),
+        local_index=local_index,
+        evictor=evictor,
+    )
+    return checker, scraper, scheduler, evictor
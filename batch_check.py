@@ -0,0 +1,322 @@
+"""
+批次查核：不經 Streamlit，直接對大量文章執行 real_analyze_claims -> real_fact_check。
+
+    python batch_check.py articles/ -o results.jsonl
+    python batch_check.py dump.jsonl -o results.jsonl --concurrency 8
+    cat dump.jsonl | python batch_check.py - -o results.jsonl
+
+- 輸入：資料夾 (每個 *.txt 一篇，id 為相對路徑) 或 JSONL (每行 {"id": ..., "text": ...})，"-" 代表 stdin
+- 多篇文章同時處理 (--concurrency)，論點共用一個執行緒池 (--claim-workers)，讀取輸入時依併發上限背壓
+- 每篇完成即寫入一行結果並 fsync；輸出檔同時是 checkpoint，中斷後重跑同一指令會略過已完成的文章
+- 結束時印出吞吐量摘要 (articles/s, claims/s, 延遲分位數, LLM / Tavily 用量)
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from fact_checking.FactChecker import FactChecker
+from fact_checking.ClaimClusterer import ClaimClusterer
+from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from runtime.StageScheduler import StageScheduler
+from runtime.ExecutorRegistry import BoundedExecutor
+from runtime.MetricsRegistry import get_metrics
+from agent_logic import DEFAULT_CLUSTERER, real_analyze_claims, real_fact_check
+from backend import build_backend
+
+TEXT_FIELDS = ("text", "content", "article")
+
+def iter_articles(source: str, *, pattern: str = "*.txt", id_field: str = "id") -> Iterator[Tuple[str, str]]:
+    """
+    Yields (article_id, text) lazily, so huge JSONL dumps are never fully loaded.
+
+    Args:
+        source (str): Directory, JSONL file, or "-" for JSONL on stdin.
+        pattern (str): (directory) glob of article files, searched recursively.
+        id_field (str): (JSONL) field holding the article id; the line number is used if missing.
+    """
+    if source != "-" and Path(source).is_dir():
+        root = Path(source)
+        for path in sorted(root.rglob(pattern)):
+            if path.is_file():
+                yield path.relative_to(root).as_posix(), path.read_text(encoding="utf-8")
+        return
+
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ 第 {line_no} 行不是合法 JSON，略過", file=sys.stderr)
+                continue
+            if isinstance(record, str):
+                record = {"text": record}
+            text = next((record[f] for f in TEXT_FIELDS if isinstance(record.get(f), str)), None)
+            if text is None:
+                print(f"⚠️ 第 {line_no} 行沒有文章內容 ({'/'.join(TEXT_FIELDS)})，略過", file=sys.stderr)
+                continue
+            yield str(record.get(id_field, f"line-{line_no}")), text
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+class ResultWriter:
+    """
+    Appends one JSON line per finished article; the output doubles as the checkpoint.
+    Every line is flushed and fsync'd, so after a crash at most the article
+    being written is lost (its partial line is dropped on resume).
+    """
+
+    def __init__(self, path: Path, *, resume: bool = True, retry_failed: bool = False):
+        self.path = Path(path)
+        self.__lock = threading.Lock()
+        self.done: Set[str] = set()
+        if resume:
+            self.done = self.__load_checkpoint(retry_failed)
+        elif self.path.exists():
+            self.path.unlink()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.__file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, result: Dict[str, Any]) -> None:
+        line = json.dumps(result, ensure_ascii=False) + "\n"
+        with self.__lock:
+            self.__file.write(line)
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.done.add(result["id"])
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__file.close()
+
+    def __load_checkpoint(self, retry_failed: bool) -> Set[str]:
+        if not self.path.exists():
+            return set()
+
+        done = set()
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                try:
+                    result = json.loads(raw.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break  # 中斷時寫到一半的最後一行
+                if not raw.endswith(b"\n"):
+                    break
+                valid_bytes += len(raw)
+                if retry_failed and result.get("status") == "error":
+                    continue
+                done.add(str(result.get("id")))
+
+        # 截掉殘缺的結尾，新的結果才不會接在半行之後
+        if valid_bytes < self.path.stat().st_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        return done
+
+
+class BatchRunner:
+    """Runs the full pipeline over many articles with bounded cross-article concurrency."""
+
+    def __init__(
+            self,
+            checker: FactChecker,
+            scraper: EvidenceRetrieveHandler,
+            writer: ResultWriter,
+            *,
+            concurrency: int = 4,
+            claim_workers: int = 16,
+            scheduler: Optional[StageScheduler] = None,
+            batched: bool = False,
+            fan_out: bool = False,
+            clusterer: Optional[ClaimClusterer] = None,
+            progress_every: int = 10,
+    ):
+        self.checker = checker
+        self.scraper = scraper
+        self.writer = writer
+        self.scheduler = scheduler
+        self.batched = batched
+        self.fan_out = fan_out
+        self.clusterer = clusterer
+        self.progress_every = progress_every
+
+        # 佇列只比執行中多一倍：讀取輸入會被背壓，不會把整個 dump 讀進記憶體
+        self.articles = BoundedExecutor("batch-articles", max_workers=concurrency, max_queue=concurrency)
+        self.claims = BoundedExecutor("batch-claims", max_workers=claim_workers, max_queue=claim_workers * 8)
+
+        self.__lock = threading.Lock()
+        self.__latencies = []
+        self.__stats = {"submitted": 0, "skipped": 0, "ok": 0, "subjective": 0, "error": 0, "claims": 0}
+
+    def run(self, articles: Iterator[Tuple[str, str]]) -> Dict[str, Any]:
+        """Processes every article not yet in the checkpoint; returns the summary."""
+        start = time.perf_counter()
+        futures = []
+        try:
+            for article_id, text in articles:
+                if article_id in self.writer.done:
+                    with self.__lock:
+                        self.__stats["skipped"] += 1
+                    continue
+                future = self.articles.submit(self.__check_article, article_id, text)
+                with self.__lock:
+                    self.__stats["submitted"] += 1
+                futures.append(future)
+                futures = [f for f in futures if not f.done()]
+        except KeyboardInterrupt:
+            print("\n⏹️ 收到中斷，等待進行中的文章完成後結束 (重跑同一指令即可續跑)", file=sys.stderr)
+
+        for future in futures:
+            future.exception()  # 等待完成；錯誤已寫入結果檔
+        return self.summary(time.perf_counter() - start)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        with self.__lock:
+            stats = dict(self.__stats)
+            latencies = sorted(self.__latencies)
+
+        finished = stats["ok"] + stats["subjective"] + stats["error"]
+        stats["elapsed"] = elapsed
+        stats["articles_per_sec"] = finished / elapsed if elapsed > 0 else 0.0
+        stats["claims_per_sec"] = stats["claims"] / elapsed if elapsed > 0 else 0.0
+        for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            stats[f"article_{name}"] = latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        self.articles.shutdown()
+        self.claims.shutdown()
+
+    def __check_article(self, article_id: str, text: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = {"id": article_id, "status": "error", "claims": []}
+        try:
+            analysis = real_analyze_claims(self.checker, text, self.scheduler)
+            if analysis is None:
+                result["reason"] = "文章分析失敗 (LLM 無回應或格式錯誤)"
+            elif analysis.get("is_subjective"):
+                result["status"] = "subjective"
+                result["reason"] = analysis.get("reason")
+            else:
+                result["claims"] = real_fact_check(
+                    self.checker, self.scraper, analysis.get("claims", []), text,
+                    batched=self.batched,
+                    fan_out=self.fan_out,
+                    scheduler=self.scheduler,
+                    executor=self.claims,
+                    clusterer=self.clusterer,
+                )
+                result["status"] = "ok"
+        except Exception as e:
+            result["reason"] = f"{type(e).__name__}: {e}"
+        result["elapsed"] = round(time.perf_counter() - start, 3)
+        result["finished_at"] = time.time()
+        self.writer.write(result)
+        self.__record(result)
+        return result
+
+    def __record(self, result: Dict[str, Any]) -> None:
+        with self.__lock:
+            self.__stats[result["status"]] += 1
+            self.__stats["claims"] += len(result["claims"])
+            self.__latencies.append(result["elapsed"])
+            finished = self.__stats["ok"] + self.__stats["subjective"] + self.__stats["error"]
+        if self.progress_every and finished % self.progress_every == 0:
+            print(f"… 已完成 {finished} 篇 (最新：{result['id']}，{result['status']})", file=sys.stderr)
+
+
+def print_summary(stats: Dict[str, Any], out=sys.stdout) -> None:
+    metrics = get_metrics()
+    llm_calls = metrics.counter("factcheck_llm_calls_total", labels=("source",))
+    tavily_credits = metrics.counter("factcheck_tavily_credits_total")
+    claim_kinds = metrics.counter("factcheck_claims_total", labels=("kind",))
+
+    print("\n=== 批次查核摘要 ===", file=out)
+    print(
+        f"文章：完成 {stats['ok']}、主觀 {stats['subjective']}、失敗 {stats['error']}、"
+        f"略過 (已在 checkpoint) {stats['skipped']}",
+        file=out,
+    )
+    print(f"論點：{stats['claims']} (重複合併 {claim_kinds.value(kind='duplicate'):g})", file=out)
+    print(
+        f"耗時 {stats['elapsed']:.1f}s -> {stats['articles_per_sec']:.2f} articles/s, "
+        f"{stats['claims_per_sec']:.2f} claims/s",
+        file=out,
+    )
+    print(
+        f"每篇延遲 p50 {stats['article_p50']:.1f}s / p95 {stats['article_p95']:.1f}s / p99 {stats['article_p99']:.1f}s",
+        file=out,
+    )
+    print(
+        f"LLM 呼叫 {llm_calls.value(source='api'):g} (快取 {llm_calls.value(source='cache'):g})，"
+        f"Tavily credits {tavily_credits.value():g}",
+        file=out,
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="批次執行 analyze -> fact_check，結果逐篇寫入 JSONL。")
+    parser.add_argument("input", help="文章資料夾、JSONL 檔，或 - (從 stdin 讀 JSONL)")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="結果 JSONL (同時作為 checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時處理的文章數")
+    parser.add_argument("--claim-workers", type=int, default=16, help="所有文章共用的論點執行緒數")
+    parser.add_argument("--pattern", default="*.txt", help="(資料夾) 文章檔名樣式")
+    parser.add_argument("--id-field", default="id", help="(JSONL) 文章 id 欄位")
+    parser.add_argument("--batched", action="store_true", help="跨論點批次 plan / verify")
+    parser.add_argument("--fan-out", action="store_true", help="同時搜尋搜尋計畫中的所有問題")
+    parser.add_argument("--cluster-claims", action="store_true", help="合併字面重複的論點，每組只查核一次")
+    parser.add_argument("--restart", action="store_true", help="忽略並覆寫既有結果，從頭開始")
+    parser.add_argument("--retry-failed", action="store_true", help="續跑時重新處理狀態為 error 的文章")
+    parser.add_argument("--metrics", default=None, help="結束時把 metrics snapshot 寫到此 JSON 檔")
+    parser.add_argument("--progress-every", type=int, default=10, help="每完成幾篇印一次進度 (0 = 不印)")
+    parser.add_argument("--quiet", action="store_true", help="隱藏 FactChecker / Scraper 的逐筆輸出")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    writer = ResultWriter(Path(args.output), resume=not args.restart, retry_failed=args.retry_failed)
+    if writer.done:
+        print(f"↩️ 從 checkpoint 續跑：已完成 {len(writer.done)} 篇", file=sys.stderr)
+
+    checker, scraper, scheduler, evictor = build_backend()
+    runner = BatchRunner(
+        checker, scraper, writer,
+        concurrency=args.concurrency,
+        claim_workers=args.claim_workers,
+        scheduler=scheduler,
+        batched=args.batched,
+        fan_out=args.fan_out,
+        clusterer=DEFAULT_CLUSTERER if args.cluster_claims else None,
+        progress_every=args.progress_every,
+    )
+
+    try:
+        with open(os.devnull, "w") as devnull:
+            quiet = contextlib.redirect_stdout(devnull) if args.quiet else contextlib.nullcontext()
+            with quiet:
+                stats = runner.run(iter_articles(args.input, pattern=args.pattern, id_field=args.id_field))
+    finally:
+        runner.shutdown()
+        scraper.shutdown()
+        if evictor is not None:
+            evictor.stop()
+        writer.close()
+
+    print_summary(stats)
+    if args.metrics:
+        get_metrics().write_json(Path(args.metrics))
+    return stats
+
+if __name__ == "__main__":
+    main()
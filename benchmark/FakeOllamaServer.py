@@ -0,0 +1,193 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from .LatencyModel import LatencyModel
+
+class FakeOllamaServer:
+    """
+    Local stand-in for the gateway's `/api/chat`.
+
+    Recognizes every FactChecker prompt (analysis, keywords, questions,
+    verify and their batched forms) and answers with well-formed JSON after
+    a sampled latency. `error_rate` of the requests get `error_status`
+    (503 by default, so OllamaClient's retry policy is exercised).
+    Both `stream: false` and NDJSON streaming replies are supported.
+
+    Usage:
+        with FakeOllamaServer(latency=LatencyModel("lognormal", 0.8, 3.0)) as server:
+            client = OllamaClient(api_url=server.url, api_key="bench")
+    """
+
+    def __init__(
+            self,
+            *,
+            latency: Optional[LatencyModel] = None,
+            error_rate: float = 0.0,
+            error_status: int = 503,
+            claim_count: int = 5,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency (LatencyModel): Per-request delay. Defaults to no delay.
+            error_rate (float): Share of requests answered with `error_status`.
+            claim_count (int): Claims returned for each analyzed article.
+            port (int): 0 = any free port (see `url`).
+        """
+        self.latency = latency or LatencyModel("constant", 0.0)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.claim_count = claim_count
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__stats = {"requests": 0, "errors": 0}
+
+        self.__server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.__server.daemon_threads = True
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/api/chat"
+
+    def start(self) -> "FakeOllamaServer":
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="fake-ollama", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def reply_for(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Builds the JSON answer for a FactChecker prompt."""
+        system = messages[0].get("content", "") if messages else ""
+        user = messages[-1].get("content", "") if messages else ""
+
+        if "新聞查核員" in system:
+            tag = hashlib.sha1(user.encode("utf-8")).hexdigest()[:6]
+            return {
+                "is_subjective": False,
+                "subjectivity_reason": "benchmark",
+                "claims": [f"事件{tag}第{i}項：台積電{2015 + i}年營收成長{i + 1}成" for i in range(self.claim_count)],
+            }
+        if "SEO Expert" in system:
+            claim = user.split("：", 1)[-1]
+            return {"keywords": [self.__keywords(claim)]}
+        if "每一個" in system:
+            claims = re.findall(r"^\s*(\d+)\.\s*(.+)$", user, re.MULTILINE)
+            return {"plans": [
+                {
+                    "id": int(i),
+                    "search_region": "Taiwan",
+                    "search_duration": "all_time",
+                    "questions": [claim, f"{claim} 真實性"],
+                    "keywords": [self.__keywords(claim)],
+                }
+                for i, claim in claims
+            ]}
+        if "SEO" in system:
+            claim = user.split("：", 1)[-1]
+            return {
+                "reasoning": "benchmark",
+                "search_region": "Taiwan",
+                "search_duration": "all_time",
+                "questions": [claim, f"{claim} 真實性"],
+            }
+        if "逐組獨立" in system:
+            ids = re.findall(r"<(\d+)>", user)
+            return {"results": [dict(self.__verdict(i), id=int(i)) for i in ids]}
+        if "查核法官" in system:
+            return self.__verdict(user)
+        return {"message": "unrecognized prompt"}
+
+    @staticmethod
+    def __keywords(claim: str) -> str:
+        return " ".join(re.findall(r"[一-鿿]{2,4}|\d+", claim)[:4]) or claim
+
+    @staticmethod
+    def __verdict(seed_text: str) -> Dict[str, Any]:
+        bucket = int(hashlib.sha1(seed_text.encode("utf-8")).hexdigest(), 16) % 3
+        verdict = ["Correct", "Incorrect", "Unverifiable"][bucket]
+        return {"verdict": verdict, "confidence_score": 7, "reason": f"benchmark {verdict}"}
+
+    def should_fail(self) -> bool:
+        """Counts one request; True if it should fail (drawn from `error_rate`)."""
+        with self.__lock:
+            self.__stats["requests"] += 1
+            fail = self.__random.random() < self.error_rate
+            if fail:
+                self.__stats["errors"] += 1
+            return fail
+
+    def __make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 標頭與本文分兩次寫入；不關掉 Nagle 的話，keep-alive 連線每個回應都會多等 ~40ms 的 delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                time.sleep(server.latency.sample())
+
+                if server.should_fail():
+                    self.__send(server.error_status, {"error": "simulated failure"})
+                    return
+
+                content = json.dumps(server.reply_for(body.get("messages") or []), ensure_ascii=False)
+                if body.get("stream"):
+                    self.__stream(content)
+                else:
+                    self.__send(200, {"message": {"role": "assistant", "content": content}, "done": True})
+
+            def __send(self, status: int, payload: dict) -> None:
+                out = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def __stream(self, content: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for i in range(0, len(content), 16):
+                        self.__chunk({"message": {"content": content[i:i + 16]}, "done": False})
+                    self.__chunk({"done": True})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 用戶端提早取消
+
+            def __chunk(self, event: dict) -> None:
+                line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
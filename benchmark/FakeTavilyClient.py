@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from .LatencyModel import LatencyModel
+
+class FakeTavilyClient:
+    """
+    Drop-in for `TavilyClient.search` (pass it as `Retriever(client=...)`).
+
+    Sleeps a sampled latency and returns a Tavily-shaped response: an answer,
+    `max_results` results with `<chunk n>` content and a raw article that
+    repeats the query's terms. `error_rate` of the calls raise an HTTPError
+    carrying `error_status`, like TavilyClient does on 5xx.
+    """
+
+    def __init__(
+            self,
+            *,
+            latency: Optional[LatencyModel] = None,
+            error_rate: float = 0.0,
+            error_status: int = 503,
+            article_chars: int = 4000,
+            seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency (LatencyModel): Per-search delay. Defaults to no delay.
+            error_rate (float): Share of searches that fail.
+            article_chars (int): Approximate size of each raw article.
+        """
+        self.latency = latency or LatencyModel("constant", 0.0)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.article_chars = article_chars
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__stats = {"searches": 0, "errors": 0, "credits": 0}
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        delay = self.latency.sample()
+        time.sleep(delay)
+
+        with self.__lock:
+            self.__stats["searches"] += 1
+            fail = self.__random.random() < self.error_rate
+            if fail:
+                self.__stats["errors"] += 1
+
+        if fail:
+            response = requests.Response()
+            response.status_code = self.error_status
+            raise requests.exceptions.HTTPError(f"{self.error_status} simulated Tavily failure", response=response)
+
+        credits = 2 if kwargs.get("search_depth") == "advanced" else 1
+        with self.__lock:
+            self.__stats["credits"] += credits
+
+        chunks_per_source = kwargs.get("chunks_per_source", 3) or 3
+        results = []
+        for i in range(kwargs.get("max_results", 3) or 3):
+            chunks = [f"{query} 相關報導第{i + 1}篇第{j + 1}段，內容提到{query}的細節。" for j in range(chunks_per_source)]
+            sentence = f"根據報導，{query}。其他無關的背景敘述與評論內容。"
+            article = (sentence * (self.article_chars // max(1, len(sentence)) + 1))[:self.article_chars]
+            results.append({
+                "title": f"{query} 報導 {i + 1}",
+                "url": f"https://bench.example/{abs(hash((query, i)))}",
+                "content": " ".join(f"<chunk {j + 1}> {c}" for j, c in enumerate(chunks)),
+                "raw_content": article,
+                "score": round(0.9 - 0.2 * i, 2),
+            })
+
+        return {
+            "query": query,
+            "answer": f"{query} 的搜尋摘要。",
+            "results": results,
+            "response_time": round(delay, 3),
+            "usage": {"credits": credits},
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return dict(self.__stats)
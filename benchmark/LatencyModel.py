@@ -0,0 +1,72 @@
+import math
+import random
+from typing import Optional
+
+class LatencyModel:
+    """
+    Random latency (seconds) for a simulated backend.
+
+    Kinds:
+        - "constant": always `median`
+        - "uniform": uniform between `median * (1 - spread)` and `median * (1 + spread)`
+        - "lognormal": median `median`, 95th percentile `p95` (heavy tail, the
+          usual shape of LLM / search latencies)
+        - "exponential": mean `median / ln 2`
+
+    A spec string like "lognormal:0.8:3.0" or "constant:0.2" can be parsed
+    with `LatencyModel.parse`.
+    """
+
+    KINDS = ("constant", "uniform", "lognormal", "exponential")
+
+    def __init__(
+            self,
+            kind: str = "lognormal",
+            median: float = 0.5,
+            p95: Optional[float] = None,
+            *,
+            spread: float = 0.5,
+            seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            kind (str): One of KINDS.
+            median (float): Median latency (seconds).
+            p95 (float): ("lognormal") 95th percentile; defaults to 3x median.
+            spread (float): ("uniform") relative half-width.
+            seed (int): Seed for reproducible runs.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unsupported latency kind: {kind}")
+        self.kind = kind
+        self.median = median
+        self.p95 = p95 if p95 is not None else median * 3
+        self.spread = spread
+        self.__random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        """"kind:median[:p95 or spread]" -> LatencyModel."""
+        parts = spec.split(":")
+        kind = parts[0]
+        median = float(parts[1]) if len(parts) > 1 else 0.5
+        extra = float(parts[2]) if len(parts) > 2 else None
+        if kind == "uniform":
+            return cls(kind, median, spread=extra if extra is not None else 0.5, seed=seed)
+        return cls(kind, median, extra, seed=seed)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.kind == "constant":
+            return self.median
+        if self.kind == "uniform":
+            return self.__random.uniform(self.median * (1 - self.spread), self.median * (1 + self.spread))
+        if self.kind == "exponential":
+            return self.__random.expovariate(math.log(2) / self.median)
+        # lognormal: ln X ~ N(mu, sigma)，由中位數與 p95 反推
+        sigma = max(1e-6, math.log(max(self.p95, self.median) / self.median) / 1.645)
+        return self.__random.lognormvariate(math.log(self.median), sigma)
+
+    def __repr__(self) -> str:
+        return f"LatencyModel({self.kind}, median={self.median}, p95={self.p95})"
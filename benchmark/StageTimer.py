@@ -0,0 +1,91 @@
+import math
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+class StageTimer:
+    """
+    Thread-safe collector of per-stage durations (seconds).
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__samples: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self.__lock:
+            self.__samples.setdefault(stage, []).append(seconds)
+
+    def timed(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `fn` and records its duration under `stage`."""
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def wrap(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def timed_fn(*args, **kwargs):
+            return self.timed(stage, fn, *args, **kwargs)
+        return timed_fn
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__samples.clear()
+
+    @staticmethod
+    def percentile(sorted_samples: List[float], q: float) -> float:
+        """Nearest-rank percentile of an already sorted list."""
+        if not sorted_samples:
+            return 0.0
+        rank = max(1, math.ceil(q * len(sorted_samples)))
+        return sorted_samples[rank - 1]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            dict: stage -> {count, mean, p50, p95, p99, max}
+        """
+        with self.__lock:
+            samples = {stage: sorted(values) for stage, values in self.__samples.items()}
+
+        out = {}
+        for stage, values in samples.items():
+            out[stage] = {
+                "count": len(values),
+                "mean": sum(values) / len(values) if values else 0.0,
+                "p50": self.percentile(values, 0.50),
+                "p95": self.percentile(values, 0.95),
+                "p99": self.percentile(values, 0.99),
+                "max": values[-1] if values else 0.0,
+            }
+        return out
+
+
+class TimedScraper:
+    """
+    Proxy for EvidenceRetrieveHandler that records "search" durations.
+
+    `query` may return a Future (a miss) or a ready handler (a cache hit);
+    the duration is measured until the evidence is actually available.
+    """
+
+    def __init__(self, scraper, timer: StageTimer):
+        self.__scraper = scraper
+        self.__timer = timer
+
+    def query(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = self.__scraper.query(*args, **kwargs)
+        if isinstance(result, Future):
+            result.add_done_callback(lambda _: self.__timer.record("search", time.perf_counter() - start))
+        else:
+            self.__timer.record("search", time.perf_counter() - start)
+        return result
+
+    def query_many(self, *args, **kwargs):
+        return self.__timer.timed("search", self.__scraper.query_many, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.__scraper, name)
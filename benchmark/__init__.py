@@ -0,0 +1,12 @@
+from .LatencyModel import LatencyModel
+from .FakeOllamaServer import FakeOllamaServer
+from .FakeTavilyClient import FakeTavilyClient
+from .StageTimer import StageTimer, TimedScraper
+
+__all__ = [
+    "LatencyModel",
+    "FakeOllamaServer",
+    "FakeTavilyClient",
+    "StageTimer",
+    "TimedScraper",
+]
@@ -0,0 +1,276 @@
+"""
+Offline benchmark of the fact-checking pipeline.
+
+Runs real_analyze_claims + real_fact_check against a local fake Ollama
+server and a fake Tavily client (configurable latency / error rate), for
+every combination of claim count, worker count, cache state and mode, and
+reports throughput plus p50/p95/p99 per stage.
+
+    python -m benchmark.run_benchmark --claims 5,10 --workers 4,16 --cache cold,warm
+
+Cache states:
+    - "cold": empty evidence store, no LLM cache
+    - "evidence": evidence store primed by an untimed run, no LLM cache
+    - "warm": evidence store and LLM response cache both primed
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmark.FakeOllamaServer import FakeOllamaServer
+from benchmark.FakeTavilyClient import FakeTavilyClient
+from benchmark.LatencyModel import LatencyModel
+from benchmark.StageTimer import StageTimer, TimedScraper
+from fact_checking.OllamaClient import OllamaClient
+from fact_checking.FactChecker import FactChecker
+from fact_checking.ResponseCache import ResponseCache
+from scraper.CompressedEvidenceHandler import CompressedEvidenceHandler
+from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+from scraper.Retriever import Retriever
+from runtime.ExecutorRegistry import BoundedExecutor
+from runtime.SingleFlight import SingleFlight
+from runtime.MetricsRegistry import MetricsRegistry
+from agent_logic import real_analyze_claims, real_fact_check
+
+CACHE_STATES = ("cold", "evidence", "warm")
+MODES = ("single", "batched", "fan_out")
+STAGES = ("analyze", "plan", "keywords", "search", "verify", "article")
+
+# FactChecker 方法 -> 報表中的階段名稱
+CHECKER_STAGES = {
+    "analyze_article": "analyze",
+    "generate_search_questions": "plan",
+    "plan_searches_batch": "plan",
+    "generate_search_keywords": "keywords",
+    "verify_claim": "verify",
+    "verify_claims_batch": "verify",
+}
+
+def make_articles(count: int) -> List[str]:
+    """Distinct synthetic news articles (the fake server derives claims from their hash)."""
+    body = "據報導，該公司今年營收大幅成長，並宣布擴大投資。分析師認為此舉將帶動相關產業發展。"
+    return [f"第{i + 1}篇新聞。{body * 5}" for i in range(count)]
+
+def make_storage(root: Path):
+    """CompressedEvidenceHandler writing into `root` (its own index cache)."""
+    return type("BenchEvidenceHandler", (CompressedEvidenceHandler,), {
+        "EVIDENCE_DIR": root / "evidence",
+        "_index_cache": None,
+        "_index_stamp": None,
+        "_index_generation": 0,
+        "_index_cached_generation": -1,
+    })
+
+class Pipeline:
+    """One checker + scraper wired to the fakes, with its files under `root`."""
+
+    def __init__(self, root: Path, server: FakeOllamaServer, tavily: FakeTavilyClient, workers: int, llm_cache: bool):
+        self.timer = StageTimer()
+        # 每組設定獨立的 registry，結果不受其他組影響
+        self.metrics = MetricsRegistry()
+        client = OllamaClient(
+            api_url=server.url,
+            api_key="benchmark",
+            pool_size=max(10, workers),
+            cache=ResponseCache(root / "llm_cache") if llm_cache else None,
+            single_flight=SingleFlight(),
+            metrics=self.metrics,
+        )
+        self.checker = FactChecker(client)
+        for method, stage in CHECKER_STAGES.items():
+            setattr(self.checker, method, self.timer.wrap(stage, getattr(self.checker, method)))
+
+        storage = make_storage(root)
+        self.scraper = EvidenceRetrieveHandler(
+            max_search_requests=workers,
+            storage=storage,
+            retriever=Retriever(client=tavily, metrics=self.metrics),
+            local_index=LocalEvidenceIndex(root / "evidence_index.sqlite3", storage=storage),
+            metrics=self.metrics,
+        )
+        self.executor = BoundedExecutor("bench-claims", max_workers=workers, max_queue=1024)
+
+    def run(self, articles: List[str], mode: str) -> Dict[str, Any]:
+        """Checks every article in turn; returns claim counts."""
+        claims_total = 0
+        with_evidence = 0
+        for text in articles:
+            start = time.perf_counter()
+            analysis = real_analyze_claims(self.checker, text, metrics=self.metrics)
+            claims = (analysis or {}).get("claims") or []
+            results = real_fact_check(
+                self.checker, TimedScraper(self.scraper, self.timer), claims, text,
+                batched=(mode == "batched"),
+                fan_out=(mode == "fan_out"),
+                executor=self.executor,
+                metrics=self.metrics,
+            )
+            self.timer.record("article", time.perf_counter() - start)
+            claims_total += len(claims)
+            # 錯誤、無法搜尋或沒有證據的論點，url 皆為 "#"
+            with_evidence += sum(1 for r in results if r and r.get("url") not in (None, "#"))
+        return {"claims": claims_total, "with_evidence": with_evidence}
+
+    def close(self) -> None:
+        self.scraper.shutdown()
+        self.executor.shutdown()
+
+def run_case(args, claims: int, workers: int, cache: str, mode: str) -> Dict[str, Any]:
+    server = FakeOllamaServer(
+        latency=LatencyModel.parse(args.llm_latency, seed=args.seed),
+        error_rate=args.llm_error_rate,
+        claim_count=claims,
+        seed=args.seed,
+    ).start()
+    tavily = FakeTavilyClient(
+        latency=LatencyModel.parse(args.search_latency, seed=args.seed),
+        error_rate=args.search_error_rate,
+        seed=args.seed,
+    )
+    articles = make_articles(args.articles)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="factcheck-bench-") as tmp:
+            pipeline = Pipeline(Path(tmp), server, tavily, workers, llm_cache=(cache == "warm"))
+            try:
+                with _quiet(args.verbose):
+                    if cache != "cold":
+                        pipeline.run(articles, mode)
+                        pipeline.timer.reset()
+                        pipeline.metrics.reset()
+                    llm_before, tavily_before = server.stats(), tavily.stats()
+                    cache_before = pipeline.scraper.cache_stats()
+
+                    start = time.perf_counter()
+                    counts = pipeline.run(articles, mode)
+                    elapsed = time.perf_counter() - start
+
+                llm_after, tavily_after = server.stats(), tavily.stats()
+                stages = pipeline.timer.summary()
+                cache_after = pipeline.scraper.cache_stats()
+                metrics = pipeline.metrics.snapshot()
+            finally:
+                pipeline.close()
+    finally:
+        server.stop()
+
+    return {
+        "claims_per_article": claims,
+        "workers": workers,
+        "cache": cache,
+        "mode": mode,
+        "articles": args.articles,
+        "elapsed": elapsed,
+        "claims": counts["claims"],
+        "with_evidence": counts["with_evidence"],
+        "claims_per_sec": counts["claims"] / elapsed if elapsed > 0 else 0.0,
+        "articles_per_sec": args.articles / elapsed if elapsed > 0 else 0.0,
+        "llm_requests": llm_after["requests"] - llm_before["requests"],
+        "llm_errors": llm_after["errors"] - llm_before["errors"],
+        "tavily_searches": tavily_after["searches"] - tavily_before["searches"],
+        "tavily_credits": tavily_after["credits"] - tavily_before["credits"],
+        "llm_parse_failures": _metric_total(metrics, "factcheck_llm_parse_failures_total"),
+        "evidence_hit_rate": _hit_rate(cache_before, cache_after),
+        "stages": stages,
+        "metrics": metrics["metrics"],
+    }
+
+def _hit_rate(before: Dict[str, Any], after: Dict[str, Any]) -> float:
+    """Evidence-cache hit rate of the measured run only (the warm-up run is excluded)."""
+    lookups = after["lookups"] - before["lookups"]
+    return (after["hits"] - before["hits"]) / lookups if lookups else 0.0
+
+def _metric_total(snapshot: Dict[str, Any], name: str) -> float:
+    metric = snapshot["metrics"].get(name) or {"samples": []}
+    return sum(sample.get("value", 0) for sample in metric["samples"])
+
+@contextlib.contextmanager
+def _quiet(verbose: bool):
+    # FactChecker 的 DEBUG 輸出會淹沒報表
+    if verbose:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def print_report(result: Dict[str, Any], out=sys.stdout) -> None:
+    print(
+        f"\n=== claims={result['claims_per_article']} workers={result['workers']} "
+        f"cache={result['cache']} mode={result['mode']} ===",
+        file=out,
+    )
+    print(
+        f"{result['claims']} claims ({result['with_evidence']} with evidence) / {result['articles']} articles in {result['elapsed']:.2f}s  "
+        f"-> {result['claims_per_sec']:.2f} claims/s, {result['articles_per_sec']:.2f} articles/s",
+        file=out,
+    )
+    print(
+        f"LLM requests {result['llm_requests']} (errors {result['llm_errors']}, "
+        f"parse failures {result['llm_parse_failures']:g}), "
+        f"Tavily searches {result['tavily_searches']} ({result['tavily_credits']} credits), "
+        f"evidence hit rate {result['evidence_hit_rate'] or 0:.0%}",
+        file=out,
+    )
+    print(f"{'stage':<10}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}", file=out)
+    for stage in STAGES:
+        s = result["stages"].get(stage)
+        if not s:
+            continue
+        print(
+            f"{stage:<10}{s['count']:>7}{s['p50']:>9.3f}{s['p95']:>9.3f}{s['p99']:>9.3f}{s['max']:>9.3f}",
+            file=out,
+        )
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+def _choice_list(choices):
+    def parse(value: str) -> List[str]:
+        items = [v for v in value.split(",") if v]
+        for item in items:
+            if item not in choices:
+                raise argparse.ArgumentTypeError(f"{item!r} not in {', '.join(choices)}")
+        return items
+    return parse
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the fact-checking pipeline.")
+    parser.add_argument("--claims", type=_int_list, default=[5], help="claims per article, e.g. 5,10,20")
+    parser.add_argument("--workers", type=_int_list, default=[8], help="claim worker threads, e.g. 4,16,32")
+    parser.add_argument("--cache", type=_choice_list(CACHE_STATES), default=["cold", "warm"],
+                        help=f"cache states: {','.join(CACHE_STATES)}")
+    parser.add_argument("--mode", type=_choice_list(MODES), default=["single"],
+                        help=f"fact-check modes: {','.join(MODES)}")
+    parser.add_argument("--articles", type=int, default=3, help="articles per run")
+    parser.add_argument("--llm-latency", default="lognormal:0.8:3.0", help="kind:median[:p95|spread]")
+    parser.add_argument("--search-latency", default="lognormal:1.0:2.5", help="kind:median[:p95|spread]")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--search-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write all results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's debug output")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> List[Dict[str, Any]]:
+    args = parse_args(argv)
+    results = []
+    for claims, workers, cache, mode in itertools.product(args.claims, args.workers, args.cache, args.mode):
+        result = run_case(args, claims, workers, cache, mode)
+        print_report(result)
+        results.append(result)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from typing import List, Dict, Any
+
+from .FactChecker import FactChecker
+from .AsyncOllamaClient import AsyncOllamaClient
+
+class AsyncFactChecker(FactChecker):
+    """
+    asyncio variant of FactChecker. Prompts and output validation are inherited,
+    only the LLM round trip is awaited on an AsyncOllamaClient.
+    Streaming (`stream=True`) is only available on the synchronous FactChecker.
+    """
+
+    def __init__(self, client: AsyncOllamaClient):
+        self.client = client
+
+    async def analyze_article(self, article_text: str, *, use_cache: bool = True) -> Dict[str, Any]:
+        """See FactChecker.analyze_article."""
+        messages = self._analysis_messages(article_text)
+        raw_result = await self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        return self._validate_analysis_res(raw_result)
+
+    async def generate_search_keywords(self, claim: str, *, use_cache: bool = True) -> List[str]:
+        """See FactChecker.generate_search_keywords."""
+        messages = self._keywords_messages(claim)
+        result = await self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        return self._validate_keywords(result)
+
+    async def generate_search_questions(self, claim: str, article_context: str, *, use_cache: bool = True) -> Dict[str, Any]:
+        """See FactChecker.generate_search_questions."""
+        messages = self._questions_messages(claim, article_context)
+        raw_result = await self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        return self._validate_search_questions(raw_result)
+
+    async def verify_claim(self, claim: str, search_evidence: str, *, use_cache: bool = True) -> Dict[str, Any]:
+        """See FactChecker.verify_claim."""
+        messages = self._verify_messages(claim, search_evidence)
+        raw_result = await self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        return self._validate_verify_res(raw_result)
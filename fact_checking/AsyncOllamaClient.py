@@ -0,0 +1,158 @@
+import asyncio
+import httpx
+from typing import Dict, List, Union, Optional
+
+from .OllamaClient import (
+    OllamaClient,
+    KEY,
+    API_URL,
+    DEFAULT_MODEL,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+)
+from .ResponseCache import ResponseCache
+
+DEBUG = 0
+
+class AsyncOllamaClient:
+    """
+    asyncio counterpart of OllamaClient built on `httpx.AsyncClient`.
+
+    At most `max_concurrency` chats are in flight at once; the rest wait on a
+    semaphore instead of occupying OS threads.
+
+    The httpx client and the semaphore belong to one event loop. They are
+    (re)created for whichever loop is running, so one client can be used by
+    successive `asyncio.run(...)` calls. Use `async with client:` (or
+    `await client.aclose()`) to release the connections of the current loop.
+    """
+
+    def __init__(
+            self,
+            api_url: str = API_URL,
+            api_key: str = KEY,
+            model_name: str = DEFAULT_MODEL,
+            *,
+            max_concurrency: int = DEFAULT_POOL_SIZE,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            cache: Optional[ResponseCache] = None,
+    ):
+        """
+        Args:
+            max_concurrency (int): Max concurrent requests (and pooled connections).
+            connect_timeout (float): Seconds to wait for the TCP/TLS handshake.
+            read_timeout (float): Seconds to wait for the model's response.
+            cache (ResponseCache): Optional reply cache, shared format with OllamaClient.
+        """
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.cache = cache
+
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        # httpx client 與 semaphore 都綁定 event loop，換了 loop 就重新建立
+        self.__client: Optional[httpx.AsyncClient] = None
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self.__client is None or self.__loop is not loop:
+            # 前一個 loop 已結束時，它的連線無法再 aclose，直接丟棄
+            self.__loop = loop
+            self.__client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.__client
+
+    async def chat(
+            self,
+            messages: List[Dict[str, str]],
+            json_mode: bool = False,
+            *,
+            use_cache: bool = True,
+    ) -> Union[Dict, List, str, None]:
+        """
+        Args:
+            use_cache (bool): If False, bypass the reply cache for this call.
+
+        Returns:
+            result: Dict/List if json_mode is True, otherwise, content(str)
+        """
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = ResponseCache.make_key(self.model_name, messages, json_mode)
+            content = await asyncio.to_thread(self.cache.get, cache_key)
+            if content is not None:
+                return OllamaClient._parse_json_content(content) if json_mode else content
+
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "stream": False,
+        }
+
+        if json_mode:
+            payload["format"] = "json"
+
+        response_data = await self.__call_api(payload)
+
+        if not response_data:
+            return None
+
+        try:
+            content = response_data["message"]["content"]
+        except KeyError:
+            print("錯誤：API 回傳格式不符合預期")
+            return None
+
+        # 與 OllamaClient.chat 相同：JSON 解析成功 (或非空文字) 才寫入快取
+        result = OllamaClient._parse_json_content(content) if json_mode else content
+        if cache_key and (result is not None if json_mode else content):
+            await asyncio.to_thread(self.cache.set, cache_key, content)
+        return result
+
+    async def __call_api(self, payload: Dict) -> Optional[Dict]:
+        client = self.__ensure_client()
+        async with self.__semaphore:
+            try:
+                response = await client.post(self.api_url, json=payload)
+                response.raise_for_status()
+                result: Dict = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"API Call Error: {e}")
+                return None
+
+        if DEBUG:
+            content = result.get('message', {}).get('content', '')
+            print(f"[DEBUG] Raw Content: {content[:100]}...\n[DEBUG]\n")
+
+        return result
+
+    async def aclose(self) -> None:
+        """Closes the pooled connections (if they belong to the running loop)."""
+        if self.__client is not None and self.__loop is asyncio.get_running_loop():
+            await self.__client.aclose()
+        self.__client = None
+        self.__semaphore = None
+        self.__loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
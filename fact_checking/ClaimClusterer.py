@@ -0,0 +1,175 @@
+import hashlib
+import random
+import re
+from typing import List, Optional, Sequence, Set
+
+from scraper.QueryNormalizer import QueryNormalizer
+
+class ClaimClusterer():
+    """
+    Groups near-duplicate claims so each group is fact-checked only once.
+
+    `analyze_article` often restates the same fact (e.g. a statistic in the
+    lead and again in the body). Each claim is reduced to a set of shingles:
+    CJK character bigrams plus Latin/digit words (`QueryNormalizer.char_ngrams`,
+    so full-width/half-width and punctuation differences disappear).
+    MinHash signatures with LSH banding propose candidate pairs. The exact
+    Jaccard similarity of the shingle sets then confirms each pair, and
+    confirmed pairs are merged with union-find.
+
+    Bigram overlap alone would merge claims that differ only in a number, a
+    negation, the subject, the direction of a change or the word order
+    ("營收成長 10%" / "營收成長 20%", "有宣布" / "未宣布", "台積電…" / "聯電…",
+    "調漲" / "調降", "美國對中國…" / "中國對美國…"), and those are exactly what
+    the verifier has to tell apart. So two claims are merged only if their
+    ordered content is identical (formatting and punctuation aside), or if
+    they are similar enough AND start with the same subject (leading shingle)
+    AND share the same numbers, negation characters and direction words.
+    Merging is a trade of accuracy for LLM calls, so the pipeline only
+    clusters when a clusterer is passed explicitly.
+
+    Usage:
+        clusters = ClaimClusterer().cluster(claims)
+        # [[0, 3], [1], [2]]  claims 0 and 3 are restatements; claim 0 is checked
+    """
+
+    NEGATIONS = "不未沒没無无非否別别勿"
+    # 變動方向：兩個論點用到的方向詞必須完全相同 (增加/減少、調漲/調降 ...)
+    DIRECTIONS = (
+        "增", "減", "减", "漲", "涨", "跌", "升", "降", "擴", "扩", "縮", "缩", "貶", "贬",
+        "成長", "成长", "衰退", "提高", "降低", "下滑", "走高", "走低",
+    )
+    NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+    # 2^61 - 1，MinHash 的 universal hashing 模數
+    PRIME = (1 << 61) - 1
+
+    def __init__(
+            self,
+            threshold: float = 0.85,
+            *,
+            ngram: int = 2,
+            num_perm: int = 64,
+            bands: int = 32,
+            normalizer: Optional[QueryNormalizer] = None,
+            seed: int = 1,
+    ):
+        """
+        Args:
+            threshold (float): Minimum Jaccard similarity (0-1) of two claims'
+                shingle sets to treat them as the same claim.
+            ngram (int): CJK character n-gram size.
+            num_perm (int): MinHash signature length; must be divisible by `bands`.
+            bands (int): LSH bands. More bands find lower-similarity candidates
+                (the candidate threshold is about (1 / bands) ** (bands / num_perm)).
+            normalizer (QueryNormalizer): Provides the n-gram shingles.
+            seed (int): Seed of the MinHash permutations (results are deterministic).
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.ngram = ngram
+        self.num_perm = num_perm
+        self.bands = bands
+        self.__normalizer = normalizer or QueryNormalizer()
+
+        rng = random.Random(seed)
+        self.__permutations = [
+            (rng.randrange(1, self.PRIME), rng.randrange(0, self.PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def cluster(self, claims: Sequence[str]) -> List[List[int]]:
+        """
+        Returns:
+            clusters(list): Lists of claim indices, ordered by each cluster's
+                first claim. Every index appears exactly once. The first index
+                of each cluster is its representative: the member with the
+                most shingles (the most specific wording), ties going to the
+                earliest claim.
+        """
+        shingles = [self.shingles(claim) for claim in claims]
+        parent = list(range(len(claims)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in self.__candidate_pairs(shingles):
+            if find(i) == find(j):
+                continue
+            if self.__same_claim(claims[i], claims[j], shingles[i], shingles[j]):
+                parent[find(j)] = find(i)
+
+        groups = {}
+        for i in range(len(claims)):
+            groups.setdefault(find(i), []).append(i)
+
+        clusters = []
+        for members in sorted(groups.values(), key=lambda m: m[0]):
+            representative = max(members, key=lambda i: (len(shingles[i]), -i))
+            clusters.append([representative] + [i for i in members if i != representative])
+        return clusters
+
+    def similarity(self, a: str, b: str) -> float:
+        """Jaccard similarity of the two claims' shingle sets (ignores the merge guards)."""
+        return _jaccard(self.shingles(a), self.shingles(b))
+
+    def shingles(self, claim: str) -> Set[str]:
+        return set(self.__normalizer.char_ngrams(claim or "", self.ngram))
+
+    def signature(self, shingles: Set[str]) -> List[int]:
+        """MinHash signature of a shingle set (`num_perm` values)."""
+        if not shingles:
+            return [self.PRIME] * self.num_perm
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in shingles
+        ]
+        return [min((a * h + b) % self.PRIME for h in hashes) for a, b in self.__permutations]
+
+    def __candidate_pairs(self, shingles: List[Set[str]]) -> Set[tuple]:
+        """LSH：任一 band 的簽章完全相同即為候選"""
+        rows = self.num_perm // self.bands
+        buckets = {}
+        for i, shingle_set in enumerate(shingles):
+            if not shingle_set:
+                continue
+            signature = self.signature(shingle_set)
+            for band in range(self.bands):
+                key = (band, tuple(signature[band * rows:(band + 1) * rows]))
+                buckets.setdefault(key, []).append(i)
+
+        pairs = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+        return pairs
+
+    def __same_claim(self, a: str, b: str, shingles_a: Set[str], shingles_b: Set[str]) -> bool:
+        # 依序比對內容 (忽略全半形與標點)：完全相同就是同一論點
+        if self.__normalizer.tokenize(a) == self.__normalizer.tokenize(b):
+            return True
+        return self.__compatible(a, b) and _jaccard(shingles_a, shingles_b) >= self.threshold
+
+    def __compatible(self, a: str, b: str) -> bool:
+        """主詞、數字、否定詞或方向詞不同的論點即使字面相近也要分開查核"""
+        terms_a = self.__normalizer.char_ngrams(a, self.ngram)
+        terms_b = self.__normalizer.char_ngrams(b, self.ngram)
+        normalized_a = self.__normalizer.normalize(a)
+        normalized_b = self.__normalizer.normalize(b)
+        return (
+            terms_a[:1] == terms_b[:1]
+            and set(self.NUMBER_PATTERN.findall(normalized_a)) == set(self.NUMBER_PATTERN.findall(normalized_b))
+            and {ch for ch in a if ch in self.NEGATIONS} == {ch for ch in b if ch in self.NEGATIONS}
+            and {w for w in self.DIRECTIONS if w in normalized_a} == {w for w in self.DIRECTIONS if w in normalized_b}
+        )
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
@@ -1,18 +1,32 @@
 import json
 import datetime
-from typing import List, Dict, Any
+import functools
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
 from .OllamaClient import OllamaClient
 
 DEBUG = 1
 
 class FactChecker:
+    VALID_VERDICTS = ("Correct", "Incorrect", "Unverifiable")
+
     def __init__(self, client: OllamaClient):
         self.client = client
 
+    def _now(self) -> datetime.datetime:
+        """今天的日期 (寫進 prompt)；有 cassette 時使用錄製當時的時間，重播的 prompt 才會相同"""
+        cassette = getattr(self.client, "cassette", None)
+        if cassette is not None:
+            return cassette.now()
+        return datetime.datetime.now()
+
     def analyze_article(
             self,
-            article_text: str
+            article_text: str,
+            *,
+            stream: bool = False,
+            on_claim: Optional[Callable[[str], None]] = None,
+            use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         Analyzes the given article, returns \n
@@ -21,6 +35,9 @@ class FactChecker:
 
         Args:
             article_text(str): article's content
+            stream(bool): read the reply as a token stream and stop once all keys are complete
+            on_claim(Callable): (stream mode) called with each claim as soon as the model finishes writing it
+            use_cache(bool): False = ask the model again instead of reusing a cached reply
 
         Returns:
             analysis(dict):
@@ -32,6 +49,221 @@ class FactChecker:
                 }
         
         """
+        messages = self._analysis_messages(article_text)
+
+        if stream:
+            def forward_claim(key: str, item: Any):
+                if key == "claims" and on_claim and isinstance(item, (str, int, float)):
+                    on_claim(str(item))
+
+            raw_result = self.client.chat_until_keys(
+                messages,
+                ["is_subjective", "subjectivity_reason", "claims"],
+                on_item=forward_claim,
+                use_cache=use_cache,
+            )
+        else:
+            raw_result = self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        cleaned_result = self._validate_analysis_res(raw_result)
+
+        return cleaned_result
+
+    def generate_search_keywords(
+            self,
+            claim: str,
+            *,
+            use_cache: bool = True,
+    ) -> List[str]:
+        """
+        針對單一陳述句，生成搜尋關鍵字
+
+        Args:
+            claim(str):
+            use_cache(bool): False = ask the model again instead of reusing a cached reply
+
+        Returns:
+            keyword_list(List):
+                ["關鍵字組合1", "關鍵字組合2", "關鍵字組合3"]
+        
+        """
+        messages = self._keywords_messages(claim)
+
+        result = self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        
+        return self._validate_keywords(result)
+
+    def generate_search_questions(
+            self,
+            claim: str,
+            article_context: str,
+            *,
+            use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        生成查詢字典 (example as below)
+
+        Args:
+            claim(str):
+            article_context(str): 原始文章內容
+            use_cache(bool): False = ask the model again instead of reusing a cached reply
+
+        Returns:
+            search_dict(Dict):
+                {\n
+                    **"search_duration"**: "all_time" | "last_year" | "last_month,\n
+                    **"search_region"**: "Taiwan"(str),\n
+                    **"questions"**: [q1(str), q2(str), ...],\n
+                }
+            
+        """
+        messages = self._questions_messages(claim, article_context)
+
+        raw_result = self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        cleaned_result = self._validate_search_questions(raw_result)
+        
+        return cleaned_result
+
+    def verify_claim(
+            self,
+            claim: str,
+            search_evidence: str,
+            *,
+            stream: bool = False,
+            use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        判斷與原始文章的關聯性 (驗證真偽)
+
+        Args:
+            claim(str):
+            search_evidence(str):
+            stream(bool): read the reply as a token stream and stop once all keys are complete
+            use_cache(bool): False = ask the model again instead of reusing a cached reply
+
+        Returns:
+            result(Dict[str, Any]):
+                {\n
+                    **"verdict"**           : "Correct" | "Incorrect" | "Unverifiable",\n
+                    **"confidence_score"**  : 0-10,\n
+                    **"reason"**            : "請引用證據說明判定理由"\n
+                }
+
+        """
+        messages = self._verify_messages(claim, search_evidence)
+
+        if stream:
+            raw_result = self.client.chat_until_keys(
+                messages,
+                ["verdict", "confidence_score", "reason"],
+                use_cache=use_cache,
+            )
+        else:
+            raw_result = self.client.chat(messages, json_mode=True, use_cache=use_cache)
+        cleaned_result = self._validate_verify_res(raw_result)
+        
+        return cleaned_result
+
+    def plan_searches_batch(
+            self,
+            claims: List[str],
+            article_context: str,
+            *,
+            batch_size: int = 10,
+            run: Optional[Callable[..., Any]] = None,
+            use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        一次請求為多個陳述句同時生成搜尋計畫 (問句 + 關鍵字)，
+        取代每個陳述句各自呼叫 generate_search_questions + generate_search_keywords。
+        解析失敗的項目才會退回逐一呼叫。
+
+        Args:
+            claims(List[str]):
+            article_context(str): 原始文章內容
+            batch_size(int): 每次請求最多包含的陳述句數
+            run(Callable): 每一次 LLM 請求都以 `run(index, fn, *args)` 呼叫
+                (批次請求的 index 為該組第一個陳述句，退回的逐一呼叫為該陳述句)，
+                可讓呼叫端將每個請求各自排進 rate limiter / scheduler。預設直接呼叫 `fn(*args)`
+            use_cache(bool): False 則每個請求 (含退回的逐一呼叫) 都不使用快取的回覆
+
+        Returns:
+            plans(List[Dict]): 與 claims 順序相同
+                {\n
+                    **"search_duration"**: "all_time" | "last_year" | "last_month",\n
+                    **"search_region"**: "Taiwan"(str),\n
+                    **"questions"**: [q1(str), q2(str), ...],\n
+                    **"keywords"**: [k1(str), ...],\n
+                }
+        """
+        run = run or self._run_direct
+        plans: List[Optional[Dict[str, Any]]] = [None] * len(claims)
+
+        for start in range(0, len(claims), batch_size):
+            group = claims[start:start + batch_size]
+            messages = self._plan_batch_messages(group, article_context)
+            raw_result = run(start, self._chat_json, messages, use_cache)
+
+            for offset, item in self._match_batch_items(raw_result, "plans", len(group)).items():
+                plan = self._validate_batch_plan(item)
+                if plan is not None:
+                    plans[start + offset] = plan
+
+        for i, claim in enumerate(claims):
+            if plans[i] is not None:
+                continue
+            if DEBUG:
+                print(f"[batch plan] fallback for claim {i + 1}")
+            questions = self._with_cache_option(self.generate_search_questions, use_cache)
+            keywords = self._with_cache_option(self.generate_search_keywords, use_cache)
+            plan = run(i, questions, claim, article_context)
+            plan["keywords"] = run(i, keywords, plan["questions"][0]) if plan["questions"] else []
+            plans[i] = plan
+
+        return plans
+
+    def verify_claims_batch(
+            self,
+            items: List[Tuple[str, str]],
+            *,
+            batch_size: int = 5,
+            run: Optional[Callable[..., Any]] = None,
+            use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        一次請求驗證多個 (陳述句, 證據)，解析失敗的項目才退回 verify_claim。
+
+        Args:
+            items(List[Tuple[str, str]]): [(claim, search_evidence), ...]
+            batch_size(int): 每次請求最多包含的項目數
+            run(Callable): 同 plan_searches_batch
+            use_cache(bool): 同 plan_searches_batch
+
+        Returns:
+            results(List[Dict]): 與 items 順序相同，格式同 verify_claim
+        """
+        run = run or self._run_direct
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        for start in range(0, len(items), batch_size):
+            group = items[start:start + batch_size]
+            messages = self._verify_batch_messages(group)
+            raw_result = run(start, self._chat_json, messages, use_cache)
+
+            for offset, item in self._match_batch_items(raw_result, "results", len(group)).items():
+                # 批次中判決不合法的項目不做同義詞推測，改走 verify_claim 重新驗證
+                if self._has_valid_verdict(item):
+                    results[start + offset] = self._validate_verify_res(item)
+
+        for i, (claim, evidence) in enumerate(items):
+            if results[i] is None:
+                if DEBUG:
+                    print(f"[batch verify] fallback for claim {i + 1}")
+                results[i] = run(i, self._with_cache_option(self.verify_claim, use_cache), claim, evidence)
+
+        return results
+
+    def _analysis_messages(self, article_text: str) -> List[Dict[str, str]]:
+        """建立 analyze_article 的 prompt"""
         system_prompt = """
         你是一個專業的新聞查核員。請分析使用者的文章，執行以下任務：
         1. 判斷文章整體是「主觀 (Subjective)」還是「客觀 (Objective)」。
@@ -57,26 +289,10 @@ class FactChecker:
             {"role": "user", "content": f"文章內容：\n{article_text}"}
         ]
 
-        raw_result = self.client.chat(messages, json_mode=True)
-        cleaned_result = self.__validate_analysis_res(raw_result)
-
-        return cleaned_result
-
-    def generate_search_keywords(
-            self,
-            claim: str,
-    ) -> List[str]:
-        """
-        針對單一陳述句，生成搜尋關鍵字
-
-        Args:
-            claim(str):
+        return messages
 
-        Returns:
-            keyword_list(List):
-                ["關鍵字組合1", "關鍵字組合2", "關鍵字組合3"]
-        
-        """
+    def _keywords_messages(self, claim: str) -> List[Dict[str, str]]:
+        """建立 generate_search_keywords 的 prompt"""
         system_prompt = """
         你是一個搜尋引擎專家 (SEO Expert)。
         請針對使用者提供的「陳述句」，生成 3 組適合 Google 搜尋的關鍵字。
@@ -93,34 +309,11 @@ class FactChecker:
             {"role": "user", "content": f"需要驗證的陳述句：{claim}"}
         ]
 
-        result = self.client.chat(messages, json_mode=True)
-        
-        if result and "keywords" in result:
-            return result["keywords"]
-        return []
+        return messages
 
-    def generate_search_questions(
-            self,
-            claim: str,
-            article_context: str,
-    ) -> Dict[str, Any]:
-        """
-        生成查詢字典 (example as below)
-
-        Args:
-            claim(str):
-            article_context(str): 原始文章內容
-
-        Returns:
-            search_dict(Dict):
-                {\n
-                    **"search_duration"**: "all_time" | "last_year" | "last_month,\n
-                    **"search_region"**: "Taiwan"(str),\n
-                    **"questions"**: [q1(str), q2(str), ...],\n
-                }
-            
-        """
-        now = datetime.datetime.now()
+    def _questions_messages(self, claim: str, article_context: str) -> List[Dict[str, str]]:
+        """建立 generate_search_questions 的 prompt (內含當天日期)"""
+        now = self._now()
         current_date_str = now.strftime("%Y-%m-%d")
         last_year = now.year - 1
 
@@ -170,32 +363,10 @@ class FactChecker:
             {"role": "user", "content": f"需要驗證的陳述句：{claim}"}
         ]
 
-        raw_result = self.client.chat(messages, json_mode=True)
-        cleaned_result = self.__validate_search_questions(raw_result)
-        
-        return cleaned_result
+        return messages
 
-    def verify_claim(
-            self,
-            claim: str,
-            search_evidence: str,
-    ) -> Dict[str, Any]:
-        """
-        判斷與原始文章的關聯性 (驗證真偽)
-
-        Args:
-            claim(str):
-            search_evidence(str):
-
-        Returns:
-            result(Dict[str, Any]):
-                {\n
-                    **"verdict"**           : "Correct" | "Incorrect" | "Unverifiable",\n
-                    **"confidence_score"**  : 0-10,\n
-                    **"reason"**            : "請引用證據說明判定理由"\n
-                }
-
-        """
+    def _verify_messages(self, claim: str, search_evidence: str) -> List[Dict[str, str]]:
+        """建立 verify_claim 的 prompt"""
         system_prompt = """
         你是一個公正且具備邏輯推理能力的查核法官。
         請比對「原始主張 (Claim)」與「搜尋證據 (Evidence)」，判斷主張的真實性。
@@ -232,12 +403,116 @@ class FactChecker:
             {"role": "user", "content": user_content}
         ]
 
-        raw_result = self.client.chat(messages, json_mode=True)
-        cleaned_result = self.__validate_verify_res(raw_result)
-        
-        return cleaned_result
+        return messages
+
+    def _plan_batch_messages(self, claims: List[str], article_context: str) -> List[Dict[str, str]]:
+        """建立 plan_searches_batch 的 prompt"""
+        now = self._now()
+        current_date_str = now.strftime("%Y-%m-%d")
+        last_year = now.year - 1
 
-    def __validate_analysis_res(
+        system_prompt = f"""
+        你是一個頂尖的 Google 搜尋引擎優化 (SEO) 專家。
+        使用者會提供多個編號的「陳述句 (Claim)」，請為「每一個」陳述句分別規劃搜尋策略。
+
+        現在時間是 {current_date_str}。
+        陳述句背景：
+        ---
+        {article_context[:800]}...
+        ---
+
+        【轉換規則】：
+        1. **拒絕指令句**：絕對不要使用「搜尋...」、「查找...」、「確認...」這些冗詞。
+        2. **關鍵字化**：提取陳述句中的「實體 (Entity)」(人名、地名、專有名詞) 加上「屬性」。
+        3. **口語短問句**：直接模擬一般人在 Google 搜尋框打入的問題。
+        4. **keywords**：最適合直接丟進搜尋引擎的精簡關鍵字組合，第一組最重要。
+        5. **語言**：JSON 內容必須嚴格使用「繁體中文」。
+        6. 每個 id 都必須回傳一筆，且 id 與輸入編號一致。
+
+        【範例】：
+        Input Claim: "台積電 {last_year} 年營收創下歷史新高，突破 2 兆元。"
+        Good questions: ["台積電 {last_year} 營收", "台積電 營收歷史新高 真實性"]
+        Good keywords: ["台積電 {last_year} 營收 2兆", "台積電 {last_year} 財報"]
+
+        請回傳 JSON 格式：
+        {{
+            "plans": [
+                {{
+                    "id": 1,
+                    "search_region": "Taiwan" 或 "Global" 或 "US",
+                    "search_duration": "all_time" 或 "last_year" 或 "last_month",
+                    "questions": ["關鍵字組合 1", "口語短問句 1"],
+                    "keywords": ["關鍵字組合1", "關鍵字組合2"]
+                }}
+            ]
+        }}
+        """
+
+        numbered = "\n".join(f"{i}. {claim}" for i, claim in enumerate(claims, start=1))
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"需要驗證的陳述句：\n{numbered}"}
+        ]
+
+        return messages
+
+    def _verify_batch_messages(self, items: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        """建立 verify_claims_batch 的 prompt"""
+        system_prompt = """
+        你是一個公正且具備邏輯推理能力的查核法官。
+        使用者會提供多組編號的「原始主張 (Claim)」與「搜尋證據 (Evidence)」，請「逐組獨立」判斷主張的真實性，
+        不可拿別組的證據來判斷。
+
+        【判定規則 (請嚴格遵守)】：
+        1. **證據不足 (Missing Evidence)**：
+           - 如果證據內容為 "None"、空字串，或明確表示「找不到相關資料」，請務必判定為 **Unverifiable**，信心分數給 0。
+           - **絕對不可**因為找不到資料就判定為 Incorrect。
+
+        2. **語義相符 (Semantic Match)**：
+           - 不要只做字面比對。如果證據支持主張的核心概念，應判定為 **Correct**。
+           - 如果人名、地名或關鍵事件相符，即使細節（如地點描述）略有不同，仍可視為 Correct。
+
+        3. **部分正確 (Partially Correct)**：
+           - 如果主張中包含多個事實（A和B），證據只支持 A 但未提及 B（且未反駁 B），請判定為 **Correct** 或 **Unverifiable** (視 A 的重要性而定)，不要直接判 Incorrect。
+
+        4. **語言要求**：JSON 內的所有文字內容（reason, verdict）必須嚴格使用「繁體中文」。
+
+        5. 每個 id 都必須回傳一筆，且 id 與輸入編號一致。
+
+        請回傳 JSON 格式：
+        {
+            "results": [
+                {
+                    "id": 1,
+                    "verdict": "Correct" | "Incorrect" | "Unverifiable",
+                    "confidence_score": 0-10 (0為無法判斷，10為完全確信),
+                    "reason": "請引用證據說明判定理由，若證據不足請直說。"
+                }
+            ]
+        }
+        """
+
+        blocks = []
+        for i, (claim, evidence) in enumerate(items, start=1):
+            blocks.append(f"""
+        <{i}>
+        【原始主張】：{claim}
+        【搜尋證據】：{evidence}
+        """)
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "".join(blocks)}
+        ]
+
+        return messages
+
+    def _validate_keywords(self, result: Any) -> List[str]:
+        if result and isinstance(result, dict) and "keywords" in result:
+            return result["keywords"]
+        return []
+
+    def _validate_analysis_res(
             self,
             result: Any,
     ) -> Dict[str, Any]:
@@ -275,7 +550,7 @@ class FactChecker:
 
         return safe_output
 
-    def __validate_verify_res(
+    def _validate_verify_res(
             self,
             result: Any,
     ) -> Dict[str, Any]:
@@ -293,7 +568,7 @@ class FactChecker:
 
         raw_verdict = result.get("verdict", "Unverifiable")
 
-        VALID_VERDICTS = {"Correct", "Incorrect", "Unverifiable"}
+        VALID_VERDICTS = set(self.VALID_VERDICTS)
         POSSIBLE_CORRECT = ["True", "Yes", "Supported"]
         POSSIBLE_INCORRECT = ["False", "No", "Refuted"]
         
@@ -323,7 +598,7 @@ class FactChecker:
 
         return safe_output
     
-    def __validate_search_questions(self, result: Any) -> Dict[str, Any]:
+    def _validate_search_questions(self, result: Any) -> Dict[str, Any]:
 
         safe_output = {
             "reasoning": "未提供理由",
@@ -356,4 +631,86 @@ class FactChecker:
         if DEBUG:
             print(f"[questions]\n{safe_output['questions']}\n[questions]\n")
 
-        return safe_output
\ No newline at end of file
+        return safe_output
+
+    @staticmethod
+    def _run_direct(index: int, fn: Callable[..., Any], *args: Any) -> Any:
+        """Default `run` of the batch methods: calls `fn(*args)` right away."""
+        return fn(*args)
+
+    @staticmethod
+    def _with_cache_option(fn: Callable[..., Any], use_cache: bool) -> Callable[..., Any]:
+        """`fn` with `use_cache` bound; keeps `fn.__name__` for `run` (scheduler logs)."""
+        return functools.update_wrapper(functools.partial(fn, use_cache=use_cache), fn)
+
+    def _chat_json(self, messages: List[Dict[str, str]], use_cache: bool = True) -> Any:
+        return self.client.chat(messages, json_mode=True, use_cache=use_cache)
+
+    def _match_batch_items(
+            self,
+            result: Any,
+            list_key: str,
+            expected: int,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Maps a batched reply back to input positions (0-based) using each item's
+        1-based "id". A reply whose ids are exactly `{0..expected-1}` is read as
+        0-based; any other reply containing id 0 is ambiguous and rejected as a
+        whole (every position falls back to a per-claim call). Items without a
+        usable id fall back to their list position only when the reply has
+        exactly `expected` items. Unmatched positions are omitted.
+        """
+        matched: Dict[int, Dict[str, Any]] = {}
+
+        if isinstance(result, list):
+            raw_items = result
+        elif isinstance(result, dict) and isinstance(result.get(list_key), list):
+            raw_items = result[list_key]
+        else:
+            return matched
+
+        ids: List[Optional[int]] = []
+        for item in raw_items:
+            try:
+                ids.append(int(item.get("id")) if isinstance(item, dict) else None)
+            except (ValueError, TypeError):
+                ids.append(None)
+
+        base = 1
+        if 0 in ids:
+            if None in ids or sorted(ids) != list(range(expected)):
+                if DEBUG:
+                    print(f"[batch] ambiguous ids {ids}, rejecting {list_key}")
+                return matched
+            base = 0
+
+        for pos, (item, item_id) in enumerate(zip(raw_items, ids)):
+            if not isinstance(item, dict):
+                continue
+            if item_id is not None:
+                index = item_id - base
+            else:
+                index = pos if len(raw_items) == expected else -1
+            if 0 <= index < expected and index not in matched:
+                matched[index] = item
+
+        return matched
+
+    def _has_valid_verdict(self, item: Dict[str, Any]) -> bool:
+        """True if the item's "verdict" is one of VALID_VERDICTS (case/whitespace-insensitive)."""
+        verdict = item.get("verdict")
+        return isinstance(verdict, str) and verdict.strip().title() in self.VALID_VERDICTS
+
+    def _validate_batch_plan(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns a cleaned plan, or None if the item has no usable questions."""
+        plan = self._validate_search_questions(item)
+        if plan["error"]:
+            return None
+
+        raw_keywords = item.get("keywords", [])
+        if isinstance(raw_keywords, str):
+            raw_keywords = [raw_keywords]
+        plan["keywords"] = [str(k) for k in raw_keywords if isinstance(k, str)] \
+            if isinstance(raw_keywords, list) else []
+
+        return plan
\ No newline at end of file
@@ -1,7 +1,18 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
-from typing import Dict, Any, List, Union, Optional
+import threading
+import time
+from typing import Dict, Any, List, Union, Optional, Tuple, Iterator, Iterable, Callable
+
+from .StreamJsonExtractor import StreamJsonExtractor
+from .ResponseCache import ResponseCache
+from runtime.SingleFlight import SingleFlight
+from runtime.RetryPolicy import RetryPolicy
+from runtime.Hedger import Hedger
+from runtime.MetricsRegistry import MetricsRegistry, get_metrics
+from runtime.Cassette import Cassette
 
 # from API_KEY import OLLAMA_API_KEY as KEY
 import os # 改從環境變數讀取(for Zeabur)
@@ -10,33 +21,155 @@ KEY = os.getenv("OLLAMA_API_KEY")
 DEBUG = 0
 API_URL = "https://api-gateway.netdb.csie.ncku.edu.tw/api/chat"
 DEFAULT_MODEL = "gemma3:4b"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+# 只重試連線失敗、逾時與 408/425/429/5xx，其餘錯誤 (400/401...) 直接回報
+DEFAULT_RETRY = RetryPolicy(
+    max_attempts=3,
+    base_delay=0.5,
+    max_delay=8.0,
+    retry_exceptions=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+)
 
 class OllamaClient:
+
+    _shared_session: Optional[requests.Session] = None
+    _shared_lock = threading.Lock()
+
     def __init__(
             self,
             api_url: str = API_URL,
             api_key: str = KEY,
             model_name: str = DEFAULT_MODEL,
+            *,
+            session: Optional[requests.Session] = None,
+            pool_size: int = DEFAULT_POOL_SIZE,
+            connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float = DEFAULT_READ_TIMEOUT,
+            cache: Optional[ResponseCache] = None,
+            single_flight: Optional[SingleFlight] = None,
+            retry: Optional[RetryPolicy] = DEFAULT_RETRY,
+            hedger: Optional[Hedger] = None,
+            metrics: Optional[MetricsRegistry] = None,
+            cassette: Optional[Cassette] = None,
     ):
+        """
+        Args:
+            session (requests.Session): Pooled session to reuse. If None, a
+                private pooled session of `pool_size` connections is created.
+                Pass `OllamaClient.get_shared_session()` to share one pool
+                across clients.
+            pool_size (int): Max keep-alive connections kept to the gateway.
+            connect_timeout (float): Seconds to wait for the TCP/TLS handshake.
+            read_timeout (float): Seconds to wait for the model's response.
+            cache (ResponseCache): Optional reply cache consulted by `chat`.
+            single_flight (SingleFlight): If given, identical concurrent `chat`
+                payloads share one gateway call. Share one instance across
+                clients to coalesce between them.
+            retry (RetryPolicy): Backoff policy for gateway calls. None = single attempt.
+            hedger (Hedger): If given, a gateway call slower than the recent p95
+                is duplicated and the first reply wins.
+            metrics (MetricsRegistry): Where call counts, gateway latency and
+                JSON parse failures are recorded. Defaults to `get_metrics()`.
+            cassette (Cassette): If given, `chat` / `chat_until_keys` results
+                are recorded to it, or (replay mode) served from it without
+                touching the gateway or the reply cache.
+        """
         self.api_url = api_url
         self.api_key = api_key
         self.model_name = model_name
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.session = session if session is not None else self.create_session(pool_size)
+        self.cache = cache
+        self.single_flight = single_flight
+        self.retry = retry
+        self.hedger = hedger
+        self.metrics = metrics or get_metrics()
+        self.cassette = cassette
+        self.__calls = self.metrics.counter(
+            "factcheck_llm_calls_total", "LLM chat calls by where the reply came from", labels=("source",))
+        self.__requests = self.metrics.counter(
+            "factcheck_llm_requests_total", "Gateway HTTP attempts (each retry and hedged duplicate counted) by outcome", labels=("outcome",))
+        self.__latency = self.metrics.histogram(
+            "factcheck_llm_request_seconds", "Gateway latency per call, retries included")
+        self.__parse_failures = self.metrics.counter(
+            "factcheck_llm_parse_failures_total", "LLM replies that could not be parsed as JSON")
         
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
+    @staticmethod
+    def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+        """
+        Builds a keep-alive session whose connection pool can serve
+        `pool_size` concurrent requests without re-handshaking.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=False,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    @classmethod
+    def get_shared_session(cls, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+        """
+        Returns the process-wide pooled session, creating it on first use.
+        `pool_size` only takes effect on the first call.
+        """
+        with cls._shared_lock:
+            if cls._shared_session is None:
+                cls._shared_session = cls.create_session(pool_size)
+            return cls._shared_session
+
     def chat(
             self,
             messages: List[Dict[str, str]],
             json_mode: bool = False,
+            *,
+            use_cache: bool = True,
     ) -> Union[Dict, List, str, None]:
         """
+        Args:
+            use_cache (bool): If False, bypass the reply cache for this call.
+
         Returns:
             result: Dict/List if json_mode is True, otherwise, content(str)
 
         """        
+        if self.cassette is not None:
+            return self.cassette.call(
+                "chat", Cassette.make_key(self.model_name, messages, json_mode),
+                self.__chat, messages, json_mode, use_cache,
+                request={"messages": messages, "json_mode": json_mode},
+            )
+        return self.__chat(messages, json_mode, use_cache)
+
+    def __chat(
+            self,
+            messages: List[Dict[str, str]],
+            json_mode: bool,
+            use_cache: bool,
+    ) -> Union[Dict, List, str, None]:
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = ResponseCache.make_key(self.model_name, messages, json_mode)
+            content = self.cache.get(cache_key)
+            if content is not None:
+                if DEBUG:
+                    print(f"[DEBUG] LLM cache hit: {cache_key[:12]}")
+                self.__calls.inc(source="cache")
+                return self._parse_json_content(content) if json_mode else content
+
+        self.__calls.inc(source="api")
+
         payload = {
             "model": self.model_name,
             "messages": messages,
@@ -46,7 +179,11 @@ class OllamaClient:
         if json_mode:
             payload["format"] = "json"
 
-        response_data = self.__call_api(self.api_url, payload)
+        if self.single_flight is not None:
+            flight_key = cache_key or ResponseCache.make_key(self.model_name, messages, json_mode)
+            response_data = self.single_flight.run(flight_key, self.__call_api, self.api_url, payload)
+        else:
+            response_data = self.__call_api(self.api_url, payload)
         
         if not response_data:
             return None
@@ -58,32 +195,208 @@ class OllamaClient:
             return None
 
         if json_mode:
-            return self.__parse_json_content(content)
+            parsed = self._parse_json_content(content)
+            if parsed is None:
+                self.__parse_failures.inc()
+            if cache_key and parsed is not None:
+                self.cache.set(cache_key, content)
+            return parsed
         
+        if cache_key and content:
+            self.cache.set(cache_key, content)
         return content
 
-    def __call_api(self, url: str, payload: Dict) -> Optional[Dict]:
+    def chat_stream(
+            self,
+            messages: List[Dict[str, str]],
+            json_mode: bool = False,
+    ) -> Iterator[str]:
+        """
+        Streams the model's reply, yielding content fragments as Ollama's
+        NDJSON stream delivers them. Closing the generator early closes the
+        connection, which cancels the rest of the generation on the gateway.
+
+        Yields:
+            fragment(str): next piece of the assistant message
+        """
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "stream": True,
+        }
+
+        if json_mode:
+            payload["format"] = "json"
+
+        start = time.perf_counter()
         try:
-            response = requests.post(
-                url,
+            response = self.session.post(
+                self.api_url,
                 headers=self.headers,
                 json=payload,
-                timeout=30,
+                timeout=self.timeout,
+                stream=True,
             )
             response.raise_for_status()
-            result: Dict = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"API Call Error: {e}")
+            self.__requests.inc(outcome="error")
+            return
+        # 串流只記錄到第一個位元組 (回應標頭) 的延遲
+        self.__requests.inc(outcome="ok")
+        self.__latency.observe(time.perf_counter() - start)
 
-            if DEBUG:
-                content = result.get('message', {}).get('content', '')
-                print(f"[DEBUG] Raw Content: {content[:100]}...\n[DEBUG]\n")
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                try:
+                    event: Dict = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
 
-            return result
-            
+                fragment = event.get("message", {}).get("content", "")
+                if fragment:
+                    yield fragment
+                if event.get("done"):
+                    break
         except requests.exceptions.RequestException as e:
+            print(f"API Stream Error: {e}")
+        finally:
+            response.close()
+
+    def chat_until_keys(
+            self,
+            messages: List[Dict[str, str]],
+            required_keys: Iterable[str],
+            *,
+            cancel: bool = True,
+            on_item: Optional[Callable[[str, Any], None]] = None,
+            use_cache: bool = True,
+    ) -> Optional[Dict]:
+        """
+        Streams a JSON-mode chat and returns as soon as every key in
+        `required_keys` has a complete value.
+
+        Args:
+            required_keys (Iterable[str]): top-level keys the caller needs.
+            cancel (bool): If True, stop the generation once the keys are
+                complete; otherwise keep reading until the model finishes.
+            on_item (Callable): forwarded to StreamJsonExtractor, called with
+                (key, element) for each completed element of a top-level array.
+            use_cache (bool): If False, skip the reply cache lookup. Streamed
+                replies are never written to the cache since they may be cut short.
+
+        Returns:
+            result: Dict with at least `required_keys` when available,
+                otherwise whatever could be parsed from the full text.
+        """
+        required_keys = list(required_keys)
+        if self.cassette is not None:
+            key = Cassette.make_key(self.model_name, messages, True, sorted(required_keys), cancel)
+            if self.cassette.replaying:
+                result = self.cassette.play("chat_until_keys", key)
+                # 重播時沒有串流，依結果補發每個陣列元素
+                if on_item and isinstance(result, dict):
+                    for name, value in result.items():
+                        for item in value if isinstance(value, list) else ():
+                            on_item(name, item)
+                return result
+            return self.cassette.call(
+                "chat_until_keys", key,
+                self.__chat_until_keys, messages, required_keys, cancel, on_item, use_cache,
+                request={"messages": messages, "required_keys": required_keys},
+            )
+        return self.__chat_until_keys(messages, required_keys, cancel, on_item, use_cache)
+
+    def __chat_until_keys(
+            self,
+            messages: List[Dict[str, str]],
+            required_keys: List[str],
+            cancel: bool,
+            on_item: Optional[Callable[[str, Any], None]],
+            use_cache: bool,
+    ) -> Optional[Dict]:
+        extractor = StreamJsonExtractor(on_item=on_item)
+
+        if self.cache is not None and use_cache:
+            content = self.cache.get(ResponseCache.make_key(self.model_name, messages, True))
+            if content is not None:
+                self.__calls.inc(source="cache")
+                extractor.feed(content)
+                if extractor.has_keys(required_keys):
+                    return dict(extractor.values)
+                return self._parse_json_content(content)
+
+        self.__calls.inc(source="api")
+        stream = self.chat_stream(messages, json_mode=True)
+
+        try:
+            for fragment in stream:
+                extractor.feed(fragment)
+                if extractor.done:
+                    break
+                if cancel and extractor.has_keys(required_keys):
+                    if DEBUG:
+                        print(f"[DEBUG] Stream cancelled after keys: {required_keys}")
+                    break
+        finally:
+            stream.close()
+
+        if extractor.has_keys(required_keys):
+            return dict(extractor.values)
+
+        if not extractor.text():
+            return None
+        parsed = self._parse_json_content(extractor.text())
+        if parsed is None:
+            self.__parse_failures.inc()
+        return parsed
+
+    def __call_api(self, url: str, payload: Dict) -> Optional[Dict]:
+        start = time.perf_counter()
+        try:
+            if self.retry is not None:
+                result = self.retry.call(self.__post_once, url, payload)
+            else:
+                result = self.__post_once(url, payload)
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"API Call Error: {e}")
             return None
+        finally:
+            self.__latency.observe(time.perf_counter() - start)
+
+        if DEBUG:
+            content = result.get('message', {}).get('content', '')
+            print(f"[DEBUG] Raw Content: {content[:100]}...\n[DEBUG]\n")
+
+        return result
+
+    def __post_once(self, url: str, payload: Dict) -> Dict:
+        """One (possibly hedged) gateway round trip; raises on failure."""
+        if self.hedger is not None:
+            return self.hedger.call(self.__post, url, payload)
+        return self.__post(url, payload)
+
+    def __post(self, url: str, payload: Dict) -> Dict:
+        """One HTTP attempt; every attempt (retry or hedged duplicate) is counted."""
+        try:
+            response = self.session.post(
+                url,
+                headers=self.headers,
+                json=payload,
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            result = response.json()
+        except Exception:
+            self.__requests.inc(outcome="error")
+            raise
+        self.__requests.inc(outcome="ok")
+        return result
 
-    def __parse_json_content(self, content: str) -> Union[Dict, List, None]:
+    @staticmethod
+    def _parse_json_content(content: str) -> Union[Dict, List, None]:
         
         try:
             return json.loads(content)
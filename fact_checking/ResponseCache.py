@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEBUG = 0
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "llm_cache"
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM replies: an in-memory LRU in front of a directory of
+    JSON files with a TTL and a total size cap.
+
+    Keys are a hash of (model_name, messages, json_mode). Prompts that embed the
+    current date (e.g. `generate_search_questions`) only use day precision, so
+    their entries naturally roll over once per day.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Path = CACHE_DIR,
+            *,
+            max_memory_entries: int = 512,
+            ttl_seconds: Optional[float] = 7 * 24 * 3600,
+            max_disk_bytes: int = 100 * 1024 * 1024,
+    ):
+        """
+        Args:
+            cache_dir (Path): Directory of the on-disk tier.
+            max_memory_entries (int): Capacity of the in-memory LRU.
+            ttl_seconds (float): Age after which entries expire. None = never.
+            max_disk_bytes (int): Oldest files are pruned beyond this size.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+
+        self.__memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__disk_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(model_name: str, messages: List[Dict[str, str]], json_mode: bool) -> str:
+        """Returns a stable hash for one chat request."""
+        raw = json.dumps(
+            [model_name, messages, bool(json_mode)],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value, or None on miss/expiry."""
+        with self.__lock:
+            entry = self.__memory.get(key)
+            if entry is not None:
+                if not self.__expired(entry):
+                    self.__memory.move_to_end(key)
+                    return entry["value"]
+                del self.__memory[key]
+
+        entry = self.__read_disk(key)
+        if entry is None or self.__expired(entry):
+            return None
+
+        with self.__lock:
+            self.__remember(key, entry)
+        return entry["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores a value in both tiers."""
+        entry = {"created": time.time(), "value": value}
+        with self.__lock:
+            self.__remember(key, entry)
+        self.__write_disk(key, entry)
+
+    def clear(self) -> None:
+        """Drops every entry from both tiers."""
+        with self.__lock:
+            self.__memory.clear()
+            self.__disk_bytes = 0
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def __expired(self, entry: Dict[str, Any]) -> bool:
+        if self.ttl_seconds is None:
+            return False
+        return time.time() - entry.get("created", 0) > self.ttl_seconds
+
+    def __remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self.__memory[key] = entry
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.max_memory_entries:
+            self.__memory.popitem(last=False)
+
+    def __path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def __read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.__path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def __write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self.__path(key)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            # 覆寫同一個 key 時，舊檔的大小要先扣掉
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"LLM cache write error: {e}")
+            return
+
+        with self.__lock:
+            if self.__disk_bytes is None:
+                self.__disk_bytes = self.__scan_disk_bytes()
+            else:
+                self.__disk_bytes += path.stat().st_size - previous
+            if self.__disk_bytes > self.max_disk_bytes:
+                self.__prune_disk()
+
+    def __scan_disk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*.json"))
+
+    def __prune_disk(self) -> None:
+        """Deletes expired files, then the oldest ones, until under 90% of the cap."""
+        files = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        target = int(self.max_disk_bytes * 0.9)
+        now = time.time()
+
+        for path in files:
+            expired = self.ttl_seconds is not None and now - path.stat().st_mtime > self.ttl_seconds
+            if total <= target and not expired:
+                continue
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            total -= size
+
+        self.__disk_bytes = total
+        if DEBUG:
+            print(f"[DEBUG] LLM cache pruned to {total} bytes")
@@ -0,0 +1,142 @@
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+class StreamJsonExtractor:
+    """
+    Incrementally parses a JSON object that arrives in fragments (e.g. LLM tokens).
+
+    Every top-level value is decoded as soon as its text is complete, so callers
+    can act on `verdict` or `claims` before the model finishes writing the rest
+    of the object. Elements of a top-level array are also reported one by one.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[str, Any], None]] = None):
+        """
+        Args:
+            on_item (Callable): Optional callback `on_item(key, element)` fired
+                whenever one element of a top-level array is complete.
+        """
+        self.values: Dict[str, Any] = {}
+        self.partial: Dict[str, List[Any]] = {}
+        self.done = False
+
+        self.__on_item = on_item
+        self.__buffer = ""
+        self.__pos = 0
+        self.__started = False
+        self.__depth = 0
+        self.__in_string = False
+        self.__escape = False
+
+        # top-level object state: "key" -> "colon" -> "value" -> "key" ...
+        self.__phase = "key"
+        self.__key_start = -1
+        self.__key: Optional[str] = None
+        self.__value_start = -1
+        self.__value_is_array = False
+        self.__item_start = -1
+
+    def feed(self, fragment: str) -> None:
+        """Appends a fragment and parses as far as the buffer allows."""
+        if self.done or not fragment:
+            return
+        self.__buffer += fragment
+        self.__scan()
+
+    def has_keys(self, keys: Iterable[str]) -> bool:
+        """Returns True once every key in `keys` has a complete value."""
+        return all(k in self.values for k in keys)
+
+    def text(self) -> str:
+        """Returns everything fed so far."""
+        return self.__buffer
+
+    def __scan(self) -> None:
+        buf = self.__buffer
+        while self.__pos < len(buf) and not self.done:
+            i = self.__pos
+            ch = buf[i]
+            self.__pos += 1
+
+            if not self.__started:
+                if ch == "{":
+                    self.__started = True
+                    self.__depth = 1
+                continue
+
+            if self.__in_string:
+                if self.__escape:
+                    self.__escape = False
+                elif ch == "\\":
+                    self.__escape = True
+                elif ch == '"':
+                    self.__in_string = False
+                    if self.__depth == 1 and self.__phase == "key":
+                        self.__key = self.__decode(buf[self.__key_start:i + 1])
+                        self.__phase = "colon"
+                continue
+
+            if ch == '"':
+                self.__in_string = True
+                if self.__depth == 1 and self.__phase == "key":
+                    self.__key_start = i
+                    continue
+
+            if self.__depth == 1:
+                if self.__phase == "colon":
+                    if ch == ":":
+                        self.__phase = "value"
+                        self.__value_start = -1
+                    continue
+                if self.__phase == "value":
+                    if self.__value_start < 0 and not ch.isspace():
+                        self.__value_start = i
+                        self.__value_is_array = (ch == "[")
+                        self.__item_start = i + 1
+                    if ch in ",}":
+                        self.__finish_value(i)
+                        if ch == "}":
+                            self.done = True
+                        continue
+
+            if ch in "{[":
+                self.__depth += 1
+            elif ch in "}]":
+                if self.__value_is_array and self.__depth == 2 and ch == "]":
+                    self.__finish_item(i)
+                self.__depth -= 1
+                if self.__depth == 0:
+                    self.done = True
+            elif ch == "," and self.__value_is_array and self.__depth == 2:
+                self.__finish_item(i)
+                self.__item_start = i + 1
+
+    def __finish_value(self, end: int) -> None:
+        if self.__key is not None and self.__value_start >= 0:
+            raw = self.__buffer[self.__value_start:end].strip()
+            self.values[self.__key] = self.__decode(raw)
+        self.__phase = "key"
+        self.__key = None
+        self.__value_start = -1
+        self.__value_is_array = False
+
+    def __finish_item(self, end: int) -> None:
+        raw = self.__buffer[self.__item_start:end].strip()
+        if not raw or self.__key is None:
+            return
+        item = self.__decode(raw)
+        self.partial.setdefault(self.__key, []).append(item)
+        if self.__on_item:
+            self.__on_item(self.__key, item)
+
+    @staticmethod
+    def __decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            pass
+        # LLM 常回傳 Python 風格的 True/False/None
+        literals = {"True": True, "False": False, "None": None}
+        if raw in literals:
+            return literals[raw]
+        return raw.strip('"')
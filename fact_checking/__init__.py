@@ -1,7 +1,17 @@
 from .OllamaClient import OllamaClient
 from .FactChecker import FactChecker
+from .StreamJsonExtractor import StreamJsonExtractor
+from .ResponseCache import ResponseCache
+from .AsyncOllamaClient import AsyncOllamaClient
+from .AsyncFactChecker import AsyncFactChecker
+from .ClaimClusterer import ClaimClusterer
 
 __all__ = [
     "OllamaClient",
     "FactChecker",
+    "StreamJsonExtractor",
+    "ResponseCache",
+    "AsyncOllamaClient",
+    "AsyncFactChecker",
+    "ClaimClusterer",
 ]
\ No newline at end of file
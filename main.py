@@ -1,14 +1,16 @@
 import streamlit as st
 import time
 import random
-import concurrent.futures
+import functools
 import os
+import queue
+import concurrent.futures
 
 # 引入模組
-from fact_checking.OllamaClient import OllamaClient
-from fact_checking.FactChecker import FactChecker
-from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from runtime.ExecutorRegistry import ExecutorRegistry, QueueFullError
+from runtime.MetricsRegistry import get_metrics
 from agent_logic import real_analyze_claims, real_fact_check
+from backend import EXECUTOR_LIMITS, build_backend
 
 # --- 1. 設定與初始化 ---
 USER_AVATAR = "images/user_icon.png"
@@ -17,12 +19,21 @@ USER_AVATAR1 = "images/user_icon1.png"
 
 @st.cache_resource
 def init_backend():
-    client = OllamaClient()
-    checker = FactChecker(client)
-    scraper = EvidenceRetrieveHandler(max_search_requests=5)
-    return checker, scraper
+    # 所有 session 共用同一組後端 (排程器、連線池、證據快取)，組裝方式與 batch_check.py 相同
+    checker, scraper, scheduler, _ = build_backend()
+    # 設定 METRICS_PORT 時以 HTTP 提供 /metrics (Prometheus) 與 /metrics.json
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        get_metrics().serve(int(metrics_port))
+    return checker, scraper, scheduler
+
+@st.cache_resource
+def get_executor_registry():
+    # 取代每次呼叫都新建的 ThreadPoolExecutor，執行緒總數由設定固定
+    return ExecutorRegistry(EXECUTOR_LIMITS)
 
-checker, scraper = init_backend()
+checker, scraper, scheduler = init_backend()
+executors = get_executor_registry()
 
 # 保持老師名言絕對不更動
 TEACHER_QUOTES = [
@@ -43,31 +54,132 @@ if "processing" not in st.session_state:
 if "last_input" not in st.session_state:
     st.session_state.last_input = ""
 
+# 等待畫面 (老師名言) 的輪播間隔；任務完成時會立刻被喚醒，不必等滿這段時間
+LOADING_REFRESH = 2.0
+
 # --- 2. 強化版執行引擎 ---
-def run_engine_safe(task_func, args, min_time, loading_type, current_avatar):
+def render_loading(placeholder, loading_type, current_avatar):
+    with placeholder.container():
+        with st.chat_message("assistant", avatar=current_avatar):
+            if loading_type == "text":
+                st.write("Mason 正在利用 Ollama 拆解論述...")
+                st.caption("🧠 brainstorming...")
+            else:
+                # 修正拼字：TEACHER_QUATES -> TEACHER_QUOTES
+                # 修正判定：locals() -> globals()
+                quote_list = globals().get('TEACHER_QUOTES', [{"text": "載入中..."}])
+                st.warning(random.choice(quote_list)["text"])
+
+def submit_engine(task_func, *args, current_avatar):
+    """
+    把任務交給 engine 執行緒池。排滿時不一次卡住整個 wait_timeout，
+    而是每 LOADING_REFRESH 秒重試並更新排隊畫面 (也讓 QUIT 按鈕能中斷)；
+    逾時仍排不進去才拋出 QueueFullError。
+    """
+    engine = executors.get("engine")
+    try:
+        return engine.submit_within(0, task_func, *args)
+    except QueueFullError:
+        if engine.policy == engine.REJECT:
+            raise
+
     placeholder = st.empty()
-    start_time = time.time()
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(task_func, *args)
-        while (not future.done()) or (time.time() - start_time < min_time):
+    deadline = None if engine.wait_timeout is None else time.monotonic() + engine.wait_timeout
+    try:
+        while True:
             with placeholder.container():
                 with st.chat_message("assistant", avatar=current_avatar):
-                    if loading_type == "text":
-                        st.write("Mason 正在利用 Ollama 拆解論述...")
-                        st.caption("🧠 brainstorming...")
-                    else:
-                        # 修正拼字：TEACHER_QUATES -> TEACHER_QUOTES
-                        # 修正判定：locals() -> globals()
-                        quote_list = globals().get('TEACHER_QUOTES', [{"text": "載入中..."}])
-                        st.warning(random.choice(quote_list)["text"])
-            time.sleep(2.0)
-        
+                    st.info(f"⏳ 系統忙碌，排隊等待中... (前方 {engine.stats()['queue_depth']} 個請求)")
+            step = LOADING_REFRESH
+            if deadline is not None:
+                step = min(step, deadline - time.monotonic())
+                if step <= 0:
+                    raise QueueFullError(f"Executor '{engine.name}' is full")
+            try:
+                return engine.submit_within(step, task_func, *args)
+            except QueueFullError:
+                continue
+    finally:
         placeholder.empty()
-        result = future.result()
-        # 如果回傳 None 或發生超時
-        if result is None:
-            raise TimeoutError("NCKU CSIE API Gateway 響應超時 (Read Timeout)，請稍後再試。")
-        return result
+
+def run_engine_safe(task_func, args, min_time, loading_type, current_avatar):
+    future = submit_engine(task_func, *args, current_avatar=current_avatar)
+    placeholder = st.empty()
+    start_time = time.time()
+    while not future.done():
+        render_loading(placeholder, loading_type, current_avatar)
+        # 以完成事件喚醒，逾時只用來輪播等待畫面
+        concurrent.futures.wait([future], timeout=LOADING_REFRESH)
+
+    remaining = min_time - (time.time() - start_time)
+    if remaining > 0:
+        render_loading(placeholder, loading_type, current_avatar)
+        time.sleep(remaining)
+    
+    placeholder.empty()
+    result = future.result()
+    # 如果回傳 None 或發生超時
+    if result is None:
+        raise TimeoutError("NCKU CSIE API Gateway 響應超時 (Read Timeout)，請稍後再試。")
+    return result
+
+def verdict_md(item):
+    is_correct = (item["status"] == "correct")
+    icon = "✅" if is_correct else "❌"
+    color = "green" if is_correct else "red"
+    md = f"🚩 **論點**：{item['claim']}\n\n"
+    md += f"🔍 **查核**：{icon} :{color}[{item['fact']}]\n\n"
+    if is_correct and item["url"] != "#":
+        md += f"🔗 **來源**：[點擊跳轉]({item['url']})\n\n"
+    md += "---\n\n"
+    return md
+
+def render_report_md(results):
+    """依論點順序組出報告；尚未完成的論點不列出"""
+    return "### 🛡️ 事實查核報告\n\n" + "".join(verdict_md(item) for item in results if item is not None)
+
+def run_fact_check_streaming(claims, article, current_avatar):
+    """
+    第二階段：每個論點查完就立刻顯示，不必等所有論點完成。
+    real_fact_check 在 engine 執行緒中以 on_result 回報進度，主執行緒依事件更新畫面。
+    """
+    events = queue.Queue()
+    task = functools.partial(
+        real_fact_check,
+        scheduler=scheduler,
+        executor=executors.get("claims"),
+        on_result=lambda index, item: events.put((index, item)),
+    )
+    future = submit_engine(task, checker, scraper, claims, article, current_avatar=current_avatar)
+    future.add_done_callback(lambda _: events.put(None))
+
+    results = [None] * len(claims)
+    placeholder = st.empty()
+    quote = random.choice(TEACHER_QUOTES)["text"]
+    while True:
+        done_count = sum(item is not None for item in results)
+        with placeholder.container():
+            with st.chat_message("assistant", avatar=current_avatar):
+                st.markdown(render_report_md(results))
+                if done_count < len(claims):
+                    st.caption(f"⏳ 查核中... ({done_count}/{len(claims)})")
+                    st.warning(quote)
+
+        try:
+            event = events.get(timeout=LOADING_REFRESH)
+        except queue.Empty:
+            quote = random.choice(TEACHER_QUOTES)["text"]
+            continue
+        if event is None:
+            break
+        index, item = event
+        results[index] = item
+
+    placeholder.empty()
+    final_results = future.result()
+    if final_results is None:
+        raise TimeoutError("NCKU CSIE API Gateway 響應超時 (Read Timeout)，請稍後再試。")
+    return final_results
 
 # --- 3. 頁面渲染 ---
 st.title("Kun-Ta Fact Check Center")
@@ -102,7 +214,7 @@ if st.session_state.processing and st.session_state.messages[-1]["role"] == "use
     
     try:
         # 第一階段：Ollama 分析
-        analysis_res = run_engine_safe(real_analyze_claims, (checker, user_input), 3.0, "text", USER_AVATAR1)
+        analysis_res = run_engine_safe(real_analyze_claims, (checker, user_input, scheduler), 3.0, "text", USER_AVATAR1)
         
         # 關鍵修正：若後端捕獲到 API 錯誤並回傳解析錯誤，應視為異常而非主觀
         reason_str = analysis_res.get('reason', '')
@@ -123,27 +235,25 @@ if st.session_state.processing and st.session_state.messages[-1]["role"] == "use
             with st.chat_message("assistant", avatar=AI_AVATAR):
                 st.markdown(claims_md)
             
-            # 第二階段：事實查核
-            final_results = run_engine_safe(real_fact_check, (checker, scraper, claims, user_input), 5.0, "teacher", AI_AVATAR)
-            
-            report_md = "### 🛡️ 事實查核報告\n\n"
-            for item in final_results:
-                is_correct = (item["status"] == "correct")
-                icon = "✅" if is_correct else "❌"
-                color = "green" if is_correct else "red"
-                report_md += f"🚩 **論點**：{item['claim']}\n\n"
-                report_md += f"🔍 **查核**：{icon} :{color}[{item['fact']}]\n\n"
-                if is_correct and item["url"] != "#":
-                    report_md += f"🔗 **來源**：[點擊跳轉]({item['url']})\n\n"
-                report_md += "---\n\n"
+            # 第二階段：事實查核 (逐一顯示完成的論點)
+            final_results = run_fact_check_streaming(claims, user_input, AI_AVATAR)
+            final_md = render_report_md(final_results)
             
             with st.chat_message("assistant", avatar=AI_AVATAR):
-                st.markdown(report_md)
+                st.markdown(final_md)
             
-            st.session_state.messages.append({"role": "assistant", "content": report_md})
+            st.session_state.messages.append({"role": "assistant", "content": final_md})
             st.session_state.processing = False
             st.rerun()
 
+    except QueueFullError:
+        busy_md = "⏳ **系統忙碌中**：目前查核請求過多，請稍後再試。"
+        with st.chat_message("assistant", avatar=AI_AVATAR):
+            st.warning(busy_md)
+        st.session_state.messages.append({"role": "assistant", "content": busy_md})
+        st.session_state.processing = False
+        st.rerun()
+
     except Exception as e:
         # 這裡會正確捕獲 Timeout 或 ConnectionError
         error_md = f"❌ **連線異常**：{str(e)}"
@@ -0,0 +1,238 @@
+import copy
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# 預設存放位置：data/cassettes/
+CASSETTE_DIR = Path(__file__).resolve().parent.parent / "data" / "cassettes"
+
+class CassetteMissError(LookupError):
+    """Raised in strict replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """
+    Record / replay of slow external calls (OllamaClient.chat, Retriever.retrieve).
+
+    In "record" mode every call goes to the real backend. Its return value and
+    wall-clock latency are appended to a gzip'd JSON Lines file, one line per
+    call, flushed as it goes, so a crashed run keeps what it recorded.
+    In "replay" mode nothing is sent: each call returns the recorded value.
+    With `latency_scale=0` it returns instantly. With `latency_scale=1` it
+    waits the recorded latency (0.5 = twice as fast).
+
+    Prompts that mention today's date would never match on a later day, so
+    the cassette also records a clock: `now()` returns the time of the first
+    call while recording, and that recorded time while replaying.
+
+    Calls are matched by (kind, key), where the key is a hash of the request.
+    A request recorded several times is replayed in the same order; once those
+    recordings run out, the last one is repeated. An unrecorded request returns
+    None, as a failed call would. With `strict=True` it raises CassetteMissError.
+
+    Usage:
+        cassette = Cassette("data/cassettes/article42.jsonl.gz", Cassette.RECORD)
+        client = OllamaClient(cassette=cassette)
+        retriever = Retriever(cassette=cassette)
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(
+            self,
+            path: Path,
+            mode: str = REPLAY,
+            *,
+            latency_scale: float = 0.0,
+            strict: bool = False,
+            include_requests: bool = False,
+    ):
+        """
+        Args:
+            path (Path): Cassette file (`.jsonl.gz`). Record mode appends to it.
+            mode (str): "record" or "replay".
+            latency_scale (float): (replay) multiplier of the recorded latency;
+                0 = instant, 1 = original timing.
+            strict (bool): (replay) raise on requests missing from the cassette.
+            include_requests (bool): (record) also store the request itself,
+                for reading the cassette by hand. Off by default to keep it small.
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.include_requests = include_requests
+
+        self.__lock = threading.Lock()
+        self.__entries: Dict[tuple, List[Dict[str, Any]]] = {}
+        self.__cursor: Dict[tuple, int] = {}
+        self.__file = None
+        self.__stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self.__clock: Optional[datetime.datetime] = None
+
+        if mode == self.REPLAY:
+            self.__load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """
+        Builds a cassette from environment variables, or None if unset:
+            - CASSETTE_MODE: "record" / "replay"
+            - CASSETTE_PATH: file path (default data/cassettes/session.jsonl.gz)
+            - CASSETTE_LATENCY_SCALE: replay latency multiplier (default 0)
+        """
+        mode = os.getenv("CASSETTE_MODE")
+        if not mode:
+            return None
+        return cls(
+            os.getenv("CASSETTE_PATH") or CASSETTE_DIR / "session.jsonl.gz",
+            mode,
+            latency_scale=float(os.getenv("CASSETTE_LATENCY_SCALE") or 0.0),
+        )
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Stable hash of JSON-serializable request parts."""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == self.REPLAY
+
+    def now(self) -> datetime.datetime:
+        """
+        The session clock for date-dependent requests (e.g. prompts that state
+        today's date). Pinned on first use while recording; while replaying,
+        the recorded clock (or the real time for cassettes without one).
+        """
+        with self.__lock:
+            if self.__clock is not None:
+                return self.__clock
+            recorded = self.__entries.get(("clock", "now"))
+            if recorded:
+                try:
+                    self.__clock = datetime.datetime.fromisoformat(recorded[0].get("response"))
+                    return self.__clock
+                except (TypeError, ValueError):
+                    pass
+            self.__clock = datetime.datetime.now()
+            clock = self.__clock
+
+        if not self.replaying:
+            self.record("clock", "now", clock.isoformat(), 0.0)
+        return clock
+
+    def call(
+            self,
+            kind: str,
+            key: str,
+            fn: Callable[..., Any],
+            *args,
+            request: Any = None,
+            **kwargs,
+    ) -> Any:
+        """
+        Record mode: runs `fn(*args, **kwargs)`, records and returns its result.
+        Replay mode: returns the recorded result without calling `fn`.
+
+        Args:
+            kind (str): Call family, e.g. "chat" / "search".
+            key (str): Request hash (see `make_key`).
+            request: Stored alongside when `include_requests` is set.
+        """
+        if self.replaying:
+            return self.play(kind, key)
+
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.record(kind, key, result, time.perf_counter() - start, request=request)
+        return result
+
+    def play(self, kind: str, key: str) -> Any:
+        """Returns the next recorded result for (kind, key), honouring `latency_scale`."""
+        with self.__lock:
+            entries = self.__entries.get((kind, key))
+            if not entries:
+                self.__stats["misses"] += 1
+                entry = None
+            else:
+                cursor = self.__cursor.get((kind, key), 0)
+                entry = entries[min(cursor, len(entries) - 1)]
+                self.__cursor[(kind, key)] = cursor + 1
+                self.__stats["replayed"] += 1
+
+        if entry is None:
+            if self.strict:
+                raise CassetteMissError(f"{kind} request {key[:12]} not in {self.path}")
+            return None
+
+        if self.latency_scale > 0:
+            time.sleep(entry.get("latency", 0.0) * self.latency_scale)
+        return copy.deepcopy(entry.get("response"))
+
+    def record(self, kind: str, key: str, response: Any, latency: float, *, request: Any = None) -> None:
+        entry = {"kind": kind, "key": key, "latency": round(latency, 4), "response": response}
+        if self.include_requests and request is not None:
+            entry["request"] = request
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+        with self.__lock:
+            if self.__file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # 以附加模式開啟：每次 flush 後檔案都是可讀的 gzip (多個 member)
+                self.__file = gzip.open(self.path, "ab")
+            self.__file.write(line)
+            self.__file.flush()
+            self.__entries.setdefault((kind, key), []).append(entry)
+            self.__stats["recorded"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            stats(dict): {"mode", "entries", "recorded", "replayed", "misses"}
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["entries"] = sum(len(v) for v in self.__entries.values())
+        stats["mode"] = self.mode
+        return stats
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __load(self) -> None:
+        if not self.path.exists():
+            if self.strict:
+                raise FileNotFoundError(self.path)
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.__entries.setdefault((entry.get("kind"), entry.get("key")), []).append(entry)
+        except (EOFError, OSError, zlib.error):
+            pass  # 錄製中斷造成的殘缺結尾，保留已讀到的部分
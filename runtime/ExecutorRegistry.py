@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class QueueFullError(RuntimeError):
+    """Raised when a BoundedExecutor rejects work because its queue is full."""
+    pass
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor with admission control.
+
+    At most `max_workers + max_queue` tasks are admitted at once. When full,
+    `submit` either raises QueueFullError ("reject") or blocks until a slot
+    frees up ("wait", optionally with a timeout, after which it rejects).
+    Queue time (submit -> start) is recorded for every task.
+    """
+
+    REJECT = "reject"
+    WAIT = "wait"
+
+    def __init__(
+            self,
+            name: str,
+            max_workers: int,
+            max_queue: int = 0,
+            policy: str = WAIT,
+            wait_timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            name (str): Used for thread names and metrics.
+            max_workers (int): Long-lived worker threads.
+            max_queue (int): Tasks allowed to wait beyond the running ones.
+            policy (str): "reject" or "wait" when the queue is full.
+            wait_timeout (float): ("wait") seconds to wait before rejecting. None = forever.
+        """
+        if policy not in (self.REJECT, self.WAIT):
+            raise ValueError(f"Unsupported policy: {policy}")
+
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.policy = policy
+        self.wait_timeout = wait_timeout
+
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.__slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.__lock = threading.Lock()
+        self.__stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "started": 0,
+            "completed": 0,
+            "in_system": 0,
+            "running": 0,
+            "queue_time_total": 0.0,
+            "queue_time_max": 0.0,
+        }
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Admits and schedules `fn(*args, **kwargs)`.
+
+        Raises:
+            QueueFullError: If the task could not be admitted.
+        """
+        timeout = 0 if self.policy == self.REJECT else self.wait_timeout
+        return self.submit_within(timeout, fn, *args, **kwargs)
+
+    def submit_within(self, timeout: Optional[float], fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Same as `submit`, but waits at most `timeout` seconds for a slot whatever
+        the policy (0 = don't wait, None = forever). Lets a caller that must stay
+        responsive (e.g. a UI thread) wait in short steps and report progress.
+
+        Raises:
+            QueueFullError: If the task could not be admitted in time.
+        """
+        if timeout is not None and timeout <= 0:
+            admitted = self.__slots.acquire(blocking=False)
+        else:
+            # timeout=None 才是無限等待；Semaphore 的負數 timeout 會立刻放棄
+            admitted = self.__slots.acquire(timeout=timeout)
+
+        if not admitted:
+            with self.__lock:
+                self.__stats["rejected"] += 1
+            raise QueueFullError(f"Executor '{self.name}' is full ({self.max_workers} running + {self.max_queue} queued)")
+
+        with self.__lock:
+            self.__stats["submitted"] += 1
+            self.__stats["in_system"] += 1
+
+        enqueued_at = time.monotonic()
+
+        def task():
+            waited = time.monotonic() - enqueued_at
+            with self.__lock:
+                self.__stats["started"] += 1
+                self.__stats["running"] += 1
+                self.__stats["queue_time_total"] += waited
+                self.__stats["queue_time_max"] = max(self.__stats["queue_time_max"], waited)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.__lock:
+                    self.__stats["running"] -= 1
+
+        try:
+            future = self.__executor.submit(task)
+        except BaseException:
+            self.__release()
+            raise
+        future.add_done_callback(lambda _: self.__release())
+        return future
+
+    def map(self, fn: Callable[..., Any], *iterables) -> list:
+        """
+        Like Executor.map, but returns a list and goes through admission control.
+        If a submit is rejected or a call raises, the tasks that have not
+        started yet are cancelled before the error propagates (running ones
+        finish on their own).
+        """
+        futures = []
+        try:
+            for args in zip(*iterables):
+                futures.append(self.submit(fn, *args))
+            return [f.result() for f in futures]
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns admission and queue-time counters."""
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats["queue_depth"] = stats["in_system"] - stats["running"]
+        stats["queue_time_avg"] = stats["queue_time_total"] / stats["started"] if stats["started"] else 0.0
+        stats["max_workers"] = self.max_workers
+        stats["max_queue"] = self.max_queue
+        return stats
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        self.__executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __release(self) -> None:
+        with self.__lock:
+            self.__stats["in_system"] -= 1
+            self.__stats["completed"] += 1
+        self.__slots.release()
+
+
+class ExecutorRegistry:
+    """
+    Process-wide set of named, long-lived BoundedExecutors.
+
+    Everything that used to build its own ThreadPoolExecutor per call asks the
+    registry instead, so the total thread count is fixed by configuration
+    rather than growing with users x claims.
+    """
+
+    DEFAULT_CONFIG = {
+        # Streamlit 每個請求在背景執行的整段流程 (analyze / fact check)
+        "engine": {"max_workers": 8, "max_queue": 32, "policy": BoundedExecutor.WAIT, "wait_timeout": 30.0},
+        # 單篇文章內的逐論點查核
+        "claims": {"max_workers": 32, "max_queue": 256, "policy": BoundedExecutor.WAIT, "wait_timeout": None},
+    }
+
+    def __init__(self, config: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            config (dict): {name: BoundedExecutor kwargs}. Unknown names requested
+                later are created with the "claims" settings.
+        """
+        self.config = {k: dict(v) for k, v in (config or self.DEFAULT_CONFIG).items()}
+        self.__executors: Dict[str, BoundedExecutor] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, name: str) -> BoundedExecutor:
+        """Returns the executor called `name`, creating it on first use."""
+        with self.__lock:
+            executor = self.__executors.get(name)
+            if executor is None:
+                cfg = self.config.get(name) or self.DEFAULT_CONFIG["claims"]
+                executor = BoundedExecutor(name, **cfg)
+                self.__executors[name] = executor
+            return executor
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns stats for every executor created so far."""
+        with self.__lock:
+            executors = dict(self.__executors)
+        return {name: ex.stats() for name, ex in executors.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self.__lock:
+            executors = list(self.__executors.values())
+            self.__executors.clear()
+        for ex in executors:
+            ex.shutdown(wait=wait)
+
+
+_default_registry: Optional[ExecutorRegistry] = None
+_default_lock = threading.Lock()
+
+def get_default_registry() -> ExecutorRegistry:
+    """Returns the process-wide ExecutorRegistry, creating it on first use."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ExecutorRegistry()
+        return _default_registry
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional
+
+DEBUG = 0
+
+class Hedger:
+    """
+    Hedged requests for tail latency.
+
+    The call runs once; if it is still running after the observed p95 latency
+    (the `quantile` of the last `window` successful calls), an identical
+    backup call is fired and whichever succeeds first wins. Only the slowest
+    ~5% of calls are duplicated, and `max_hedge_ratio` caps the extra load
+    even when the backend slows down as a whole.
+
+    Hedging starts once `min_samples` latencies have been seen; before that
+    calls run directly in the caller's thread.
+    """
+
+    def __init__(
+            self,
+            quantile: float = 0.95,
+            *,
+            min_samples: int = 20,
+            window: int = 200,
+            min_delay: float = 0.05,
+            max_delay: Optional[float] = None,
+            max_hedge_ratio: float = 0.1,
+            max_workers: int = 16,
+    ):
+        """
+        Args:
+            quantile (float): Latency quantile used as the hedge delay.
+            min_samples (int): Successful calls needed before hedging.
+            window (int): Number of recent latencies kept.
+            min_delay (float) / max_delay (float): Clamp for the hedge delay.
+            max_hedge_ratio (float): Max share of calls that may be hedged.
+            max_workers (int): Threads running primary and backup calls.
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.__lock = threading.Lock()
+        self.__latencies = deque(maxlen=window)
+        self.__stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data."""
+        with self.__lock:
+            if len(self.__latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.__latencies)
+        delay = ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+        delay = max(self.min_delay, delay)
+        if self.max_delay is not None:
+            delay = min(self.max_delay, delay)
+        return delay
+
+    def record(self, latency: float) -> None:
+        with self.__lock:
+            self.__latencies.append(latency)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `fn(*args, **kwargs)`, hedging it when it is slower than usual.
+        Returns the first successful result; raises only if every attempt failed.
+        """
+        with self.__lock:
+            self.__stats["calls"] += 1
+
+        delay = self.hedge_delay()
+        if delay is None:
+            return self.__timed(fn, args, kwargs)
+
+        primary = self.__executor.submit(self.__timed, fn, args, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.__take_hedge_budget():
+            return primary.result()
+
+        if DEBUG:
+            print(f"[hedge] no reply after {delay:.2f}s, sending backup request")
+        backup = self.__executor.submit(self.__timed, fn, args, kwargs)
+
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        with self.__lock:
+                            self.__stats["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns {"calls", "hedged", "hedge_wins", "hedge_delay"}."""
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats["hedge_delay"] = self.hedge_delay()
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.__executor.shutdown(wait=wait)
+
+    def __take_hedge_budget(self) -> bool:
+        with self.__lock:
+            if self.__stats["hedged"] + 1 > self.max_hedge_ratio * self.__stats["calls"]:
+                return False
+            self.__stats["hedged"] += 1
+            return True
+
+    def __timed(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        start = time.monotonic()
+        result = fn(*args, **kwargs)
+        self.record(time.monotonic() - start)
+        return result
@@ -0,0 +1,339 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 秒；涵蓋本地快取 (毫秒級) 到 LLM 長回應 (數十秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str = "", labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self.__lock = threading.Lock()
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = _label_key(self, labels)
+        with self.__lock:
+            self.__values[key] = self.__values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self.__lock:
+            return self.__values.get(_label_key(self, labels), 0.0)
+
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        with self.__lock:
+            items = list(self.__values.items())
+        return [(dict(zip(self.label_names, key)), value) for key, value in sorted(items)]
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__values.clear()
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram (Prometheus semantics), optionally split by labels.
+    Quantiles are estimated by linear interpolation inside the bucket.
+    """
+
+    TYPE = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            help: str = "",
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        # label key -> [bucket counts..., +Inf count], sum
+        self.__counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.__sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self, labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self.__lock:
+            counts = self.__counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self.__sums[key] = self.__sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observes the duration of the `with` block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self.__lock:
+            return sum(self.__counts.get(_label_key(self, labels), ()))
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimated `q` quantile (0-1); None without observations."""
+        with self.__lock:
+            counts = list(self.__counts.get(_label_key(self, labels), ()))
+        return self.__estimate(counts, q)
+
+    def samples(self) -> List[Tuple[Dict[str, str], Dict[str, Any]]]:
+        """[(labels, {"buckets": [(le, cumulative)], "count", "sum"})]"""
+        with self.__lock:
+            items = [(key, list(counts), self.__sums.get(key, 0.0)) for key, counts in self.__counts.items()]
+
+        out = []
+        for key, counts, total in sorted(items):
+            cumulative = []
+            running = 0
+            for bound, c in zip(list(self.buckets) + [math.inf], counts):
+                running += c
+                cumulative.append((bound, running))
+            out.append((dict(zip(self.label_names, key)), {
+                "buckets": cumulative,
+                "count": running,
+                "sum": total,
+                "p50": self.__estimate(counts, 0.50),
+                "p95": self.__estimate(counts, 0.95),
+                "p99": self.__estimate(counts, 0.99),
+            }))
+        return out
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__counts.clear()
+            self.__sums.clear()
+
+    def __estimate(self, counts: List[int], q: float) -> Optional[float]:
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        running = 0
+        lower = 0.0
+        for bound, c in zip(list(self.buckets) + [math.inf], counts):
+            if c and running + c >= rank:
+                if bound == math.inf:
+                    return lower  # 超出最大 bucket，只能回報其下界
+                return lower + (bound - lower) * (rank - running) / c
+            running += c
+            lower = bound
+        return lower
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms.
+
+    Components ask for their metrics by name (`counter` / `histogram` return
+    the existing metric if it was already registered), so every OllamaClient,
+    Retriever and EvidenceRetrieveHandler sharing a registry adds to the same
+    series. Export with `to_prometheus()` (text exposition format) or
+    `snapshot()` (JSON-friendly dict); `serve(port)` exposes both over HTTP at
+    `/metrics` and `/metrics.json`.
+
+    Usage:
+        metrics = get_metrics()
+        with metrics.histogram("factcheck_stage_seconds", labels=("stage",)).time(stage="verify"):
+            ...
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__metrics: Dict[str, Any] = {}
+        self.__server: Optional[ThreadingHTTPServer] = None
+
+    def counter(self, name: str, help: str = "", labels: Sequence[str] = ()) -> Counter:
+        return self.__get_or_create(Counter, name, help=help, labels=labels)
+
+    def histogram(
+            self,
+            name: str,
+            help: str = "",
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.__get_or_create(Histogram, name, help=help, labels=labels, buckets=buckets)
+
+    def get(self, name: str):
+        """Returns a registered metric, or None."""
+        with self.__lock:
+            return self.__metrics.get(name)
+
+    def reset(self) -> None:
+        """Zeroes every metric (registrations are kept)."""
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def to_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self.__sorted_metrics():
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            if isinstance(metric, Counter):
+                for labels, value in metric.samples():
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+            else:
+                for labels, sample in metric.samples():
+                    for bound, cumulative in sample["buckets"]:
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{metric.name}_bucket{_format_labels(dict(labels, le=le))} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+                    lines.append(f"{metric.name}_count{_format_labels(labels)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            snapshot(dict):
+                {\n
+                    **"timestamp"**: epoch seconds,\n
+                    **"metrics"**: {name: {"type", "help", "samples": [...]}}\n
+                }
+                Counter samples are {"labels", "value"}; histogram samples are
+                {"labels", "count", "sum", "p50", "p95", "p99", "buckets": {le: cumulative}}.
+        """
+        metrics = {}
+        for metric in self.__sorted_metrics():
+            if isinstance(metric, Counter):
+                samples = [{"labels": labels, "value": value} for labels, value in metric.samples()]
+            else:
+                samples = [
+                    {
+                        "labels": labels,
+                        "count": s["count"],
+                        "sum": s["sum"],
+                        "p50": s["p50"],
+                        "p95": s["p95"],
+                        "p99": s["p99"],
+                        "buckets": {
+                            ("+Inf" if bound == math.inf else _format_value(bound)): c
+                            for bound, c in s["buckets"]
+                        },
+                    }
+                    for labels, s in metric.samples()
+                ]
+            metrics[metric.name] = {"type": metric.TYPE, "help": metric.help, "samples": samples}
+        return {"timestamp": time.time(), "metrics": metrics}
+
+    def write_json(self, path: Path) -> None:
+        """Writes `snapshot()` to `path` atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """
+        Starts a background HTTP endpoint (idempotent):
+            - GET /metrics       Prometheus text
+            - GET /metrics.json  JSON snapshot
+        """
+        with self.__lock:
+            if self.__server is not None:
+                return self.__server
+            registry = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    path = self.path.split("?", 1)[0]
+                    if path == "/metrics":
+                        body = registry.to_prometheus().encode("utf-8")
+                        content_type = "text/plain; version=0.0.4; charset=utf-8"
+                    elif path == "/metrics.json":
+                        body = json.dumps(registry.snapshot(), ensure_ascii=False).encode("utf-8")
+                        content_type = "application/json"
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self.__server = ThreadingHTTPServer((host, port), Handler)
+            self.__server.daemon_threads = True
+            threading.Thread(target=self.__server.serve_forever, name="metrics-http", daemon=True).start()
+            return self.__server
+
+    def __get_or_create(self, cls, name: str, **kwargs):
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = cls(name, **kwargs)
+                self.__metrics[name] = metric
+            elif not isinstance(metric, cls) or metric.label_names != tuple(kwargs.get("labels", ())):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def __sorted_metrics(self) -> list:
+        with self.__lock:
+            return [self.__metrics[name] for name in sorted(self.__metrics)]
+
+
+def _label_key(metric, labels: Dict[str, Any]) -> Tuple[str, ...]:
+    if set(labels) != set(metric.label_names):
+        raise ValueError(f"{metric.name} expects labels {metric.label_names}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in metric.label_names)
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}"
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+_default_metrics: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Returns the process-wide MetricsRegistry, creating it on first use."""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = MetricsRegistry()
+        return _default_metrics
@@ -0,0 +1,124 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple, Type
+
+DEBUG = 0
+
+class RetryPolicy:
+    """
+    Retries a call with jittered exponential backoff.
+
+    Only retryable failures are retried: exceptions carrying an HTTP response
+    whose status is in `retry_statuses`, or instances of `retry_exceptions`
+    (connection errors, timeouts). Anything else (400, 401, quota exhausted,
+    bad JSON ...) is raised immediately.
+
+    Backoff is "full jitter": attempt n sleeps uniform(0, min(max_delay,
+    base_delay * 2**n)), so clients that failed together do not retry in
+    lockstep. A server-sent Retry-After is honoured as a lower bound.
+    """
+
+    RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            base_delay: float = 0.5,
+            max_delay: float = 8.0,
+            *,
+            retry_statuses: Iterable[int] = RETRY_STATUSES,
+            retry_exceptions: Tuple[Type[BaseException], ...] = (),
+            max_elapsed: Optional[float] = None,
+    ):
+        """
+        Args:
+            max_attempts (int): Total attempts including the first one.
+            base_delay (float): Backoff cap (seconds) after the first failure.
+            max_delay (float): Upper bound for any single backoff.
+            retry_statuses (Iterable[int]): HTTP statuses worth retrying.
+            retry_exceptions (tuple): Exception types always worth retrying.
+            max_elapsed (float): Give up instead of sleeping past this many
+                seconds since the first attempt. None = no limit.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.max_elapsed = max_elapsed
+
+    def with_exceptions(self, *exceptions: Type[BaseException]) -> "RetryPolicy":
+        """Returns a copy that additionally retries `exceptions`."""
+        return RetryPolicy(
+            self.max_attempts,
+            self.base_delay,
+            self.max_delay,
+            retry_statuses=self.retry_statuses,
+            retry_exceptions=self.retry_exceptions + tuple(exceptions),
+            max_elapsed=self.max_elapsed,
+        )
+
+    @staticmethod
+    def status_of(error: BaseException) -> Optional[int]:
+        """HTTP status carried by `error` (requests / httpx style), if any."""
+        response = getattr(error, "response", None)
+        return getattr(response, "status_code", None)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        status = self.status_of(error)
+        if status is not None:
+            return status in self.retry_statuses
+        return isinstance(error, self.retry_exceptions)
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Seconds to sleep after failed attempt number `attempt` (0-based)."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+        response = getattr(error, "response", None)
+        retry_after = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_delay))
+            except ValueError:
+                pass  # HTTP-date 格式，忽略
+        return delay
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Calls `fn(*args, **kwargs)` until it succeeds, raises a non-retryable
+        error, or the attempts / elapsed budget run out (the last error is raised).
+        """
+        start = time.monotonic()
+        for attempt in range(self.max_attempts):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not self.is_retryable(e):
+                    raise
+
+                delay = self.backoff(attempt, e)
+                if self.max_elapsed is not None and time.monotonic() - start + delay > self.max_elapsed:
+                    raise
+
+                if DEBUG:
+                    print(f"[retry] attempt {attempt + 1} failed ({e}), sleeping {delay:.2f}s")
+                time.sleep(delay)
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """`call` for coroutine functions: backs off with `asyncio.sleep`."""
+        start = time.monotonic()
+        for attempt in range(self.max_attempts):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not self.is_retryable(e):
+                    raise
+
+                delay = self.backoff(attempt, e)
+                if self.max_elapsed is not None and time.monotonic() - start + delay > self.max_elapsed:
+                    raise
+
+                if DEBUG:
+                    print(f"[retry] attempt {attempt + 1} failed ({e}), sleeping {delay:.2f}s")
+                await asyncio.sleep(delay)
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+class SingleFlight:
+    """
+    In-flight request coalescing.
+
+    While a call for `key` is running, later callers with the same key join
+    it and share its Future instead of starting a duplicate. The key is
+    forgotten as soon as the call finishes, so this is not a cache: a
+    request made after completion starts a new call.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls: Dict[str, Future] = {}
+        self.__callers: Dict[Future, int] = {}
+        self.__stats = {"calls": 0, "coalesced": 0}
+
+    def submit(self, key: str, start: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        Returns the in-flight Future for `key`, or calls `start()` to create one.
+
+        Args:
+            key (str): Identifies identical requests.
+            start (Callable): Starts the work and returns its Future
+                (e.g. `lambda: executor.submit(...)`).
+
+        Returns:
+            (Future, bool): The shared Future, and True if this caller started it.
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+            if future is not None:
+                self.__callers[future] += 1
+                self.__stats["coalesced"] += 1
+                return future, False
+
+            future = start()
+            self.__calls[key] = future
+            self.__callers[future] = 1
+            self.__stats["calls"] += 1
+
+        future.add_done_callback(lambda f: self.__forget(key, f))
+        return future, True
+
+    def run(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Blocking variant: the first caller runs `fn(*args, **kwargs)` in its own
+        thread, identical concurrent callers wait for and share its result.
+        """
+        leader = []
+
+        def start() -> Future:
+            leader.append(True)
+            return Future()
+
+        future, _ = self.submit(key, start)
+        if leader and future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+    def cancel(self, future: Future) -> bool:
+        """
+        Withdraws one caller from a shared Future. The underlying work is only
+        cancelled once no caller is left waiting for it.
+
+        Returns:
+            bool: True if the Future was actually cancelled.
+        """
+        with self.__lock:
+            if future not in self.__callers:
+                return future.cancel()
+            self.__callers[future] -= 1
+            if self.__callers[future] > 0:
+                return False
+        return future.cancel()
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        with self.__lock:
+            return len(self.__calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns {"calls": calls started, "coalesced": callers that joined one}."""
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __forget(self, key: str, future: Future) -> None:
+        with self.__lock:
+            if self.__calls.get(key) is future:
+                del self.__calls[key]
+            self.__callers.pop(future, None)
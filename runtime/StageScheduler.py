@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+DEBUG = 0
+
+class TokenBucket:
+    """
+    Classic token bucket: refills `rate` tokens per second up to `capacity`.
+    `acquire` blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.__tokens = capacity
+        self.__last = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.capacity, self.__tokens + (now - self.__last) * self.rate)
+                self.__last = now
+                if self.__tokens >= tokens:
+                    self.__tokens -= tokens
+                    return
+                wait = (tokens - self.__tokens) / self.rate
+            time.sleep(wait)
+
+
+class StageScheduler:
+    """
+    Central scheduler for every pipeline stage that talks to a rate-limited backend.
+
+    Each stage (analyze / plan / search / verify) has its own priority queue and
+    is mapped to a backend ("llm" or "search"). A backend owns `max_in_flight`
+    worker threads and a token bucket, so its real rate limit and concurrency
+    cap are enforced in one place no matter how many sessions submit work.
+
+    Lower `priority` runs first. Callers pass the claim's position in its
+    article, so every session's first claims go ahead of the tail of another
+    session's 30-claim article. Ties go to later stages (verify > search >
+    plan > analyze) to finish in-flight claims first, then FIFO.
+    """
+
+    DEFAULT_BACKENDS = {
+        "llm": {"rate": 5.0, "burst": 10, "max_in_flight": 10},
+        "search": {"rate": 2.0, "burst": 5, "max_in_flight": 5},
+    }
+    DEFAULT_STAGES = {
+        "analyze": "llm",
+        "plan": "llm",
+        "search": "search",
+        "verify": "llm",
+    }
+    STAGE_ORDER = ["verify", "search", "plan", "analyze"]
+
+    def __init__(
+            self,
+            backends: Optional[Dict[str, Dict[str, float]]] = None,
+            stages: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            backends (dict): {name: {"rate": req/s, "burst": bucket size,
+                "max_in_flight": concurrent calls}}. rate None = unlimited.
+            stages (dict): {stage: backend name}.
+        """
+        self.backends = {k: dict(v) for k, v in (backends or self.DEFAULT_BACKENDS).items()}
+        self.stages = dict(stages or self.DEFAULT_STAGES)
+
+        self.__cond = threading.Condition()
+        self.__queues: Dict[str, List[tuple]] = {stage: [] for stage in self.stages}
+        self.__seq = itertools.count()
+        self.__buckets: Dict[str, Optional[TokenBucket]] = {}
+        self.__threads: List[threading.Thread] = []
+        self.__closed = False
+
+        for name, cfg in self.backends.items():
+            rate = cfg.get("rate")
+            self.__buckets[name] = TokenBucket(rate, cfg.get("burst", 1)) if rate else None
+            for i in range(int(cfg.get("max_in_flight", 1))):
+                t = threading.Thread(
+                    target=self.__worker,
+                    args=(name,),
+                    name=f"scheduler-{name}-{i}",
+                    daemon=True,
+                )
+                t.start()
+                self.__threads.append(t)
+
+    def submit(
+            self,
+            stage: str,
+            fn: Callable[..., Any],
+            *args,
+            priority: int = 0,
+            **kwargs,
+    ) -> Future:
+        """
+        Queues `fn(*args, **kwargs)` on `stage`.
+
+        Returns:
+            Future: resolves to fn's return value (or exception).
+        """
+        if stage not in self.stages:
+            raise ValueError(f"Unknown stage: {stage}")
+
+        future = Future()
+        rank = self.STAGE_ORDER.index(stage) if stage in self.STAGE_ORDER else len(self.STAGE_ORDER)
+        with self.__cond:
+            if self.__closed:
+                raise RuntimeError("StageScheduler is shut down")
+            heapq.heappush(
+                self.__queues[stage],
+                (priority, rank, next(self.__seq), future, fn, args, kwargs),
+            )
+            self.__cond.notify_all()
+        return future
+
+    def run(self, stage: str, fn: Callable[..., Any], *args, priority: int = 0, **kwargs) -> Any:
+        """Blocking shortcut for `submit(...).result()`."""
+        return self.submit(stage, fn, *args, priority=priority, **kwargs).result()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Returns the number of waiting jobs per stage."""
+        with self.__cond:
+            return {stage: len(q) for stage, q in self.__queues.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops accepting work; queued jobs still run before workers exit."""
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify_all()
+        if wait:
+            for t in self.__threads:
+                t.join()
+
+    def __next_job(self, backend: str) -> Optional[tuple]:
+        """Pops the best job among this backend's stages (caller holds the lock)."""
+        best_stage = None
+        for stage, q in self.__queues.items():
+            if self.stages[stage] != backend or not q:
+                continue
+            if best_stage is None or q[0] < self.__queues[best_stage][0]:
+                best_stage = stage
+        if best_stage is None:
+            return None
+        return heapq.heappop(self.__queues[best_stage])
+
+    def __worker(self, backend: str) -> None:
+        while True:
+            with self.__cond:
+                job = self.__next_job(backend)
+                while job is None:
+                    if self.__closed:
+                        return
+                    self.__cond.wait()
+                    job = self.__next_job(backend)
+
+            priority, _, _, future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            bucket = self.__buckets.get(backend)
+            if bucket is not None:
+                bucket.acquire()
+
+            if DEBUG:
+                print(f"[scheduler] {backend} run priority={priority} {getattr(fn, '__name__', fn)}")
+
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
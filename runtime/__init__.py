@@ -0,0 +1,25 @@
+from .StageScheduler import StageScheduler, TokenBucket
+from .ExecutorRegistry import ExecutorRegistry, BoundedExecutor, QueueFullError, get_default_registry
+from .SingleFlight import SingleFlight
+from .RetryPolicy import RetryPolicy
+from .Hedger import Hedger
+from .MetricsRegistry import MetricsRegistry, Counter, Histogram, get_metrics
+from .Cassette import Cassette, CassetteMissError
+
+__all__ = [
+    "StageScheduler",
+    "TokenBucket",
+    "ExecutorRegistry",
+    "BoundedExecutor",
+    "QueueFullError",
+    "get_default_registry",
+    "SingleFlight",
+    "RetryPolicy",
+    "Hedger",
+    "MetricsRegistry",
+    "Counter",
+    "Histogram",
+    "get_metrics",
+    "Cassette",
+    "CassetteMissError",
+]
\ No newline at end of file
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Type
+
+from scraper.Retriever import Retriever
+from scraper.AsyncRetriever import AsyncRetriever
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from scraper.QueryNormalizer import QueryNormalizer
+
+class AsyncEvidenceRetrieveHandler():
+    """
+    asyncio counterpart of EvidenceRetrieveHandler.
+
+    Uses the same cache keys, TTLs and storage backends, but awaits Tavily
+    through AsyncRetriever (bounded by a semaphore) and runs the blocking
+    storage calls in worker threads via `asyncio.to_thread`.
+
+    The semaphore and the background refresh tasks belong to the running
+    event loop and are recreated when the loop changes, so one handler can
+    serve successive `asyncio.run(...)` calls.
+    """
+
+    BASIC = Retriever.BASIC
+    ADVANCED = Retriever.ADVANCED
+
+    def __init__(
+            self,
+            max_search_requests: int = 5,
+            storage: Type[EvidenceFileHandler] = EvidenceFileHandler,
+            normalizer: Optional[QueryNormalizer] = None,
+            retriever: Optional[AsyncRetriever] = None,
+    ):
+        """
+        Args:
+            max_search_requests (int): Max concurrent Tavily requests.
+            storage: Evidence store class exposing `find_query` / `store`.
+            normalizer (QueryNormalizer): Builds the cache key from the query.
+            retriever (AsyncRetriever): Preconfigured retriever. Defaults to `AsyncRetriever()`.
+        """
+        self.max_search_requests = max_search_requests
+        self.__retriever = retriever or AsyncRetriever()
+        self.__storage = storage
+        self.__normalizer = normalizer or QueryNormalizer()
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__refreshing: Dict[str, asyncio.Task] = {}
+
+    async def query(
+            self,
+            query: dict,
+            *,
+            use_local_TF: bool = False,
+            chunk_count: int = 3,
+            result_count: int = 3,
+            level: str = BASIC,
+            serve_stale: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Same arguments as EvidenceRetrieveHandler.query.
+
+        Returns:
+            dict: The evidence (from cache or a fresh search).
+            None: If the query is invalid or the search failed.
+        """
+        if "query" not in query or not query["query"]:
+            return None
+
+        args = query.copy()
+        args["level"] = level
+        args["result_count"] = result_count
+        args["chunk_count"] = chunk_count
+
+        self.__bind_loop()
+        canonical = self.__normalizer.canonicalize(query["query"]) or query["query"]
+        cache_key = EvidenceRetrieveHandler.make_cache_key(canonical, args)
+
+        if use_local_TF:
+            cached = await asyncio.to_thread(self.__read_cache, query["query"], cache_key)
+            if cached is not None:
+                data, stored_at = cached
+                ttl = EvidenceRetrieveHandler.get_ttl(args.get("search_duration"))
+                stale = ttl is not None and (stored_at is None or time.time() - stored_at > ttl)
+
+                if not stale:
+                    print(f"✅ Found in cache: {query['query']}")
+                    return data
+                if serve_stale:
+                    print(f"♻️ Serving stale cache, refreshing: {query['query']}")
+                    if cache_key not in self.__refreshing:
+                        task = asyncio.create_task(self.__retrieve_and_store(args, cache_key))
+                        self.__refreshing[cache_key] = task
+                        task.add_done_callback(lambda _: self.__refreshing.pop(cache_key, None))
+                    return data
+
+        return await self.__retrieve_and_store(args, cache_key)
+
+    def __read_cache(self, raw_query: str, cache_key: str) -> Optional[tuple]:
+        handler = EvidenceRetrieveHandler.find_cached(self.__storage, raw_query, cache_key)
+        if handler is None:
+            return None
+        try:
+            return handler.read(), handler.get_stored_at()
+        finally:
+            handler.close()
+
+    def __store(self, response: dict, args: dict, cache_key: str) -> str:
+        file_handler = self.__storage.store(response, params=args, key=cache_key)
+        file_handler.close()
+        return file_handler.get_filename()
+
+    def __bind_loop(self) -> None:
+        """semaphore 與背景更新綁定 event loop；換了 loop (例如下一次 asyncio.run) 就重建"""
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            self.__loop = loop
+            self.__semaphore = asyncio.Semaphore(self.max_search_requests)
+            self.__refreshing = {}
+
+    async def __retrieve_and_store(self, args: dict, cache_key: str) -> Optional[dict]:
+        async with self.__semaphore:
+            response = await self.__retriever.retrieve(args)
+
+        if response:
+            response["file_id"] = await asyncio.to_thread(self.__store, response, args, cache_key)
+
+        return response
+
+    async def shutdown(self) -> None:
+        """Waits for pending background refreshes (started on the running loop)."""
+        if self.__refreshing and self.__loop is asyncio.get_running_loop():
+            await asyncio.gather(*self.__refreshing.values(), return_exceptions=True)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import httpx
+from tavily import AsyncTavilyClient
+from typing import Any, Dict, Optional
+
+from scraper.Retriever import Retriever, API_KEY, DEFAULT_RETRY
+from runtime.RetryPolicy import RetryPolicy
+from runtime.MetricsRegistry import MetricsRegistry
+from runtime.Cassette import Cassette
+
+# AsyncTavilyClient 走 httpx，連線失敗與逾時是 httpx.TransportError
+ASYNC_RETRY = DEFAULT_RETRY.with_exceptions(httpx.TransportError)
+
+
+class AsyncRetriever(Retriever):
+    """
+    asyncio variant of Retriever using Tavily's AsyncTavilyClient.
+    Request building, response parsing, the retry policy, metrics and the
+    cassette are shared with Retriever. Hedging is not supported.
+    """
+
+    def __init__(
+            self,
+            *,
+            retry: Optional[RetryPolicy] = ASYNC_RETRY,
+            client: Optional[Any] = None,
+            metrics: Optional[MetricsRegistry] = None,
+            cassette: Optional[Cassette] = None,
+    ):
+        """
+        Args:
+            retry (RetryPolicy): Backoff policy (slept with `asyncio.sleep`). None = single attempt.
+            client: Object with AsyncTavilyClient's `async search(**kwargs)`.
+                Defaults to an AsyncTavilyClient.
+            metrics (MetricsRegistry): Same series as Retriever. Defaults to `get_metrics()`.
+            cassette (Cassette): Same as Retriever's.
+        """
+        client = client if client is not None else AsyncTavilyClient(api_key=API_KEY)
+        super().__init__(retry=retry, client=client, metrics=metrics, cassette=cassette)
+        self.__client = client
+
+    async def retrieve(self, query: dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Executes a search query and returns parsed results with a list of sources.
+        """
+        if self.cassette is None:
+            return await self.__retrieve(query)
+
+        key = Cassette.make_key(query)
+        if self.cassette.replaying:
+            # play 依 latency_scale 以 time.sleep 模擬延遲，不能卡住 event loop
+            return await asyncio.to_thread(self.cassette.play, "search", key)
+
+        start = time.perf_counter()
+        output = await self.__retrieve(query)
+        self.cassette.record("search", key, output, time.perf_counter() - start, request=query)
+        return output
+
+    async def __retrieve(self, query: dict[str, Any]) -> Optional[Dict[str, Any]]:
+        search_kwargs = self._build_search_kwargs(query)
+        if search_kwargs is None:
+            return None
+
+        try:
+            if self.retry is not None:
+                response = await self.retry.acall(self.__search_attempt, search_kwargs)
+            else:
+                response = await self.__search_attempt(search_kwargs)
+        except Exception as e:
+            print(f"❌ Tavily Search Error: {e}")
+            return None
+
+        output = self._parse_response(query, response)
+        self._record_usage(output)
+        return output
+
+    async def __search_attempt(self, search_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await self.__client.search(**search_kwargs)
+        except Exception:
+            self._record_attempt(None)
+            raise
+        self._record_attempt(response)
+        return response
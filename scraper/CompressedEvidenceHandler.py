@@ -0,0 +1,356 @@
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+from pathlib import Path
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+class LazyResult(dict):
+    """
+    One search result whose "article" is read from the blob file on first access.
+    Behaves like a plain dict; after loading, the article is stored in it.
+    (C-level consumers such as `json.dumps` bypass the lazy lookup, call
+    `copy()` first to serialize the full result.)
+    """
+
+    def __init__(self, data: dict, blob_path: Optional[Path], span: Optional[List[int]]):
+        super().__init__(data)
+        self.__blob_path = blob_path
+        self.__span = span
+
+    def __load(self) -> None:
+        if dict.__contains__(self, "article"):
+            return
+        dict.__setitem__(self, "article", CompressedEvidenceHandler.read_article(self.__blob_path, self.__span))
+
+    def __getitem__(self, key):
+        if key == "article":
+            self.__load()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key == "article":
+            self.__load()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        return key == "article" or dict.__contains__(self, key)
+
+    def items(self):
+        self.__load()
+        return dict.items(self)
+
+    def values(self):
+        self.__load()
+        return dict.values(self)
+
+    def copy(self) -> dict:
+        self.__load()
+        return dict(self)
+
+
+class CompressedEvidenceHandler(EvidenceFileHandler):
+    """
+    Compact drop-in for EvidenceFileHandler.
+
+    Each record is split in two files under `data/evidence_compact/`:
+        - `evidence_<digest>.json.gz`: gzip'd compact JSON of everything except
+          the article bodies (summary, links, chunks, ...), read eagerly.
+        - `evidence_<digest>.<blob hash>.blob`: every `results[].article`
+          zlib-compressed on its own and concatenated; the metadata stores
+          each article's (offset, length), so one article is read with a
+          single seek when it is first accessed.
+
+    The query index (index.json + index.log) works exactly like EvidenceFileHandler's.
+    """
+
+    EVIDENCE_DIR = EvidenceFileHandler.EVIDENCE_DIR.parent / "evidence_compact"
+    EVIDENCE_FILE_NAME = "evidence.json.gz"
+    NAMING_STRATEGY = "hash"
+
+    # 與 EvidenceFileHandler 分開的 index 快取
+    _index_cache: 'dict | None' = None
+    _index_stamp: 'tuple | None' = None
+    _index_generation = 0
+    _index_cached_generation = -1
+    _index_log_lines = 0
+
+    COMPRESS_LEVEL = 6
+    # migrate_from_json 完成後寫入；之後的 lookup 會把舊 key 改掛到新 key 下，不能再依 index 判斷
+    MIGRATED_MARKER = ".json_migrated"
+
+    @classmethod
+    def content_address(cls, query: str, params: 'dict | None' = None) -> str:
+        """e.g. 'evidence_3f2a...9c.json.gz' (same digest as EvidenceFileHandler)."""
+        name = EvidenceFileHandler.content_address(query, params)
+        return name[:-len(".json")] + ".json.gz"
+
+    @classmethod
+    def find_query(cls, query: str) -> 'CompressedEvidenceHandler | None':
+        """
+        Search for existing evidence for a specific query.
+
+        Returns:
+            CompressedEvidenceHandler: Handler with the metadata loaded if found.
+            None: If no cache exists for this query.
+        """
+        filename = cls._load_index().get(query)
+        if filename and (cls.EVIDENCE_DIR / filename).exists():
+            try:
+                return cls(filename)
+            except (OSError, EOFError, ValueError):
+                return None
+        return None
+
+    @classmethod
+    def store(
+            cls,
+            data: dict,
+            params: 'dict | None' = None,
+            key: 'str | None' = None,
+    ) -> 'CompressedEvidenceHandler':
+        """
+        Store new evidence data and update the index.
+
+        Args:
+            data (dict): The dictionary containing evidence (must have 'query' key).
+            params (dict): Search arguments; part of the content-addressed filename.
+            key (str): Index key (e.g. the canonical query). Defaults to data['query'].
+
+        Returns:
+            CompressedEvidenceHandler: Handler for the stored record.
+        """
+        index_key = key or data.get("query") or ""
+        name = cls.content_address(index_key, params)
+        cls.EVIDENCE_DIR.mkdir(parents=True, exist_ok=True)
+
+        record = data.copy()
+        record.pop("file_id", None)
+
+        blob = bytearray()
+        spans = []
+        results = []
+        for res in record.get("results") or []:
+            if isinstance(res, dict) and res.get("article"):
+                packed = zlib.compress(str(res["article"]).encode("utf-8"), cls.COMPRESS_LEVEL)
+                spans.append([len(blob), len(packed)])
+                blob.extend(packed)
+                res = {k: v for k, v in res.items() if k != "article"}
+            else:
+                spans.append(None)
+            results.append(res)
+        record["results"] = results
+
+        # blob 檔名含內容雜湊：覆寫同一筆證據時，舊的 metadata 不會指到新 blob 的位移
+        blob_name = None
+        if blob:
+            digest = hashlib.sha1(blob).hexdigest()[:12]
+            blob_name = f"{name[:-len('.json.gz')]}.{digest}.blob"
+            cls.__write_atomic(cls.EVIDENCE_DIR / blob_name, bytes(blob))
+
+        meta = {"record": record, "blob": blob_name, "spans": spans}
+        previous_blob = cls.__previous_blob(name)
+        payload = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cls.__write_atomic(cls.EVIDENCE_DIR / name, gzip.compress(payload, cls.COMPRESS_LEVEL))
+
+        if previous_blob and previous_blob != blob_name:
+            try:
+                os.remove(cls.EVIDENCE_DIR / previous_blob)
+            except OSError:
+                pass
+
+        if index_key:
+            cls._update_index(index_key, name)
+
+        return cls(name)
+
+    @classmethod
+    def migrate_from_json(cls, evidence_dir: Optional[Path] = None, *, remove_source: bool = True) -> int:
+        """
+        Converts the `data/evidence/*.json` layout into compact records,
+        keeping the query -> record mapping of its index (index.json + log). Runs only once
+        (a marker file is left in EVIDENCE_DIR); later calls return 0.
+
+        The records keep their legacy (raw query) keys; the first lookup that
+        hits one re-indexes it under the new key (`EvidenceRetrieveHandler.find_cached`).
+
+        Args:
+            evidence_dir (Path): Legacy directory. Defaults to EvidenceFileHandler.EVIDENCE_DIR.
+            remove_source (bool): Delete each legacy JSON file once its record
+                is stored compactly (unreadable files and their index entries
+                are left in place), and the directory if nothing is left.
+
+        Returns:
+            int: Number of records written.
+        """
+        evidence_dir = Path(evidence_dir or EvidenceFileHandler.EVIDENCE_DIR)
+        marker = cls.EVIDENCE_DIR / cls.MIGRATED_MARKER
+        if marker.exists() or not any(
+                (evidence_dir / name).exists()
+                for name in (EvidenceFileHandler.INDEX_FILE_NAME, EvidenceFileHandler.INDEX_LOG_NAME)):
+            return 0
+        index = EvidenceFileHandler.read_index_dir(evidence_dir)
+
+        migrated = 0
+        converted = set()
+        done = cls._load_index()
+        for query, filename in index.items():
+            if query in done:
+                converted.add(filename)
+                continue
+            try:
+                with open(evidence_dir / filename, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(data, dict):
+                cls.store(data, key=query).close()
+                converted.add(filename)
+                migrated += 1
+
+        cls.EVIDENCE_DIR.mkdir(parents=True, exist_ok=True)
+        marker.write_text(str(time.time()), encoding="utf-8")
+
+        if remove_source:
+            cls.__remove_legacy(evidence_dir, index, converted)
+        return migrated
+
+    @staticmethod
+    def __remove_legacy(evidence_dir: Path, index: dict, converted: set) -> None:
+        """Deletes migrated JSON files; rewrites (or deletes) the legacy index for the rest."""
+        for filename in converted:
+            try:
+                os.remove(evidence_dir / filename)
+            except OSError:
+                pass
+
+        remaining = {q: f for q, f in index.items() if f not in converted}
+        index_path = evidence_dir / EvidenceFileHandler.INDEX_FILE_NAME
+        log_path = evidence_dir / EvidenceFileHandler.INDEX_LOG_NAME
+        # 剩下的對應全部寫回 index.json，日誌不再需要
+        try:
+            os.remove(log_path)
+        except FileNotFoundError:
+            pass
+        if remaining:
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(remaining, f, indent=4, ensure_ascii=False)
+            return
+
+        try:
+            os.remove(index_path)
+        except FileNotFoundError:
+            pass
+        try:
+            evidence_dir.rmdir()
+        except OSError:
+            pass  # 仍有其他檔案 (例如未被索引的 JSON)，保留目錄
+
+    @classmethod
+    def list_entries(cls) -> dict:
+        """Same as EvidenceFileHandler.list_entries; "bytes" includes the article blob."""
+        entries = super().list_entries()
+        blob_bytes = {}
+        try:
+            with os.scandir(cls.EVIDENCE_DIR) as it:
+                for item in it:
+                    if item.name.endswith(".blob"):
+                        stem = item.name.split(".", 1)[0]
+                        blob_bytes[stem] = blob_bytes.get(stem, 0) + item.stat().st_size
+        except FileNotFoundError:
+            return entries
+
+        for filename, entry in entries.items():
+            entry["bytes"] += blob_bytes.get(filename.split(".", 1)[0], 0)
+        return entries
+
+    @classmethod
+    def _delete_entry(cls, filename: str) -> int:
+        freed = super()._delete_entry(filename)
+        for blob in cls.EVIDENCE_DIR.glob(f"{filename.split('.', 1)[0]}.*.blob"):
+            try:
+                size = blob.stat().st_size
+                blob.unlink()
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+    @staticmethod
+    def read_article(blob_path: Optional[Path], span: Optional[List[int]]) -> str:
+        """Reads one article from a blob file; "" if it is missing."""
+        if blob_path is None or not span:
+            return ""
+        offset, length = span
+        try:
+            with open(blob_path, "rb") as f:
+                f.seek(offset)
+                return zlib.decompress(f.read(length)).decode("utf-8")
+        except (OSError, zlib.error):
+            return ""
+
+    def __init__(self, name: str, mode: str = "r"):
+        """Loads the metadata record `name` (articles stay on disk)."""
+        if mode != "r":
+            raise ValueError("CompressedEvidenceHandler is written through `store`")
+        self.__name = name
+        self.__path = self.EVIDENCE_DIR / name
+        with open(self.__path, "rb") as f:
+            self.__meta: Dict[str, Any] = json.loads(gzip.decompress(f.read()).decode("utf-8"))
+
+    def get_filename(self) -> str:
+        """Returns the metadata file name (used as `file_id`)."""
+        return self.__name
+
+    def get_stored_at(self) -> 'float | None':
+        """Returns when this evidence was stored (epoch seconds)."""
+        try:
+            return os.path.getmtime(self.__path)
+        except OSError:
+            return None
+
+    def read(self) -> Any:
+        """
+        Returns the evidence record. Each result's "article" is loaded from the
+        blob only when accessed.
+        """
+        record = dict(self.__meta.get("record") or {})
+        blob = self.__meta.get("blob")
+        blob_path = self.EVIDENCE_DIR / blob if blob else None
+        spans = self.__meta.get("spans") or []
+        record["results"] = [
+            LazyResult(res, blob_path, spans[i] if i < len(spans) else None)
+            for i, res in enumerate(record.get("results") or [])
+        ]
+        return record
+
+    def write(self, data: dict):
+        raise IOError("CompressedEvidenceHandler is written through `store`")
+
+    def close(self) -> None:
+        """Nothing to release; kept for EvidenceFileHandler compatibility."""
+        pass
+
+    @classmethod
+    def __previous_blob(cls, name: str) -> Optional[str]:
+        try:
+            with open(cls.EVIDENCE_DIR / name, "rb") as f:
+                return json.loads(gzip.decompress(f.read()).decode("utf-8")).get("blob")
+        except (OSError, EOFError, ValueError):
+            return None
+
+    @staticmethod
+    def __write_atomic(path: Path, payload: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
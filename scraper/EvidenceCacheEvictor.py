@@ -0,0 +1,246 @@
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+from pathlib import Path
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+
+DEBUG = 0
+
+class EvidenceCacheEvictor():
+    """
+    Keeps an evidence store within a size budget.
+
+    EvidenceRetrieveHandler reports every cache hit (`record_access`) and
+    store (`record_store`); access times and hit counts are kept in memory
+    and saved next to the store, so they survive restarts. A background
+    thread periodically checks the store's total bytes / entry count and,
+    once either exceeds its limit, evicts entries down to `low_watermark`
+    of the limit:
+        - "lru": least recently accessed first
+        - "lfu": fewest hits first (ties: least recently accessed)
+    Entries never accessed since tracking started use their store time.
+
+    Works with any storage exposing `list_entries()` / `evict(filenames)`
+    (EvidenceFileHandler, CompressedEvidenceHandler, EvidenceDatabaseHandler).
+
+    With a `local_index`, its live size counts toward `max_bytes` and the
+    documents of evicted records are removed from it. Each record is
+    assumed to hold an even share of the index when picking victims.
+    """
+
+    LRU = "lru"
+    LFU = "lfu"
+
+    def __init__(
+            self,
+            storage: Type[EvidenceFileHandler] = EvidenceFileHandler,
+            *,
+            max_bytes: Optional[int] = 500 * 1024 * 1024,
+            max_entries: Optional[int] = None,
+            policy: str = LRU,
+            interval: float = 300.0,
+            low_watermark: float = 0.9,
+            stats_path: Optional[Path] = None,
+            local_index: Optional['LocalEvidenceIndex'] = None,
+    ):
+        """
+        Args:
+            storage: Evidence store class.
+            max_bytes (int): Disk budget. None = unlimited.
+            max_entries (int): Max stored records. None = unlimited.
+            policy (str): "lru" or "lfu".
+            interval (float): Seconds between background checks.
+            low_watermark (float): Evict down to this fraction of the limits,
+                so one eviction buys headroom for many stores.
+            stats_path (Path): Where access stats are saved. Defaults to
+                `<store dir>_access.json` beside the store.
+            local_index (LocalEvidenceIndex): Index built from this store; it
+                is counted in the byte budget and purged of evicted records.
+        """
+        if policy not in (self.LRU, self.LFU):
+            raise ValueError(f"Unsupported policy: {policy}")
+
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.policy = policy
+        self.interval = interval
+        self.low_watermark = low_watermark
+        self.local_index = local_index
+        self.stats_path = Path(stats_path or self.__default_stats_path(storage))
+
+        self.__lock = threading.Lock()
+        self.__access: Dict[str, list] = self.__load_access()  # key -> [last_access, hits]
+        self.__dirty = False
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__stats = {
+            "runs": 0,
+            "evicted_entries": 0,
+            "bytes_evicted": 0,
+            "entries": 0,
+            "bytes": 0,
+            "last_run": None,
+        }
+
+    @staticmethod
+    def __default_stats_path(storage) -> Path:
+        base = getattr(storage, "EVIDENCE_DIR", None) or getattr(storage, "DB_PATH")
+        base = Path(base)
+        return base.parent / f"{base.stem}_access.json"
+
+    def record_access(self, key: str) -> None:
+        """Marks `key` as read now (one more hit)."""
+        with self.__lock:
+            entry = self.__access.setdefault(key, [0.0, 0])
+            entry[0] = time.time()
+            entry[1] += 1
+            self.__dirty = True
+
+    def record_store(self, key: str) -> None:
+        """Marks `key` as freshly written (hit count is kept across refreshes)."""
+        with self.__lock:
+            entry = self.__access.setdefault(key, [0.0, 0])
+            entry[0] = time.time()
+            self.__dirty = True
+
+    def start(self) -> 'EvidenceCacheEvictor':
+        """Starts the background eviction thread (idempotent)."""
+        with self.__lock:
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__stop.clear()
+                self.__thread = threading.Thread(target=self.__loop, name="evidence-evictor", daemon=True)
+                self.__thread.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Stops the background thread and saves the access stats."""
+        self.__stop.set()
+        if wait and self.__thread is not None:
+            self.__thread.join()
+        self.__save_access()
+
+    def run_once(self) -> int:
+        """
+        Checks the budget and evicts if needed.
+
+        Returns:
+            int: Number of entries evicted.
+        """
+        entries = self.storage.list_entries()
+        total_bytes = sum(e["bytes"] for e in entries.values())
+        total_entries = len(entries)
+        index_bytes = self.local_index.size_bytes() if self.local_index is not None else 0
+        total_bytes += index_bytes
+
+        evicted_bytes = 0
+        victims = []
+        if self.__over(total_bytes, total_entries, 1.0):
+            index_share = index_bytes / total_entries if total_entries else 0
+            ranked = sorted(entries.items(), key=lambda item: self.__rank(item[1]))
+            for filename, entry in ranked:
+                if not self.__over(total_bytes, total_entries, self.low_watermark):
+                    break
+                victims.append(filename)
+                total_bytes -= entry["bytes"] + index_share
+                total_entries -= 1
+
+        if victims:
+            evicted_bytes = self.storage.evict(victims)
+            if self.local_index is not None:
+                # 被淘汰的證據不能再被本地語料庫引用；索引實際釋放的大小取代估計值
+                self.local_index.remove_sources(victims)
+                remaining_index = self.local_index.size_bytes()
+                evicted_bytes += max(0, index_bytes - remaining_index)
+                gone = set(victims)
+                total_bytes = remaining_index + sum(e["bytes"] for f, e in entries.items() if f not in gone)
+            with self.__lock:
+                for filename in victims:
+                    for key in entries[filename]["keys"]:
+                        self.__access.pop(key, None)
+                self.__dirty = True
+            if DEBUG:
+                print(f"[evictor] evicted {len(victims)} entries, {evicted_bytes} bytes")
+
+        with self.__lock:
+            self.__stats["runs"] += 1
+            self.__stats["evicted_entries"] += len(victims)
+            self.__stats["bytes_evicted"] += evicted_bytes
+            self.__stats["entries"] = total_entries
+            self.__stats["bytes"] = total_bytes
+            self.__stats["last_run"] = time.time()
+
+        self.__save_access()
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            stats(dict):
+                {\n
+                    **"entries"** / **"bytes"**: store size (plus the local index) after the last run,\n
+                    **"max_entries"** / **"max_bytes"** / **"policy"**: the budget,\n
+                    **"tracked_keys"**: keys with access stats,\n
+                    **"hits"**: cache hits recorded for the tracked keys,\n
+                    **"runs"**, **"evicted_entries"**, **"bytes_evicted"**: eviction totals,\n
+                    **"last_run"**: epoch seconds of the last check\n
+                }
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["tracked_keys"] = len(self.__access)
+            stats["hits"] = sum(hits for _, hits in self.__access.values())
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        stats["policy"] = self.policy
+        return stats
+
+    def __over(self, total_bytes: int, total_entries: int, fraction: float) -> bool:
+        if self.max_bytes is not None and total_bytes > self.max_bytes * fraction:
+            return True
+        if self.max_entries is not None and total_entries > self.max_entries * fraction:
+            return True
+        return False
+
+    def __rank(self, entry: Dict[str, Any]) -> tuple:
+        """Sort key: entries that should go first sort lowest."""
+        with self.__lock:
+            tracked = [self.__access[k] for k in entry["keys"] if k in self.__access]
+        last_access = max([a[0] for a in tracked] + [entry.get("stored_at") or 0.0])
+        hits = sum(a[1] for a in tracked)
+        if self.policy == self.LFU:
+            return (hits, last_access)
+        return (last_access,)
+
+    def __loop(self) -> None:
+        while not self.__stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Evidence eviction error: {e}")
+
+    def __load_access(self) -> Dict[str, list]:
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {k: [float(v[0]), int(v[1])] for k, v in data.items()}
+        except (OSError, ValueError, TypeError, IndexError, AttributeError):
+            return {}
+
+    def __save_access(self) -> None:
+        with self.__lock:
+            if not self.__dirty:
+                return
+            snapshot = {k: list(v) for k, v in self.__access.items()}
+            self.__dirty = False
+
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.stats_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.stats_path)
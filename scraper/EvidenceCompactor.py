@@ -0,0 +1,174 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from scraper.QueryNormalizer import QueryNormalizer
+
+class EvidenceCompactor():
+    """
+    Turns a retrieved evidence dict into a short, claim-focused block for the verifier.
+
+    Every chunk and article of the results is split into sentences, the
+    sentences are ranked against the claim with BM25 over character bigrams
+    (Latin/digit words count as single terms), and the best ones are kept
+    until `token_budget` is spent (the summary may use at most half of it).
+    Kept sentences are printed grouped by source, in their original order,
+    after Tavily's summary.
+    """
+
+    SENTENCE_END = re.compile(r"(?<=[。！？!?；;])|(?<=[.!?])\s+|\n+|\[\.\.\.\]|…+")
+    # 計算句子長度時不算標點與空白
+    NON_WORD = re.compile(r"[\W_]+")
+
+    def __init__(
+            self,
+            token_budget: int = 600,
+            *,
+            normalizer: Optional[QueryNormalizer] = None,
+            include_summary: bool = True,
+            min_sentence_chars: int = 3,
+            max_sentence_chars: int = 300,
+            max_article_chars: int = 20000,
+            k1: float = 1.5,
+            b: float = 0.75,
+    ):
+        """
+        Args:
+            token_budget (int): Approximate token size of the returned block.
+            normalizer (QueryNormalizer): Provides the bigram terms.
+            include_summary (bool): Put Tavily's summary (when present) first.
+            min_sentence_chars (int) / max_sentence_chars (int): Shorter
+                sentences are dropped, longer ones truncated. The minimum counts
+                letters, digits and CJK characters only (not punctuation), and is
+                low because short Chinese sentences such as "營收創新高。" are
+                often the densest evidence.
+            max_article_chars (int): Only the head of each raw article is scanned.
+            k1 (float), b (float): BM25 parameters.
+        """
+        self.token_budget = token_budget
+        self.include_summary = include_summary
+        self.min_sentence_chars = min_sentence_chars
+        self.max_sentence_chars = max_sentence_chars
+        self.max_article_chars = max_article_chars
+        self.k1 = k1
+        self.b = b
+        self.__normalizer = normalizer or QueryNormalizer()
+
+    def compact(self, claim: str, evidence_data: Optional[Dict[str, Any]]) -> str:
+        """
+        Returns:
+            str: The evidence block ("" if there is nothing to show).
+        """
+        if not evidence_data:
+            return ""
+
+        parts = []
+        budget = self.token_budget
+
+        summary = evidence_data.get("summary")
+        if self.include_summary and summary:
+            # 摘要最多佔一半預算，其餘留給與主張最相關的原文句子
+            summary = self.__truncate(summary, budget // 2)
+            parts.append(f"<summary>:\n{summary}")
+            budget -= self.estimate_tokens(summary)
+
+        sentences = self.__collect_sentences(evidence_data.get("results") or [])
+        picked = self.__select(claim, sentences, budget)
+
+        by_source: Dict[int, List[Dict[str, Any]]] = {}
+        for sentence in picked:
+            by_source.setdefault(sentence["source"], []).append(sentence)
+
+        results = evidence_data.get("results") or []
+        for source in sorted(by_source):
+            result = results[source]
+            lines = [s["text"] for s in sorted(by_source[source], key=lambda s: s["position"])]
+            header = f"<source {source + 1}> {result.get('title', '')} ({result.get('link', '')})".rstrip()
+            parts.append(header + ":\n" + "\n".join(f"- {line}" for line in lines))
+
+        return "\n\n".join(parts)
+
+    def split_sentences(self, text: str) -> List[str]:
+        """Splits Chinese/English text into trimmed sentences."""
+        if not text:
+            return []
+        sentences = []
+        for piece in self.SENTENCE_END.split(text):
+            piece = (piece or "").strip(" \t-•*#>|")
+            if len(self.NON_WORD.sub("", piece)) < self.min_sentence_chars:
+                continue
+            sentences.append(piece[:self.max_sentence_chars])
+        return sentences
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count: one per CJK character, one per 4 other characters."""
+        cjk = len(QueryNormalizer.CJK_RUN.findall(text))
+        return cjk + math.ceil((len(text) - cjk) / 4)
+
+    def __collect_sentences(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        sentences = []
+        seen = set()
+        for source, result in enumerate(results):
+            texts = list(result.get("chunks") or [])
+            article = result.get("article")
+            if article:
+                texts.append(article[:self.max_article_chars])
+
+            for text in texts:
+                for sentence in self.split_sentences(text):
+                    fingerprint = self.__normalizer.normalize(sentence).replace(" ", "")
+                    if fingerprint in seen:
+                        continue
+                    seen.add(fingerprint)
+                    sentences.append({
+                        "source": source,
+                        "position": len(sentences),
+                        "text": sentence,
+                        "terms": Counter(self.__normalizer.char_ngrams(sentence)),
+                    })
+        return sentences
+
+    def __select(self, claim: str, sentences: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+        if not sentences or budget <= 0:
+            return []
+
+        query_terms = set(self.__normalizer.char_ngrams(claim))
+        if not query_terms:
+            return []
+
+        n = len(sentences)
+        avg_len = sum(sum(s["terms"].values()) for s in sentences) / n or 1.0
+        df = Counter(term for s in sentences for term in query_terms if term in s["terms"])
+
+        for s in sentences:
+            length = sum(s["terms"].values())
+            score = 0.0
+            for term in query_terms:
+                tf = s["terms"].get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_len))
+            s["score"] = score
+
+        picked = []
+        for s in sorted(sentences, key=lambda s: s["score"], reverse=True):
+            if s["score"] <= 0:
+                break
+            cost = self.estimate_tokens(s["text"]) + 2
+            if cost > budget:
+                continue
+            picked.append(s)
+            budget -= cost
+        return picked
+
+    def __truncate(self, text: str, budget: int) -> str:
+        if self.estimate_tokens(text) <= budget:
+            return text
+        # 以字元逐步縮短，直到符合預算
+        end = len(text)
+        while end > 0 and self.estimate_tokens(text[:end]) > budget:
+            end = int(end * 0.9)
+        return text[:end] + "…"
@@ -0,0 +1,337 @@
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+class EvidenceDatabaseHandler():
+    """
+    SQLite-backed drop-in for EvidenceFileHandler.
+
+    Evidence records and the query index live in one WAL-mode database, so a
+    store is a single transaction (no index rewrite) and concurrent workers
+    never lose each other's index entries.
+    """
+
+    DB_PATH = EvidenceFileHandler.EVIDENCE_DIR.parent / "evidence.sqlite3"
+
+    __local = threading.local()
+    __schema_lock = threading.Lock()
+    __schema_ready = set()
+
+    @classmethod
+    def _connect(cls) -> sqlite3.Connection:
+        """Returns this thread's connection, creating the schema on first use."""
+        db_path = str(cls.DB_PATH)
+        conns = getattr(cls.__local, "conns", None)
+        if conns is None:
+            conns = cls.__local.conns = {}
+
+        conn = conns.get(db_path)
+        if conn is None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conns[db_path] = conn
+
+        with cls.__schema_lock:
+            if db_path not in cls.__schema_ready:
+                cls.__create_schema(conn)
+                cls.__schema_ready.add(db_path)
+        return conn
+
+    @staticmethod
+    def __create_schema(conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS evidence (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                data        TEXT    NOT NULL,
+                created_at  REAL    NOT NULL,
+                source_file TEXT    UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS query_index (
+                query       TEXT    PRIMARY KEY,
+                evidence_id INTEGER NOT NULL REFERENCES evidence(id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_query_evidence ON query_index(evidence_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+    @classmethod
+    def find_query(cls, query: str) -> 'EvidenceDatabaseHandler | None':
+        """
+        Search for existing evidence for a specific query.
+
+        Args:
+            query (str): The search query string.
+
+        Returns:
+            EvidenceDatabaseHandler: Handler with data if found.
+            None: If no cache exists for this query.
+        """
+        row = cls._connect().execute(
+            "SELECT e.id, e.data, e.created_at FROM query_index q JOIN evidence e ON e.id = q.evidence_id "
+            "WHERE q.query = ?",
+            (query,),
+        ).fetchone()
+
+        if row is None:
+            return None
+        return EvidenceDatabaseHandler(row[0], row[1], row[2])
+
+    @classmethod
+    def open_entry(cls, filename: str) -> 'EvidenceDatabaseHandler | None':
+        """
+        Opens a stored record by its `get_filename()` id ("sqlite:<id>").
+
+        Returns:
+            EvidenceDatabaseHandler: Handler with data, or None if the record is gone.
+        """
+        if not str(filename).startswith("sqlite:"):
+            return None
+        try:
+            evidence_id = int(str(filename).split(":", 1)[1])
+        except ValueError:
+            return None
+        row = cls._connect().execute(
+            "SELECT id, data, created_at FROM evidence WHERE id = ?", (evidence_id,)
+        ).fetchone()
+        return EvidenceDatabaseHandler(row[0], row[1], row[2]) if row is not None else None
+
+    @classmethod
+    def rekey(cls, old_key: str, new_key: str) -> bool:
+        """
+        Moves an index entry from `old_key` to `new_key` (the record is kept).
+
+        Returns:
+            bool: False if `old_key` is not indexed.
+        """
+        conn = cls._connect()
+        with _Transaction(conn):
+            row = conn.execute("SELECT evidence_id FROM query_index WHERE query = ?", (old_key,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM query_index WHERE query = ?", (old_key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO query_index (query, evidence_id) VALUES (?, ?)",
+                (new_key, row[0]),
+            )
+        return True
+
+    @classmethod
+    def store(
+            cls,
+            data: dict,
+            params: Optional[dict] = None,
+            key: Optional[str] = None,
+    ) -> 'EvidenceDatabaseHandler':
+        """
+        Store new evidence data and update the index in one transaction.
+        Storing under a key again overwrites that key's record (same id),
+        unless another key shares the record.
+
+        Args:
+            data (dict): The dictionary containing evidence (must have 'query' key).
+            params (dict): Search arguments; accepted for EvidenceFileHandler compatibility.
+            key (str): Index key (e.g. the canonical query). Defaults to data['query'].
+
+        Returns:
+            EvidenceDatabaseHandler: Handler for the stored record.
+        """
+        store_data = data.copy()
+        store_data.pop("file_id", None)
+        payload = json.dumps(store_data, ensure_ascii=False)
+
+        created_at = time.time()
+        index_key = key or store_data.get("query")
+        conn = cls._connect()
+        with _Transaction(conn):
+            # 同一個 key 再次寫入 (例如過期刷新) 時覆寫原本的紀錄，舊資料不會變成沒人引用的孤兒
+            evidence_id = cls.__own_record(conn, index_key) if index_key else None
+            if evidence_id is not None:
+                conn.execute(
+                    "UPDATE evidence SET data = ?, created_at = ? WHERE id = ?",
+                    (payload, created_at, evidence_id),
+                )
+            else:
+                cur = conn.execute(
+                    "INSERT INTO evidence (data, created_at) VALUES (?, ?)",
+                    (payload, created_at),
+                )
+                evidence_id = cur.lastrowid
+            if index_key:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_index (query, evidence_id) VALUES (?, ?)",
+                    (index_key, evidence_id),
+                )
+
+        return EvidenceDatabaseHandler(evidence_id, payload, created_at)
+
+    @staticmethod
+    def __own_record(conn: sqlite3.Connection, key: str) -> Optional[int]:
+        """Id of the record `key` points at, if no other key shares it (else None)."""
+        row = conn.execute(
+            "SELECT q.evidence_id, (SELECT COUNT(*) FROM query_index WHERE evidence_id = q.evidence_id) "
+            "FROM query_index q JOIN evidence e ON e.id = q.evidence_id WHERE q.query = ?",
+            (key,),
+        ).fetchone()
+        if row is None or row[1] != 1:
+            return None
+        return row[0]
+
+    @classmethod
+    def migrate_from_json(cls, evidence_dir: Optional[Path] = None) -> int:
+        """
+        One-shot import of the `data/evidence/*.json` layout (index.json and
+        index.log plus evidence files). Runs only once per database; later calls return 0.
+
+        Args:
+            evidence_dir (Path): Directory to import. Defaults to EvidenceFileHandler's.
+
+        Returns:
+            int: Number of evidence files imported.
+        """
+        evidence_dir = Path(evidence_dir or EvidenceFileHandler.EVIDENCE_DIR)
+        conn = cls._connect()
+
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return 0
+
+        index = EvidenceFileHandler.read_index_dir(evidence_dir)
+
+        imported = 0
+        with _Transaction(conn):
+            file_ids = {}
+            for path in sorted(evidence_dir.glob("*.json")):
+                if path.name == EvidenceFileHandler.INDEX_FILE_NAME:
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (json.JSONDecodeError, OSError):
+                    continue
+
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO evidence (data, created_at, source_file) VALUES (?, ?, ?)",
+                    (json.dumps(data, ensure_ascii=False), path.stat().st_mtime, path.name),
+                )
+                if cur.rowcount:
+                    imported += 1
+                file_ids[path.name] = conn.execute(
+                    "SELECT id FROM evidence WHERE source_file = ?", (path.name,)
+                ).fetchone()[0]
+
+                if isinstance(data, dict) and data.get("query"):
+                    conn.execute(
+                        "INSERT OR IGNORE INTO query_index (query, evidence_id) VALUES (?, ?)",
+                        (data["query"], file_ids[path.name]),
+                    )
+
+            # index.json 才是權威的對應表，覆蓋上面由檔案內容推得的對應
+            for query, filename in index.items():
+                if filename in file_ids:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO query_index (query, evidence_id) VALUES (?, ?)",
+                        (query, file_ids[filename]),
+                    )
+
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+
+        return imported
+
+    @classmethod
+    def list_entries(cls) -> dict:
+        """
+        Lists every stored evidence record (same format as EvidenceFileHandler.list_entries).
+
+        Returns:
+            dict: {"sqlite:<id>": {"keys": [index keys], "bytes": payload size,
+                "stored_at": epoch seconds}}
+        """
+        entries = {}
+        rows = cls._connect().execute(
+            "SELECT e.id, length(CAST(e.data AS BLOB)), e.created_at, q.query "
+            "FROM evidence e LEFT JOIN query_index q ON q.evidence_id = e.id"
+        )
+        for evidence_id, size, created_at, query in rows:
+            entry = entries.setdefault(
+                f"sqlite:{evidence_id}", {"keys": [], "bytes": size, "stored_at": created_at}
+            )
+            if query is not None:
+                entry["keys"].append(query)
+        return entries
+
+    @classmethod
+    def evict(cls, filenames) -> int:
+        """
+        Deletes records (by `get_filename()` id) and their index keys.
+        The database file only shrinks after a VACUUM.
+
+        Returns:
+            int: Payload bytes deleted.
+        """
+        ids = [int(name.split(":", 1)[1]) for name in filenames if str(name).startswith("sqlite:")]
+        if not ids:
+            return 0
+
+        conn = cls._connect()
+        marks = ",".join("?" * len(ids))
+        with _Transaction(conn):
+            freed = conn.execute(
+                f"SELECT COALESCE(SUM(length(CAST(data AS BLOB))), 0) FROM evidence WHERE id IN ({marks})", ids
+            ).fetchone()[0]
+            conn.execute(f"DELETE FROM query_index WHERE evidence_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM evidence WHERE id IN ({marks})", ids)
+        return freed
+
+    def __init__(self, evidence_id: int, payload: str, created_at: Optional[float] = None):
+        self.__evidence_id = evidence_id
+        self.__payload = payload
+        self.__created_at = created_at
+
+    def get_filename(self) -> str:
+        """Returns an identifier for the stored record (used as `file_id`)."""
+        return f"sqlite:{self.__evidence_id}"
+
+    def get_stored_at(self) -> Optional[float]:
+        """Returns when this evidence was stored (epoch seconds)."""
+        return self.__created_at
+
+    def read(self) -> Any:
+        """Reads the evidence record."""
+        try:
+            return json.loads(self.__payload)
+        except json.JSONDecodeError:
+            return {}
+
+    def close(self) -> None:
+        """Nothing to release; kept for EvidenceFileHandler compatibility."""
+        pass
+
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _Transaction():
+    """`BEGIN IMMEDIATE` ... `COMMIT` / `ROLLBACK` for autocommit connections."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.__conn = conn
+
+    def __enter__(self):
+        self.__conn.execute("BEGIN IMMEDIATE")
+        return self.__conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.__conn.execute("ROLLBACK")
+        else:
+            self.__conn.execute("COMMIT")
@@ -1,7 +1,9 @@
 from scraper.JsonFileHandler import JsonFileHandler
 from pathlib import Path
+import hashlib
 import os
 import json
+import threading
 
 class EvidenceFileHandler(JsonFileHandler):
     """
@@ -12,34 +14,265 @@ class EvidenceFileHandler(JsonFileHandler):
     EVIDENCE_DIR = Path(__file__).resolve().parent.parent / "data" / "evidence"
     EVIDENCE_FILE_NAME = "evidence.json"
     INDEX_FILE_NAME = "index.json"
+    # store 只把新的對應附加到 index.log (一行一筆)；日誌累積到 INDEX_COMPACT_LINES 行
+    # (或 rekey / evict 時) 才把整個索引重寫進 index.json 並清空日誌
+    INDEX_LOG_NAME = "index.log"
+    INDEX_COMPACT_LINES = 1000
+
+    # "hash": evidence_<digest>.json derived from query + search params (no probing, idempotent)
+    # "sequential": legacy evidence.json, evidence1.json, ... probing
+    NAMING_STRATEGY = "hash"
+    ADDRESS_PARAMS = ("search_region", "search_duration", "topic", "level", "result_count", "chunk_count")
+
+    # 行程內共用的 index 快取；以 (路徑, mtime, 大小) 與 generation 判斷是否失效
+    _index_lock = threading.RLock()
+    _index_cache: 'dict | None' = None
+    _index_stamp: 'tuple | None' = None
+    _index_generation = 0
+    _index_cached_generation = -1
+    _index_log_lines = 0
+
+    @classmethod
+    def in_directory(cls, evidence_dir) -> type:
+        """
+        Returns a subclass of this store that keeps its records (and its own
+        index cache) in `evidence_dir`, e.g. an isolated store for tests or
+        cassette replay.
+        """
+        return type(f"{cls.__name__}In_{Path(evidence_dir).name}", (cls,), {
+            "EVIDENCE_DIR": Path(evidence_dir),
+            "_index_cache": None,
+            "_index_stamp": None,
+            "_index_generation": 0,
+            "_index_cached_generation": -1,
+            "_index_log_lines": 0,
+        })
 
     @classmethod
     def _get_index_path(cls):
         return cls.EVIDENCE_DIR / cls.INDEX_FILE_NAME
 
     @classmethod
-    def _load_index(cls) -> dict:
-        """Helper to load the query-to-filename index."""
-        index_path = cls._get_index_path()
-        if not index_path.exists():
-            return {}
+    def _get_index_log_path(cls):
+        return cls.EVIDENCE_DIR / cls.INDEX_LOG_NAME
+
+    @classmethod
+    def _index_file_stamp(cls) -> 'tuple | None':
+        stamps = []
+        for path in (cls._get_index_path(), cls._get_index_log_path()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                stamps.append(None)
+                continue
+            stamps.append((str(path), st.st_mtime_ns, st.st_size))
+        return None if stamps == [None, None] else tuple(stamps)
+
+    @classmethod
+    def read_index_dir(cls, evidence_dir) -> dict:
+        """Reads the query -> filename index of an evidence directory (index.json plus its log)."""
+        evidence_dir = Path(evidence_dir)
+        return cls._read_index_files(evidence_dir / cls.INDEX_FILE_NAME, evidence_dir / cls.INDEX_LOG_NAME)[0]
+
+    @staticmethod
+    def _read_index_files(index_path: Path, log_path: Path) -> tuple:
+        """Returns (index, number of log lines replayed on top of index.json)."""
         try:
             with open(index_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+                index = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            index = {}
+
+        lines = 0
+        try:
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        query, filename = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue  # 寫到一半的最後一行
+                    index[query] = filename
+                    lines += 1
+        except FileNotFoundError:
+            pass
+        return index, lines
+
+    @classmethod
+    def _load_index(cls) -> dict:
+        """
+        Helper to load the query-to-filename index.
+        Returns the shared in-memory copy; it is only re-read from disk when the
+        file changed (mtime/size) or `invalidate_index()` bumped the generation.
+        Callers must not mutate the returned dict.
+        """
+        with cls._index_lock:
+            stamp = cls._index_file_stamp()
+            if (cls._index_cache is not None
+                    and stamp == cls._index_stamp
+                    and cls._index_cached_generation == cls._index_generation):
+                return cls._index_cache
+
+            index, lines = {}, 0
+            if stamp is not None:
+                index, lines = cls._read_index_files(cls._get_index_path(), cls._get_index_log_path())
+
+            cls._index_log_lines = lines
+            cls._index_cache = index
+            cls._index_stamp = stamp
+            cls._index_cached_generation = cls._index_generation
+            return index
 
     @classmethod
     def _update_index(cls, query: str, filename: str):
-        """Helper to update the index with a new query-filename pair."""
-        index = cls._load_index()
-        index[query] = filename
-        
+        """
+        Helper to update the index with a new query-filename pair. Appends one
+        line to the index log (cost independent of the index size); a mapping
+        that is already there writes nothing.
+        """
+        with cls._index_lock:
+            # 複製後再改：其他執行緒可能正拿著共用的快取在走訪
+            index = dict(cls._load_index())
+            if index.get(query) == filename:
+                return
+            index[query] = filename
+            if cls._index_log_lines >= cls.INDEX_COMPACT_LINES:
+                cls._write_index(index)
+                return
+
+            cls.EVIDENCE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(cls._get_index_log_path(), "a", encoding="utf-8") as f:
+                f.write(json.dumps([query, filename], ensure_ascii=False) + "\n")
+
+            cls._index_log_lines += 1
+            cls._index_cache = index
+            cls._index_stamp = cls._index_file_stamp()
+            cls._index_cached_generation = cls._index_generation
+
+    @classmethod
+    def _write_index(cls, index: dict) -> None:
+        """
+        Writes all of `index` to index.json, clears the index log and makes it
+        the shared in-memory copy (caller holds the lock).
+        """
         if not cls.EVIDENCE_DIR.exists():
             os.makedirs(cls.EVIDENCE_DIR)
 
-        with open(cls._get_index_path(), "w", encoding="utf-8") as f:
-            json.dump(index, f, indent=4, ensure_ascii=False)
+        # 寫到暫存檔再 rename，外部讀者不會讀到寫一半的 index；日誌的內容已含在其中，之後才刪
+        index_path = cls._get_index_path()
+        tmp_path = index_path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+        try:
+            os.remove(cls._get_index_log_path())
+        except FileNotFoundError:
+            pass
+
+        cls._index_log_lines = 0
+        cls._index_cache = index
+        cls._index_stamp = cls._index_file_stamp()
+        cls._index_cached_generation = cls._index_generation
+
+    @classmethod
+    def rekey(cls, old_key: str, new_key: str) -> bool:
+        """
+        Moves an index entry from `old_key` to `new_key` (the evidence file is kept).
+
+        Returns:
+            bool: False if `old_key` is not indexed.
+        """
+        with cls._index_lock:
+            index = dict(cls._load_index())
+            filename = index.pop(old_key, None)
+            if filename is None:
+                return False
+            index[new_key] = filename
+            cls._write_index(index)
+        return True
+
+    @classmethod
+    def invalidate_index(cls) -> None:
+        """Forces the next lookup to re-read index.json (and its log) from disk."""
+        with cls._index_lock:
+            cls._index_generation += 1
+
+    @classmethod
+    def list_entries(cls) -> dict:
+        """
+        Lists every indexed evidence file.
+
+        Returns:
+            dict: {filename: {"keys": [index keys], "bytes": size on disk,
+                "stored_at": epoch seconds}}
+        """
+        with cls._index_lock:
+            index = dict(cls._load_index())
+
+        entries = {}
+        for key, filename in index.items():
+            entry = entries.get(filename)
+            if entry is None:
+                try:
+                    st = os.stat(cls.EVIDENCE_DIR / filename)
+                except FileNotFoundError:
+                    continue
+                entry = entries[filename] = {"keys": [], "bytes": st.st_size, "stored_at": st.st_mtime}
+            entry["keys"].append(key)
+        return entries
+
+    @classmethod
+    def evict(cls, filenames) -> int:
+        """
+        Deletes evidence files and every index key pointing at them.
+
+        Returns:
+            int: Bytes freed on disk.
+        """
+        filenames = set(filenames)
+        if not filenames:
+            return 0
+
+        with cls._index_lock:
+            index = {k: f for k, f in cls._load_index().items() if f not in filenames}
+            cls._write_index(index)
+
+        return sum(cls._delete_entry(filename) for filename in filenames)
+
+    @classmethod
+    def _delete_entry(cls, filename: str) -> int:
+        """Removes one entry's files; returns the bytes freed."""
+        path = cls.EVIDENCE_DIR / filename
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except OSError:
+            return 0
+
+    @classmethod
+    def content_address(cls, query: str, params: 'dict | None' = None) -> str:
+        """
+        Derives a stable evidence filename from the normalized query and the
+        search parameters that affect the result.
+
+        Args:
+            query (str): The search query string.
+            params (dict): Search arguments (region, duration, level, ...).
+
+        Returns:
+            str: e.g. 'evidence_3f2a...9c.json'
+        """
+        params = params or {}
+        normalized = " ".join(str(query).split()).lower()
+        key = json.dumps(
+            [normalized, {k: params.get(k) for k in cls.ADDRESS_PARAMS}],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        base, ext = os.path.splitext(cls.EVIDENCE_FILE_NAME)
+        return f"{base}_{digest}{ext}"
 
     @classmethod
     def find_query(cls, query: str) -> 'EvidenceFileHandler | None':
@@ -59,37 +292,71 @@ class EvidenceFileHandler(JsonFileHandler):
         if filename:
             full_path = cls.EVIDENCE_DIR / filename
             if full_path.exists():
-                return EvidenceFileHandler(filename, mode="r")
+                return cls(filename, mode="r")
         
         return None
 
     @classmethod
-    def store(cls, data: dict) -> 'EvidenceFileHandler':
+    def open_entry(cls, filename: str) -> 'EvidenceFileHandler | None':
+        """
+        Opens a stored record by the name `get_filename()` returned (its `file_id`).
+
+        Returns:
+            EvidenceFileHandler: Open handler, or None if the record is gone.
+        """
+        if not filename or not (cls.EVIDENCE_DIR / filename).exists():
+            return None
+        try:
+            return cls(filename, mode="r")
+        except (OSError, EOFError, ValueError):
+            return None
+
+    @classmethod
+    def store(
+            cls,
+            data: dict,
+            params: 'dict | None' = None,
+            key: 'str | None' = None,
+    ) -> 'EvidenceFileHandler':
         """
         Store new evidence data and update the index.
         
         Args:
             data (dict): The dictionary containing evidence (must have 'query' key).
+            params (dict): Search arguments used to produce `data`; part of the
+                content-addressed filename.
+            key (str): Index key (e.g. the canonical query). Defaults to data['query'].
             
         Returns:
             EvidenceFileHandler: The handler used to store the file.
         """
-        # 使用預設檔名，JsonFileHandler 會自動處理 evidence1, evidence2...
-        handler = EvidenceFileHandler(cls.EVIDENCE_FILE_NAME, mode="w")
+        index_key = key or data.get("query")
+
+        if cls.NAMING_STRATEGY == "hash" and index_key:
+            # 同樣的 query + 參數永遠對應同一個檔名，重複寫入只會原子性地覆蓋
+            name = cls.content_address(index_key, params)
+            handler = cls(name, mode="w", atomic=True)
+        else:
+            # 使用預設檔名，JsonFileHandler 會自動處理 evidence1, evidence2...
+            handler = cls(cls.EVIDENCE_FILE_NAME, mode="w")
         handler.write(data)
         
         # 取得實際儲存的檔名
         saved_filename = handler.get_filename()
         
-        # 如果資料中有 query，更新索引
-        if "query" in data and data["query"]:
-            cls._update_index(data["query"], saved_filename)
+        # 如果有 query (或指定的 key)，更新索引
+        if index_key:
+            cls._update_index(index_key, saved_filename)
             
         return handler
 
-    def __init__(self, name: str, mode: str = "r"):
+    def __init__(self, name: str, mode: str = "r", *, atomic: bool = False):
         """Initialize with specific evidence directory."""
-        super().__init__(str(self.EVIDENCE_DIR), name, mode)
+        super().__init__(str(self.EVIDENCE_DIR), name, mode, atomic=atomic)
+
+    def get_stored_at(self) -> 'float | None':
+        """Returns when this evidence was stored (epoch seconds)."""
+        return self.get_modified_time()
 
     def write(self, data: dict):
         """
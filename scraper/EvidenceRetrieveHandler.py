@@ -1,8 +1,16 @@
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Union, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+import threading
+import time
+from typing import Union, Dict, Any, Optional, Type, List
 
 from scraper.Retriever import Retriever
 from scraper.EvidenceFileHandler import EvidenceFileHandler
+from scraper.QueryNormalizer import QueryNormalizer
+from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+from scraper.EvidenceCacheEvictor import EvidenceCacheEvictor
+from runtime.StageScheduler import StageScheduler
+from runtime.SingleFlight import SingleFlight
+from runtime.MetricsRegistry import MetricsRegistry, get_metrics
 
 class EvidenceRetrieveHandler():
     """
@@ -13,13 +21,94 @@ class EvidenceRetrieveHandler():
     BASIC = Retriever.BASIC
     ADVANCED = Retriever.ADVANCED
 
-    def __init__(self, max_search_requests: int = 5):
+    # 快取存活時間 (秒)，依 search_duration 決定；None 代表永不過期
+    CACHE_TTL = {
+        Retriever.TIME_DURATION_MONTH: 24 * 3600,
+        Retriever.TIME_DURATION_YEAR: 7 * 24 * 3600,
+        Retriever.IGNORE_TIME_DURATION: None,
+    }
+
+    # cache_stats 的欄位 -> factcheck_evidence_cache_total 的 event 標籤
+    METRIC_EVENTS = {
+        "hits": "hit",
+        "normalized_hits": "normalized_hit",
+        "misses": "miss",
+        "local_hits": "local_hit",
+        "api_calls": "api_call",
+        "coalesced": "coalesced",
+        "refreshes": "refresh",
+    }
+
+    def __init__(
+            self,
+            max_search_requests: int = 5,
+            storage: Type[EvidenceFileHandler] = EvidenceFileHandler,
+            normalizer: Optional[QueryNormalizer] = None,
+            scheduler: Optional[StageScheduler] = None,
+            retriever: Optional[Retriever] = None,
+            local_index: Optional[LocalEvidenceIndex] = None,
+            local_threshold: float = 0.7,
+            local_proximity: float = 0.5,
+            evictor: Optional[EvidenceCacheEvictor] = None,
+            metrics: Optional[MetricsRegistry] = None,
+    ):
         """
         Args:
             max_search_requests (int): Max concurrent API requests.
+            storage: Evidence store class exposing `find_query` / `store`
+                (EvidenceFileHandler or EvidenceDatabaseHandler).
+            normalizer (QueryNormalizer): Builds the cache key from the query.
+                The query sent to Tavily is left untouched.
+            scheduler (StageScheduler): If given, Tavily calls run on its
+                "search" stage (rate limit + priority) instead of this
+                handler's own thread pool.
+            retriever (Retriever): Preconfigured retriever (retry policy,
+                hedging). Defaults to `Retriever()`.
+            local_index (LocalEvidenceIndex): If given, every stored result is
+                indexed, and `query(use_local_TF=True)` answers from the local
+                corpus before calling Tavily.
+            local_threshold (float): Min relevance (0-1) of the best local
+                document for the local corpus to answer.
+            local_proximity (float): Min share (0-1) of the query that must
+                appear within one sentence of that document (see
+                `LocalEvidenceIndex.search(min_proximity=...)`), so a page that
+                merely mentions the same words in different places does not
+                stop the Tavily search.
+            evictor (EvidenceCacheEvictor): If given, cache hits and stores are
+                reported to it so it can evict by recency / frequency.
+            metrics (MetricsRegistry): Where cache hits / misses are counted
+                (same events as `cache_stats`). Defaults to `get_metrics()`.
         """
         self.__executor = ThreadPoolExecutor(max_workers=max_search_requests)
-        self.__retriever = Retriever()
+        self.__scheduler = scheduler
+        self.__retriever = retriever or Retriever()
+        self.__storage = storage
+        self.__normalizer = normalizer or QueryNormalizer()
+        self.__local_index = local_index
+        self.local_threshold = local_threshold
+        self.local_proximity = local_proximity
+        self.__evictor = evictor
+        # 同一個 cache key 同時只會有一個 Tavily 請求，其餘呼叫共用它的 Future
+        self.__inflight = SingleFlight()
+
+        self.__stats_lock = threading.Lock()
+        self.__seen_queries = set()
+        self.__stats = {
+            "lookups": 0,
+            "hits": 0,
+            "normalized_hits": 0,
+            "misses": 0,
+            "local_hits": 0,
+            "api_calls": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+        }
+        self.metrics = metrics or get_metrics()
+        self.__cache_events = self.metrics.counter(
+            "factcheck_evidence_cache_total",
+            "Evidence cache events (hit, normalized_hit, miss, local_hit, api_call, coalesced, refresh)",
+            labels=("event",),
+        )
 
     def query(
             self, 
@@ -28,53 +117,367 @@ class EvidenceRetrieveHandler():
             use_local_TF: bool = False, 
             chunk_count: int =3, 
             result_count: int = 3, 
-            level: str = BASIC
+            level: str = BASIC,
+            serve_stale: bool = True,
+            priority: int = 0,
             ) -> Union[Future, EvidenceFileHandler, None]:
         """
         Initiates a search query.
 
         Args:
             query (dict): Must contain "query" key.
-            use_local_TF (bool): If True, checks local storage first.
+            use_local_TF (bool): If True, checks local storage first (exact
+                cache, then the local corpus when a local_index is configured).
             result_count (int): Max results to fetch from API.
             level (str): 'basic' or 'advanced'.
+            serve_stale (bool): If True, an entry older than its TTL is still
+                returned while a refresh runs in the background; otherwise it
+                is treated as a miss.
+            priority (int): Scheduler priority (lower runs first); only used
+                when a scheduler is configured.
 
         Returns:
-            Future: If a new API request is started.
-            EvidenceFileHandler: If found in local cache.
+            Future: If an API request is started, or an identical one is
+                already in flight (the same Future is then shared). Also
+                returned, already done, when the local corpus answers.
+            EvidenceFileHandler: If found in local cache (or the configured storage's handler).
             None: If query is invalid.
         """
         if "query" not in query or not query["query"]:
             return None
         
-        # 1. Check Local Cache (Index Search)
-        if use_local_TF:
-            cached_handler = EvidenceFileHandler.find_query(query["query"])
-            if cached_handler:
-                print(f"✅ Found in cache: {query['query']}")
-                return cached_handler
-
-        # 2. Prepare API Args
+        # 1. Prepare API Args
         args = query.copy()
         args["level"] = level
         args["result_count"] = result_count
         args["chunk_count"] = chunk_count
 
-        # 3. Submit to Thread Pool
-        future = self.__executor.submit(self.__retrieve_and_store, args)
+        raw_query = query["query"]
+        canonical = self.__normalizer.canonicalize(raw_query) or raw_query
+        cache_key = self.make_cache_key(canonical, args)
+
+        # 2. Check Local Cache (Index Search)
+        if use_local_TF:
+            cached_handler = self.find_cached(self.__storage, raw_query, cache_key)
+            stale = cached_handler is not None and self.__is_stale(cached_handler, args)
+
+            if stale and not serve_stale:
+                cached_handler.close()
+                cached_handler = None
+
+            self.__record_lookup(raw_query, args, cached_handler)
+            if cached_handler:
+                if self.__evictor is not None:
+                    self.__evictor.record_access(cache_key)
+                if stale:
+                    print(f"♻️ Serving stale cache, refreshing: {raw_query}")
+                    self.__refresh_in_background(args, cache_key, priority)
+                else:
+                    print(f"✅ Found in cache: {raw_query}")
+                return cached_handler
+
+            local = self.__search_local(raw_query, args)
+            if local is not None:
+                return local
+
+        # 3. Submit to Thread Pool (or join an identical in-flight request)
+        future, started = self.__inflight.submit(
+            cache_key, lambda: self.__submit(args, cache_key, priority)
+        )
+        self.__count("api_calls" if started else "coalesced")
 
         return future
+
+    def query_many(
+            self,
+            queries: List[dict],
+            *,
+            score_threshold: Optional[float] = 0.8,
+            use_local_TF: bool = False,
+            chunk_count: int = 3,
+            result_count: int = 3,
+            level: str = BASIC,
+            priority: int = 0,
+            ) -> Optional[Dict[str, Any]]:
+        """
+        Fans out several queries for the same claim concurrently and merges
+        their evidence. Results are deduplicated by URL (keeping the best score).
+        Once the best relevance `score` (0-1) among the merged results reaches
+        `score_threshold`, searches that have not started yet are cancelled
+        (unless another caller is sharing them). Searches already sent to
+        Tavily are not cancelled: they finish in the background (their credits
+        are spent and their evidence is still cached), only their results are
+        left out of the returned evidence.
+
+        Args:
+            queries (List[dict]): Query dicts, most important first.
+            score_threshold (float): Stop early once one result is at least this
+                relevant. None = always wait for every query.
+            Other arguments are forwarded to `query`.
+
+        Returns:
+            dict: Merged evidence in the same format as a single query
+                (`summary` concatenates each query's summary).
+            None: If no query produced evidence.
+        """
+        futures: List[Future] = []
+        for q in queries:
+            result = self.query(
+                q,
+                use_local_TF=use_local_TF,
+                chunk_count=chunk_count,
+                result_count=result_count,
+                level=level,
+                priority=priority,
+            )
+            if isinstance(result, Future):
+                futures.append(result)
+            elif result is not None:
+                # 命中快取：包成已完成的 Future，與 API 結果一起處理
+                done = Future()
+                try:
+                    done.set_result(result.read())
+                finally:
+                    result.close()
+                futures.append(done)
+
+        collected: List[tuple] = []
+        by_link: Dict[str, Dict[str, Any]] = {}
+
+        for future in as_completed(futures):
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"❌ Fan-out search error: {e}")
+                continue
+            if not data:
+                continue
+
+            collected.append((futures.index(future), data))
+            for res in data.get("results", []):
+                link = res.get("link") or f"#{len(by_link)}"
+                if link not in by_link or res.get("score", 0.0) > by_link[link].get("score", 0.0):
+                    by_link[link] = res
+
+            # 用最佳分數而非加總：多筆低相關結果加起來不代表證據足夠
+            best_score = max((r.get("score", 0.0) or 0.0 for r in by_link.values()), default=0.0)
+            if score_threshold is not None and best_score >= score_threshold:
+                cancelled = sum(self.__inflight.cancel(f) for f in futures if not f.done())
+                if cancelled:
+                    print(f"⏹️ Enough evidence (score {best_score:.2f}), cancelled {cancelled} searches")
+                break
+
+        if not collected:
+            return None
+        return self.__merge_evidence(collected, by_link)
+
+    @staticmethod
+    def __merge_evidence(collected: List[tuple], by_link: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        # 依原本 queries 的順序排列，重要的 query 在前
+        collected.sort(key=lambda pair: pair[0])
+        datas = [data for _, data in collected]
+
+        summaries = [
+            f"[{d.get('query', '')}] {d['summary']}" for d in datas if d.get("summary")
+        ]
+        merged = {
+            "summary": "\n".join(summaries) if summaries else None,
+            "query": " | ".join(str(d.get("query", "")) for d in datas),
+            "results": sorted(by_link.values(), key=lambda r: r.get("score", 0.0) or 0.0, reverse=True),
+            "response_time": max((d.get("response_time", 0.0) or 0.0) for d in datas),
+            "usage": {"credits": sum((d.get("usage") or {}).get("credits", 0) for d in datas)},
+            "file_id": [d.get("file_id") for d in datas if d.get("file_id")],
+        }
+        merged["evidence"] = "\n\n".join(d.get("evidence", "") for d in datas if d.get("evidence"))
+        return merged
+
+    @classmethod
+    def make_cache_key(cls, query: str, args: dict) -> str:
+        """
+        Builds the evidence cache key from the query and every search parameter
+        that changes Tavily's answer.
+        e.g. '台 積 電 2024 營 收|region=Taiwan|duration=last_year|level=advanced|results=3|chunks=3'
+        """
+        duration = args.get("search_duration") or Retriever.IGNORE_TIME_DURATION
+        if isinstance(duration, (list, tuple)):
+            duration = "~".join(str(d) for d in duration)
+        return "|".join([
+            str(query),
+            f"region={args.get('search_region') or 'Global'}",
+            f"duration={duration}",
+            f"level={args.get('level', cls.BASIC)}",
+            f"results={args.get('result_count', 3)}",
+            f"chunks={args.get('chunk_count', 3)}",
+        ])
+
+    @staticmethod
+    def find_cached(storage: Any, raw_query: str, cache_key: str) -> Any:
+        """
+        Looks `cache_key` up in `storage`. Evidence stored before keys were
+        normalized and param-aware (index.json entries, and records copied by
+        `migrate_from_json`) is indexed by the raw query string; on a hit it
+        is re-indexed under `cache_key` so the next lookup finds it directly.
+        """
+        handler = storage.find_query(cache_key)
+        if handler is not None or raw_query == cache_key:
+            return handler
+
+        handler = storage.find_query(raw_query)
+        if handler is not None and hasattr(storage, "rekey"):
+            try:
+                storage.rekey(raw_query, cache_key)
+            except Exception as e:
+                print(f"❌ Evidence re-index error: {e}")
+        return handler
+
+    @classmethod
+    def get_ttl(cls, search_duration: Any) -> Optional[float]:
+        """Returns the cache TTL (seconds) for a search duration; None = never expires."""
+        if isinstance(search_duration, str):
+            return cls.CACHE_TTL.get(search_duration)
+        return None
+
+    def __is_stale(self, handler: Any, args: dict) -> bool:
+        ttl = self.get_ttl(args.get("search_duration"))
+        if ttl is None:
+            return False
+        stored_at = handler.get_stored_at()
+        if stored_at is None:
+            return True
+        return time.time() - stored_at > ttl
+
+    def __submit(self, args: dict, cache_key: str, priority: int = 0) -> Future:
+        if self.__scheduler is not None:
+            return self.__scheduler.submit(
+                "search", self.__retrieve_and_store, args, cache_key, priority=priority
+            )
+        return self.__executor.submit(self.__retrieve_and_store, args, cache_key)
+
+    def __refresh_in_background(self, args: dict, cache_key: str, priority: int = 0) -> None:
+        """Re-fetches a stale entry once; concurrent stale hits share the refresh."""
+        _, started = self.__inflight.submit(
+            cache_key, lambda: self.__submit(args, cache_key, priority)
+        )
+        if started:
+            self.__count("refreshes", "api_calls")
+
+    def __search_local(self, raw_query: str, args: dict) -> Optional[Future]:
+        """Answers from the local corpus if its best document is relevant enough."""
+        if self.__local_index is None:
+            return None
+
+        start = time.time()
+        try:
+            results = self.__local_index.search(
+                raw_query,
+                top_k=args.get("result_count", 3),
+                min_relevance=self.local_threshold,
+                min_proximity=self.local_proximity,
+                max_age=self.get_ttl(args.get("search_duration")),
+            )
+        except Exception as e:
+            print(f"❌ Local corpus search error: {e}")
+            return None
+        if not results:
+            return None
+
+        print(f"📚 Found in local corpus: {raw_query}")
+        self.__count("local_hits")
+
+        evidence = "\n\n".join(
+            f"<result {i}>:\n" + "\n".join(res["chunks"])
+            for i, res in enumerate(results, start=1) if res["chunks"]
+        )
+        done = Future()
+        done.set_result({
+            "summary": None,
+            "query": raw_query,
+            "response_time": round(time.time() - start, 3),
+            "usage": {"credits": 0},
+            "results": results,
+            "evidence": evidence,
+            "source": "local_corpus",
+            "file_id": None,
+        })
+        return done
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Returns evidence-cache counters since this handler was created.
+
+        Returns:
+            stats(dict):
+                {\n
+                    **"lookups"**: cache lookups,\n
+                    **"hits"** / **"misses"**: lookup outcomes,\n
+                    **"normalized_hits"**: hits on evidence that was fetched for a
+                    differently written query, i.e. only found thanks to
+                    normalization (checked once per distinct query string),\n
+                    **"local_hits"**: exact-cache misses answered by the local corpus,\n
+                    **"api_calls"**: Tavily requests submitted (incl. refreshes),\n
+                    **"coalesced"**: queries that joined an identical in-flight request,\n
+                    **"refreshes"**: background refreshes of stale entries,\n
+                    **"hit_rate"**: hits / lookups,\n
+                    **"tavily_calls_saved"**: hits that did not trigger a refresh,
+                    plus local-corpus answers\n
+                }
+        """
+        with self.__stats_lock:
+            stats = dict(self.__stats)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        stats["tavily_calls_saved"] = stats["hits"] + stats["local_hits"] - stats["refreshes"]
+        return stats
+
+    def __record_lookup(self, raw_query: str, args: dict, handler: Any) -> None:
+        keys = ["lookups", "hits" if handler is not None else "misses"]
+        if handler is not None and self.__is_normalized_hit(raw_query, args, handler):
+            keys.append("normalized_hits")
+        self.__count(*keys)
+
+    def __is_normalized_hit(self, raw_query: str, args: dict, handler: Any) -> bool:
+        """
+        命中的證據原本是為另一種寫法的 query 抓的 (記錄內的 "query" 與本次不同)。
+        每個 query 字串只檢查第一次，之後相同的字串一律不算。
+        """
+        exact_key = self.make_cache_key(raw_query, args)
+        with self.__stats_lock:
+            if exact_key in self.__seen_queries:
+                return False
+            self.__seen_queries.add(exact_key)
+        try:
+            stored_query = (handler.read() or {}).get("query")
+        except Exception:
+            return False
+        return stored_query is not None and str(stored_query).strip() != str(raw_query).strip()
+
+    def __count(self, *keys: str) -> None:
+        with self.__stats_lock:
+            for key in keys:
+                self.__stats[key] += 1
+        for key in keys:
+            event = self.METRIC_EVENTS.get(key)
+            if event:
+                self.__cache_events.inc(event=event)
     
-    def __retrieve_and_store(self, args: dict) -> dict:
+    def __retrieve_and_store(self, args: dict, cache_key: Optional[str] = None) -> dict:
         """
         Worker function: retrieves data and saves to file.
         """
         response = self.__retriever.retrieve(args)
         
         if response:
-            file_handler = EvidenceFileHandler.store(response)
+            file_handler = self.__storage.store(response, params=args, key=cache_key)
             response["file_id"] = file_handler.get_filename()
             file_handler.close()
+
+            if self.__evictor is not None and cache_key:
+                self.__evictor.record_store(cache_key)
+
+            if self.__local_index is not None:
+                try:
+                    self.__local_index.add_evidence(response, source=response["file_id"])
+                except Exception as e:
+                    print(f"❌ Local corpus indexing error: {e}")
             
         return response
     
@@ -1,14 +1,16 @@
 import json
 import os
+import tempfile
 from typing import Any, Optional
 
 class JsonFileHandler():
     """
     Handles JSON file operations including creation, reading, and writing.
-    Automatically handles file naming conflicts by appending incrementing numbers.
+    Automatically handles file naming conflicts by appending incrementing numbers,
+    unless `atomic` is set, in which case the name is used as-is and replaced atomically.
     """
 
-    def __init__(self, path: str, name: str, mode: str = "r"):
+    def __init__(self, path: str, name: str, mode: str = "r", *, atomic: bool = False):
         """
         Initialize the JsonFileHandler.
 
@@ -16,6 +18,8 @@ class JsonFileHandler():
             path (str): The directory path.
             name (str): The desired file name (e.g., 'data.json').
             mode (str): File open mode ('r' for read, 'w' for write/create).
+            atomic (bool): (write mode) Keep `name` even if it exists, and write
+                through a temp file + rename so readers never see a partial file.
         """
         if not os.path.exists(path):
             os.makedirs(path)
@@ -24,6 +28,7 @@ class JsonFileHandler():
         self.__file_name_base, self.__file_extension = os.path.splitext(name)
         self.__file_path = os.path.join(self.__store_path, name)
         self.__mode = mode
+        self.__atomic = atomic
         self.__file = None
 
         if mode == "r":
@@ -45,6 +50,10 @@ class JsonFileHandler():
 
     def __open_write(self) -> None:
         """Creates a new file for writing, handling naming conflicts."""
+        if self.__atomic:
+            # 檔名由呼叫端決定 (例如內容雜湊)，寫入時才透過暫存檔 + rename 落地
+            return
+
         # 邏輯：如果要寫入 evidence.json 但已存在，自動變成 evidence1.json
         base_name = self.__file_name_base
         ext = self.__file_extension
@@ -65,9 +74,18 @@ class JsonFileHandler():
         """Returns the actual filename being used."""
         return os.path.basename(self.__file_path)
 
+    def get_modified_time(self) -> Optional[float]:
+        """Returns the file's last modification time (epoch seconds), or None if missing."""
+        try:
+            return os.path.getmtime(self.__file_path)
+        except OSError:
+            return None
+
     def write(self, data: Any) -> None:
         """Writes data to the JSON file."""
-        if self.__mode == "w" and self.__file:
+        if self.__mode == "w" and self.__atomic:
+            self.__write_atomic(data)
+        elif self.__mode == "w" and self.__file:
             # seek(0) 和 truncate() 確保覆寫
             self.__file.seek(0)
             self.__file.truncate()
@@ -75,6 +93,22 @@ class JsonFileHandler():
         else:
             raise IOError("File not open in write mode")
 
+    def __write_atomic(self, data: Any) -> None:
+        """Writes to a temp file in the same directory, then renames it over the target."""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.__store_path,
+            prefix=f".{self.__file_name_base}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, mode="w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.__file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
     def read(self) -> Any:
         """Reads data from the JSON file."""
         if self.__mode == "r" and self.__file:
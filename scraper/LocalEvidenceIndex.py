@@ -0,0 +1,400 @@
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+from scraper.EvidenceDatabaseHandler import _Transaction
+from scraper.QueryNormalizer import QueryNormalizer
+from collections import Counter
+from pathlib import Path
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Type
+
+class LocalEvidenceIndex():
+    """
+    Full-text search over every article already retrieved from Tavily.
+
+    Each search result (title + chunks + article) is one document, keyed by
+    its link so the same page fetched by several queries is indexed once.
+    Terms are CJK character bigrams and Latin/digit words
+    (`QueryNormalizer.char_ngrams`); postings live in a WAL-mode SQLite file
+    and are added incrementally whenever new evidence is stored.
+
+    The index keeps the title and chunks, but not the article body: a
+    document only refers to its evidence record (`file_id` + result
+    position), and the article is read back from the evidence store when a
+    search returns it.
+
+    Ranking is BM25. `search` additionally reports a relevance in [0, 1]:
+    the idf-weighted share of the query's terms found in the document, which
+    is what callers compare against a threshold. `min_proximity` further
+    requires that much of the query to appear within a single sentence, so
+    terms scattered over an unrelated page do not count as an answer.
+    """
+
+    DB_PATH = EvidenceFileHandler.EVIDENCE_DIR.parent / "evidence_index.sqlite3"
+    MAX_ARTICLE_CHARS = 20000
+    SENTENCE_END = re.compile(r"[。！？!?；;\n]+|(?<=[.])\s+")
+
+    def __init__(
+            self,
+            db_path: Optional[Path] = None,
+            *,
+            storage: Type[EvidenceFileHandler] = EvidenceFileHandler,
+            normalizer: Optional[QueryNormalizer] = None,
+            k1: float = 1.5,
+            b: float = 0.75,
+    ):
+        """
+        Args:
+            db_path (Path): SQLite file for the index. Defaults to DB_PATH.
+            storage: Evidence store the documents refer to (the same class the
+                EvidenceRetrieveHandler stores into); articles are read from it
+                with `open_entry(file_id)`.
+            normalizer (QueryNormalizer): Provides the bigram terms.
+            k1 (float), b (float): BM25 parameters.
+        """
+        self.db_path = str(db_path or self.DB_PATH)
+        self.storage = storage
+        self.k1 = k1
+        self.b = b
+        self.__normalizer = normalizer or QueryNormalizer()
+        self.__local = threading.local()
+        self.__schema_lock = threading.Lock()
+        self.__schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns this thread's connection, creating the schema on first use."""
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+
+        with self.__schema_lock:
+            if not self.__schema_ready:
+                self.__create_schema(conn)
+                self.__schema_ready = True
+        return conn
+
+    @staticmethod
+    def __create_schema(conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_key   TEXT    NOT NULL UNIQUE,
+                title     TEXT,
+                link      TEXT,
+                chunks    TEXT,
+                article   TEXT,
+                length    INTEGER NOT NULL,
+                stored_at REAL    NOT NULL,
+                source    TEXT,
+                position  INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term   TEXT    NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf     INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+            CREATE TABLE IF NOT EXISTS indexed_sources (
+                source TEXT PRIMARY KEY
+            );
+            CREATE INDEX IF NOT EXISTS idx_docs_source ON docs(source);
+        """)
+        # 舊版索引直接存文章本文、沒有 position 欄位；舊資料照常可讀，重新索引時改存參照
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(docs)")}
+        if "position" not in columns:
+            conn.execute("ALTER TABLE docs ADD COLUMN position INTEGER")
+
+    def add_evidence(
+            self,
+            data: Dict[str, Any],
+            source: Optional[str] = None,
+            stored_at: Optional[float] = None,
+    ) -> int:
+        """
+        Indexes every result of one evidence record (Retriever output format).
+        A page already indexed under the same link is replaced, and so is
+        everything indexed from `source` before (a refreshed record is
+        rewritten in place with different results).
+
+        Args:
+            data (dict): Evidence record with a "results" list.
+            source (str): Where the record is stored (file_id). Documents keep
+                (source, result position) instead of the article text, and the
+                source is skipped on later `index_storage` runs. Without a
+                source the article text has to be stored in the index.
+            stored_at (float): Fetch time, defaults to now.
+
+        Returns:
+            int: Number of documents indexed.
+        """
+        results = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(results, list):
+            return 0
+
+        stored_at = stored_at or time.time()
+        conn = self._connect()
+        indexed = 0
+        with _Transaction(conn):
+            if source:
+                # 同一個紀錄被刷新時內容會變，舊文件的 (source, position) 會指到別的網頁
+                self.__delete_docs(conn, "source = ?", (source,))
+                conn.execute("INSERT OR IGNORE INTO indexed_sources (source) VALUES (?)", (source,))
+
+            for position, result in enumerate(results):
+                if not isinstance(result, dict):
+                    continue
+                chunks = [c for c in (result.get("chunks") or []) if isinstance(c, str)]
+                article = (result.get("article") or "")[:self.MAX_ARTICLE_CHARS]
+                title = result.get("title") or ""
+                terms = Counter(self.__normalizer.char_ngrams("\n".join([title, *chunks, article])))
+                if not terms:
+                    continue
+
+                link = result.get("link") or ""
+                doc_key = link or f"{source}#{position}"
+                self.__delete_docs(conn, "doc_key = ?", (doc_key,))
+
+                cur = conn.execute(
+                    "INSERT INTO docs (doc_key, title, link, chunks, article, length, stored_at, source, position) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (doc_key, title, link, json.dumps(chunks, ensure_ascii=False), None if source else article,
+                     sum(terms.values()), stored_at, source, position),
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, cur.lastrowid, tf) for term, tf in terms.items()],
+                )
+                indexed += 1
+        return indexed
+
+    def index_storage(self) -> int:
+        """
+        Backfills the index from every record already in `storage`
+        (`list_entries` + `open_entry`). Records indexed before are skipped,
+        so this is cheap to call at startup.
+
+        Returns:
+            int: Number of records indexed.
+        """
+        conn = self._connect()
+        done = {row[0] for row in conn.execute("SELECT source FROM indexed_sources")}
+
+        indexed = 0
+        for filename, entry in self.storage.list_entries().items():
+            if filename in done:
+                continue
+            handler = self.storage.open_entry(filename)
+            if handler is None:
+                continue
+            try:
+                data = handler.read()
+            except (json.JSONDecodeError, OSError):
+                continue
+            finally:
+                handler.close()
+
+            self.add_evidence(data, source=filename, stored_at=entry.get("stored_at"))
+            indexed += 1
+        return indexed
+
+    def search(
+            self,
+            query: str,
+            *,
+            top_k: int = 3,
+            min_relevance: float = 0.0,
+            min_proximity: float = 0.0,
+            max_age: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Args:
+            query (str): Claim or search string.
+            top_k (int): Max documents returned.
+            min_relevance (float): Drop documents whose relevance is below this.
+            min_proximity (float): Drop documents in which no single sentence
+                (title, chunk or article sentence) holds at least this
+                idf-weighted share of the query's terms. 0 = no check.
+            max_age (float): Only consider documents fetched within this many
+                seconds. None = any age.
+
+        Returns:
+            List[dict]: Results in Retriever's format ("title", "link",
+                "article", "chunks", "score" = relevance) plus "bm25" and
+                "proximity", best first.
+        """
+        terms = set(self.__normalizer.char_ngrams(query))
+        if not terms:
+            return []
+
+        conn = self._connect()
+        doc_count, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+        if not doc_count:
+            return []
+        avg_length = total_length / doc_count or 1.0
+
+        marks = ",".join("?" * len(terms))
+        df = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term",
+            tuple(terms),
+        ).fetchall())
+        idf = {
+            term: math.log(1 + (doc_count - df.get(term, 0) + 0.5) / (df.get(term, 0) + 0.5))
+            for term in terms
+        }
+        idf_total = sum(idf.values()) or 1.0
+
+        sql = (
+            f"SELECT p.doc_id, p.term, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id "
+            f"WHERE p.term IN ({marks})"
+        )
+        params: List[Any] = list(terms)
+        if max_age is not None:
+            sql += " AND d.stored_at >= ?"
+            params.append(time.time() - max_age)
+
+        bm25: Dict[int, float] = {}
+        matched: Dict[int, float] = {}
+        for doc_id, term, tf, length in conn.execute(sql, params):
+            norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+            bm25[doc_id] = bm25.get(doc_id, 0.0) + idf[term] * tf * (self.k1 + 1) / norm
+            matched[doc_id] = matched.get(doc_id, 0.0) + idf[term]
+
+        ranked = sorted(bm25, key=lambda d: bm25[d], reverse=True)
+        ranked = [d for d in ranked if matched[d] / idf_total >= min_relevance]
+
+        results = []
+        articles: Dict[str, List[Any]] = {}
+        # 鄰近度要讀文章本文才能判斷，依 BM25 順序逐批檢查，湊滿 top_k 就停
+        batch = top_k if min_proximity <= 0 else max(top_k * 4, 10)
+        for start in range(0, len(ranked), batch):
+            ids = ranked[start:start + batch]
+            rows = {
+                row[0]: row
+                for row in conn.execute(
+                    f"SELECT id, title, link, chunks, article, source, position FROM docs "
+                    f"WHERE id IN ({','.join('?' * len(ids))})",
+                    ids,
+                )
+            }
+            for doc_id in ids:
+                _, title, link, chunks, article, source, position = rows[doc_id]
+                chunks = json.loads(chunks or "[]")
+                if article is None:
+                    article = self.__load_article(source, position, link, articles)
+                    if article is None:
+                        continue
+
+                proximity = self.__proximity(idf, idf_total, [title or "", *chunks, article])
+                if proximity < min_proximity:
+                    continue
+                results.append({
+                    "title": title,
+                    "link": link,
+                    "article": article,
+                    "chunks": chunks,
+                    "score": round(matched[doc_id] / idf_total, 4),
+                    "bm25": round(bm25[doc_id], 4),
+                    "proximity": round(proximity, 4),
+                })
+                if len(results) >= top_k:
+                    return results
+        return results
+
+    def __load_article(
+            self,
+            source: Optional[str],
+            position: Optional[int],
+            link: Optional[str],
+            cache: Dict[str, List[Any]],
+    ) -> Optional[str]:
+        """
+        Reads one result's article from its evidence record; "" if the record
+        is gone, None if that position now holds another page.
+        """
+        if not source or position is None:
+            return ""
+        if source not in cache:
+            cache[source] = []
+            handler = self.storage.open_entry(source)
+            if handler is not None:
+                try:
+                    record = handler.read() or {}
+                    cache[source] = list(record.get("results") or [])
+                except (json.JSONDecodeError, OSError):
+                    pass
+                finally:
+                    handler.close()
+        results = cache[source]
+        if position >= len(results) or not isinstance(results[position], dict):
+            return ""
+        if (results[position].get("link") or "") != (link or ""):
+            return None
+        return (results[position].get("article") or "")[:self.MAX_ARTICLE_CHARS]
+
+    @staticmethod
+    def __delete_docs(conn: sqlite3.Connection, where: str, params: tuple) -> None:
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM docs WHERE {where}", params)]
+        if ids:
+            marks = ",".join("?" * len(ids))
+            conn.execute(f"DELETE FROM postings WHERE doc_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM docs WHERE id IN ({marks})", ids)
+
+    def __proximity(self, idf: Dict[str, float], idf_total: float, texts: List[str]) -> float:
+        """Best idf-weighted share of the query's terms found within one sentence."""
+        best = 0.0
+        for text in texts:
+            for sentence in self.SENTENCE_END.split(text or ""):
+                terms = set(self.__normalizer.char_ngrams(sentence)) & idf.keys()
+                if terms:
+                    best = max(best, sum(idf[t] for t in terms) / idf_total)
+        return best
+
+    def remove_sources(self, sources) -> int:
+        """
+        Drops every document that refers to one of `sources` (e.g. evidence
+        records evicted from the store). Pages re-indexed later from another
+        record are kept.
+
+        Returns:
+            int: Number of documents removed.
+        """
+        sources = [s for s in set(sources) if s]
+        if not sources:
+            return 0
+
+        conn = self._connect()
+        marks = ",".join("?" * len(sources))
+        with _Transaction(conn):
+            removed = conn.execute(f"SELECT COUNT(*) FROM docs WHERE source IN ({marks})", sources).fetchone()[0]
+            self.__delete_docs(conn, f"source IN ({marks})", tuple(sources))
+            conn.execute(f"DELETE FROM indexed_sources WHERE source IN ({marks})", sources)
+        return removed
+
+    def size_bytes(self) -> int:
+        """
+        Bytes used by live pages of the index. Deleted rows free their pages
+        for reuse, so this shrinks after `remove_sources` even though the file
+        itself only shrinks after a VACUUM.
+        """
+        conn = self._connect()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def stats(self) -> Dict[str, int]:
+        """Returns {"documents", "terms", "sources"}."""
+        conn = self._connect()
+        return {
+            "documents": conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0],
+            "terms": conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0],
+            "sources": conn.execute("SELECT COUNT(*) FROM indexed_sources").fetchone()[0],
+        }
@@ -0,0 +1,96 @@
+import re
+import unicodedata
+from typing import List
+
+try:
+    from opencc import OpenCC
+except ImportError:  # optional dependency, only needed for Simplified -> Traditional folding
+    OpenCC = None
+
+
+class QueryNormalizer():
+    """
+    Builds canonical cache keys for search queries.
+
+    The key only decides which cached evidence a query may reuse; the query
+    sent to Tavily is never modified.
+
+    Steps:
+        1. Unicode NFKC (full-width -> half-width, compatibility forms)
+        2. optional Simplified -> Traditional Chinese folding (needs `opencc`)
+        3. lower-case, punctuation/symbols -> whitespace
+        4. tokenize: each CJK character is a token, Latin/digit runs are tokens
+        5. key: the CJK characters in their original order, then "|" and the
+           Latin/digit tokens as a sorted bag
+
+    e.g. "台積電 2024 營收", "台積電２０２４營收！" and "2024 台積電營收" share
+    the key "台積電營收|2024", while "美國對中國加徵關稅" and
+    "中國對美國加徵關稅" do not: the order of the Chinese text is part of
+    the meaning, so it is never discarded. A query without any CJK text
+    keeps its word order too ("us tariffs on china" != "china tariffs on us").
+    """
+
+    # CJK Ext-A, Unified Ideographs, Compatibility Ideographs, Kana, Hangul
+    CJK_CHARS = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af"
+    TOKEN_PATTERN = re.compile(rf"[{CJK_CHARS}]|[^\s{CJK_CHARS}]+")
+    RUN_PATTERN = re.compile(rf"[{CJK_CHARS}]+|[^\s{CJK_CHARS}]+")
+    CJK_RUN = re.compile(rf"[{CJK_CHARS}]")
+
+    def __init__(self, fold_simplified: bool = False):
+        """
+        Args:
+            fold_simplified (bool): Fold Simplified Chinese into Traditional.
+                Disabled (with a warning) if `opencc` is not installed.
+        """
+        self.__converter = None
+        if fold_simplified:
+            if OpenCC is None:
+                print("⚠️ opencc not installed, Simplified -> Traditional folding disabled.")
+            else:
+                self.__converter = OpenCC("s2t")
+
+    def canonicalize(self, query: str) -> str:
+        """Returns the canonical cache key for `query`."""
+        tokens = self.tokenize(query)
+        cjk = [t for t in tokens if self.CJK_RUN.match(t)]
+        if not cjk:
+            return " ".join(tokens)
+        # 中文依原順序；夾雜的英文、數字 (年份、代號) 位置常常不固定，當成一袋排序
+        others = sorted(t for t in tokens if not self.CJK_RUN.match(t))
+        if not others:
+            return "".join(cjk)
+        return "".join(cjk) + "|" + " ".join(others)
+
+    def tokenize(self, query: str) -> List[str]:
+        """Returns the normalized tokens of `query` in their original order."""
+        return self.TOKEN_PATTERN.findall(self.normalize(query))
+
+    def normalize(self, text: str) -> str:
+        """Applies steps 1-3 (NFKC, optional folding, lower-case, punctuation -> space)."""
+        if not text:
+            return ""
+
+        text = unicodedata.normalize("NFKC", str(text))
+        if self.__converter is not None:
+            text = self.__converter.convert(text)
+        text = text.lower()
+        return "".join(
+            " " if unicodedata.category(ch)[0] in ("P", "S") else ch
+            for ch in text
+        )
+
+    def char_ngrams(self, text: str, n: int = 2) -> List[str]:
+        """
+        Returns retrieval terms for `text`: overlapping CJK character n-grams
+        (a shorter CJK run is kept whole) plus Latin/digit words.
+        Unlike `tokenize`, n-grams never cross whitespace or punctuation.
+
+        e.g. "台積電 2024營收" -> ["台積", "積電", "2024", "營收"]
+        """
+        terms = []
+        for run in self.RUN_PATTERN.findall(self.normalize(text)):
+            if not self.CJK_RUN.match(run) or len(run) <= n:
+                terms.append(run)
+            else:
+                terms.extend(run[i:i + n] for i in range(len(run) - n + 1))
+        return terms
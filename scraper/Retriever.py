@@ -3,12 +3,27 @@ import os # 改從環境變數讀取(for Zeabur)
 API_KEY = os.getenv("TAVILY_API_KEY")
 
 from tavily import TavilyClient
+from tavily.errors import TimeoutError as TavilyTimeoutError
+import requests
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import re
 from typing import Any, Dict, List, Optional, Union
 
 from scraper.JsonFileHandler import JsonFileHandler
+from runtime.RetryPolicy import RetryPolicy
+from runtime.Hedger import Hedger
+from runtime.MetricsRegistry import MetricsRegistry, get_metrics
+from runtime.Cassette import Cassette
+
+# 429 在 Tavily 代表額度用盡 (UsageLimitExceededError)，不重試
+DEFAULT_RETRY = RetryPolicy(
+    max_attempts=3,
+    base_delay=1.0,
+    max_delay=8.0,
+    retry_statuses={408, 425, 500, 502, 503, 504},
+    retry_exceptions=(requests.exceptions.ConnectionError, requests.exceptions.Timeout, TavilyTimeoutError),
+)
 
 
 class Retriever():
@@ -24,13 +39,107 @@ class Retriever():
     TIME_DURATION_YEAR = "last_year"
     TIME_DURATION_MONTH = "last_month"
 
-    def __init__(self):
-        self.__client = TavilyClient(api_key=API_KEY)
+    def __init__(
+            self,
+            *,
+            retry: Optional[RetryPolicy] = DEFAULT_RETRY,
+            hedger: Optional[Hedger] = None,
+            client: Optional[Any] = None,
+            metrics: Optional[MetricsRegistry] = None,
+            cassette: Optional[Cassette] = None,
+    ):
+        """
+        Args:
+            retry (RetryPolicy): Backoff policy for search calls. None = single attempt.
+            hedger (Hedger): If given, a search slower than the recent p95 is
+                duplicated and the first answer wins (a hedged search costs
+                its credits twice, keep `max_hedge_ratio` low).
+            client: Object with TavilyClient's `search(**kwargs)`, e.g. a
+                simulated backend for benchmarks. Defaults to a TavilyClient.
+            metrics (MetricsRegistry): Where searches, credits and Tavily's
+                reported response times are recorded. Defaults to `get_metrics()`.
+            cassette (Cassette): If given, `retrieve` results are recorded to it,
+                or (replay mode) served from it without calling Tavily.
+        """
+        self.__client = client if client is not None else TavilyClient(api_key=API_KEY)
+        self.retry = retry
+        self.hedger = hedger
+        self.metrics = metrics or get_metrics()
+        self.cassette = cassette
+        self.__requests = self.metrics.counter(
+            "factcheck_tavily_requests_total", "Tavily search attempts (each retry and hedged duplicate counted) by outcome", labels=("outcome",))
+        self.__credits = self.metrics.counter(
+            "factcheck_tavily_credits_total", "Tavily API credits consumed (hedged duplicates included)")
+        self.__response_time = self.metrics.histogram(
+            "factcheck_tavily_response_seconds", "Search time reported by Tavily (response_time)")
 
     def retrieve(self, query: dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Executes a search query and returns parsed results with a list of sources.
         """
+        if self.cassette is not None:
+            # 以 query dict 而非 search kwargs 當 key：後者含由今天日期算出的 start_date
+            return self.cassette.call("search", Cassette.make_key(query), self.__retrieve, query, request=query)
+        return self.__retrieve(query)
+
+    def __retrieve(self, query: dict[str, Any]) -> Optional[Dict[str, Any]]:
+        search_kwargs = self._build_search_kwargs(query)
+        if search_kwargs is None:
+            return None
+
+        try:
+            if self.retry is not None:
+                response = self.retry.call(self.__search_once, search_kwargs)
+            else:
+                response = self.__search_once(search_kwargs)
+        except Exception as e:
+            print(f"❌ Tavily Search Error: {e}")
+            return None
+
+        output = self._parse_response(query, response)
+        self._record_usage(output)
+        return output
+
+    def _record_attempt(self, response: Optional[Dict[str, Any]]) -> None:
+        """Counts one search attempt (None = failed) and the credits its response reports."""
+        if response is None:
+            self.__requests.inc(outcome="error")
+            return
+        self.__requests.inc(outcome="ok")
+        usage = response.get("usage") if isinstance(response, dict) else None
+        try:
+            credits = float(usage.get("credits", 0)) if isinstance(usage, dict) else 0.0
+        except (TypeError, ValueError):
+            return
+        if credits > 0:
+            self.__credits.inc(credits)
+
+    def _record_usage(self, output: Dict[str, Any]) -> None:
+        """Records Tavily's reported response time for a successful search."""
+        try:
+            response_time = float(output.get("response_time") or 0.0)
+        except (TypeError, ValueError):
+            return
+        self.__response_time.observe(response_time)
+
+    def __search_once(self, search_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """One (possibly hedged) Tavily search; raises on failure."""
+        if self.hedger is not None:
+            return self.hedger.call(self.__search_attempt, search_kwargs)
+        return self.__search_attempt(search_kwargs)
+
+    def __search_attempt(self, search_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # 每次實際送出的搜尋 (含重試與對沖的複本) 都計數，複本消耗的額度也算進去
+        try:
+            response = self.__client.search(**search_kwargs)
+        except Exception:
+            self._record_attempt(None)
+            raise
+        self._record_attempt(response)
+        return response
+
+    def _build_search_kwargs(self, query: dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Translates a query dict into TavilyClient.search keyword arguments."""
         if "query" not in query or not query["query"]:
             return None
         
@@ -39,24 +148,22 @@ class Retriever():
         if "search_duration" in query:
             start_date, end_date = self.__parse_time_duration(query["search_duration"])
 
-        try:
-            response = self.__client.search(
-                query=query["query"],
-                include_answer=True, 
-                search_depth=query.get("level", self.BASIC), 
-                include_raw_content=True, 
-                chunks_per_source=query.get("chunk_count", 3), 
-                max_results=query.get("result_count", 3), 
-                country=self.__parse_country(query.get("search_region", None)), 
-                start_date=start_date, 
-                end_date=end_date, 
-                topic=self.__topic_check(query.get("topic", self.DEFAULT_TOPIC)), 
-                include_usage=True
-            )
-        except Exception as e:
-            print(f"❌ Tavily Search Error: {e}")
-            return None
-        
+        return dict(
+            query=query["query"],
+            include_answer=True, 
+            search_depth=query.get("level", self.BASIC), 
+            include_raw_content=True, 
+            chunks_per_source=query.get("chunk_count", 3), 
+            max_results=query.get("result_count", 3), 
+            country=self.__parse_country(query.get("search_region", None)), 
+            start_date=start_date, 
+            end_date=end_date, 
+            topic=self.__topic_check(query.get("topic", self.DEFAULT_TOPIC)), 
+            include_usage=True
+        )
+
+    def _parse_response(self, query: dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+        """Converts a raw Tavily response into the evidence output format."""
         # with JsonFileHandler(".", "raw_evidence.json", "w") as ha:
         #     ha.write(response)
 
@@ -70,7 +177,7 @@ class Retriever():
         raw_results = response.get("results", [])
         cleaned_results = []
 
-        evidence = ""
+        evidence_parts = []
         if isinstance(raw_results, list):
             for i, res in enumerate(raw_results, start=1):
                 raw_text = res.get("raw_content", "")
@@ -87,12 +194,13 @@ class Retriever():
                 cleaned_results.append(item)
 
                 # connect chunks
-                chunk_content = ""
-                for j, chunk in enumerate(item["chunks"], start=1):
-                    if isinstance(chunk, str) and len(chunk) > 0:
-                        chunk_content += f"\n<<chunk {j}>>:\n{chunk}\n"
+                chunk_content = "".join(
+                    f"\n<<chunk {j}>>:\n{chunk}\n"
+                    for j, chunk in enumerate(item["chunks"], start=1)
+                    if isinstance(chunk, str) and len(chunk) > 0
+                )
                 if len(chunk_content) > 0:
-                    evidence += f"\n\n<result {i}>:\n{chunk_content}\n"
+                    evidence_parts.append(f"\n\n<result {i}>:\n{chunk_content}\n")
         output["results"] = cleaned_results
         
         # evidence
@@ -100,7 +208,7 @@ class Retriever():
             output["evidence"] = f"<summary>:\n{output['summary']}\n"
             # output["temp_evidence"] = evidence.strip()
         else:
-            output["evidence"] = evidence.strip()
+            output["evidence"] = "".join(evidence_parts).strip()
 
         return output
     
@@ -1,7 +1,21 @@
 from .EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from .AsyncEvidenceRetrieveHandler import AsyncEvidenceRetrieveHandler
 from .EvidenceFileHandler import EvidenceFileHandler
+from .EvidenceDatabaseHandler import EvidenceDatabaseHandler
+from .CompressedEvidenceHandler import CompressedEvidenceHandler
+from .QueryNormalizer import QueryNormalizer
+from .EvidenceCompactor import EvidenceCompactor
+from .LocalEvidenceIndex import LocalEvidenceIndex
+from .EvidenceCacheEvictor import EvidenceCacheEvictor
 
 __all__ = [
     "EvidenceRetrieveHandler",
-    "EvidenceFileHandler"
+    "AsyncEvidenceRetrieveHandler",
+    "EvidenceFileHandler",
+    "EvidenceDatabaseHandler",
+    "CompressedEvidenceHandler",
+    "QueryNormalizer",
+    "EvidenceCompactor",
+    "LocalEvidenceIndex",
+    "EvidenceCacheEvictor",
 ]
@@ -0,0 +1,14 @@
+import pytest
+
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+from scraper.CompressedEvidenceHandler import CompressedEvidenceHandler
+
+@pytest.fixture
+def evidence_storage(tmp_path):
+    """EvidenceFileHandler writing into a temporary directory (with its own index cache)."""
+    return EvidenceFileHandler.in_directory(tmp_path / "evidence")
+
+@pytest.fixture
+def compact_storage(tmp_path):
+    """CompressedEvidenceHandler writing into a temporary directory (with its own index cache)."""
+    return CompressedEvidenceHandler.in_directory(tmp_path / "evidence_compact")
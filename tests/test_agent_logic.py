@@ -0,0 +1,22 @@
+from agent_logic import _extract_evidence
+
+LOCAL_HIT = {
+    "summary": None,
+    "results": [
+        {"title": "財報", "link": "https://a", "chunks": ["台積電營收成長百分之十。"], "article": "全文"},
+        {"title": "快訊", "link": "https://b", "chunks": [], "article": "法人看好後市。"},
+    ],
+}
+
+def test_local_corpus_hit_without_summary_uses_the_results():
+    text, url = _extract_evidence(LOCAL_HIT)
+    assert text == "<result 1>:\n台積電營收成長百分之十。\n\n<result 2>:\n法人看好後市。"
+    assert url == "https://a"
+
+def test_summary_is_preferred():
+    text, _ = _extract_evidence(dict(LOCAL_HIT, summary="摘要"))
+    assert text == "摘要"
+
+def test_empty_evidence():
+    assert _extract_evidence({"summary": None, "results": []}) == ("搜尋結果無摘要", "#")
+    assert _extract_evidence(None) == ("搜尋失敗 (API 無回傳)", "#")
@@ -0,0 +1,47 @@
+import asyncio
+
+from benchmark.FakeOllamaServer import FakeOllamaServer
+from benchmark.FakeTavilyClient import FakeTavilyClient
+from fact_checking.AsyncOllamaClient import AsyncOllamaClient
+from runtime.MetricsRegistry import MetricsRegistry
+from scraper.AsyncEvidenceRetrieveHandler import AsyncEvidenceRetrieveHandler
+from scraper.AsyncRetriever import AsyncRetriever
+
+class AsyncFakeTavily:
+    def __init__(self):
+        self.fake = FakeTavilyClient()
+
+    async def search(self, query, **kwargs):
+        return self.fake.search(query, **kwargs)
+
+def test_ollama_client_survives_several_event_loops():
+    with FakeOllamaServer() as server:
+        client = AsyncOllamaClient(api_url=server.url, api_key="test")
+        messages = [{"role": "user", "content": "hello"}]
+        for _ in range(3):
+            assert asyncio.run(client.chat(messages)) is not None
+
+def test_ollama_client_context_manager():
+    async def run(client):
+        async with client:
+            return await client.chat([{"role": "user", "content": "hello"}])
+
+    with FakeOllamaServer() as server:
+        client = AsyncOllamaClient(api_url=server.url, api_key="test")
+        assert asyncio.run(run(client)) is not None
+        assert asyncio.run(run(client)) is not None
+
+def test_retriever_inherits_retry_and_metrics():
+    metrics = MetricsRegistry()
+    retriever = AsyncRetriever(client=AsyncFakeTavily(), metrics=metrics)
+    assert retriever.retry is not None and retriever.cassette is None
+    assert asyncio.run(retriever.retrieve({"query": "台積電 營收"}))["results"]
+    assert metrics.counter("factcheck_tavily_requests_total", labels=("outcome",)).value(outcome="ok") == 1
+
+def test_evidence_handler_survives_several_event_loops(evidence_storage):
+    handler = AsyncEvidenceRetrieveHandler(
+        storage=evidence_storage,
+        retriever=AsyncRetriever(client=AsyncFakeTavily(), metrics=MetricsRegistry()),
+    )
+    for query in ("台積電 營收", "聯電 營收", "台積電 營收"):
+        assert asyncio.run(handler.query({"query": query}, use_local_TF=True)) is not None
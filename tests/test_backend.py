@@ -0,0 +1,57 @@
+import backend
+from fact_checking.ResponseCache import CACHE_DIR
+from benchmark.FakeTavilyClient import FakeTavilyClient
+from runtime.Cassette import Cassette
+from runtime.MetricsRegistry import MetricsRegistry
+from scraper.CompressedEvidenceHandler import CompressedEvidenceHandler
+from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+from scraper.Retriever import Retriever
+
+QUERY = {"query": "台積電2024年營收成長", "search_region": "Taiwan", "search_duration": "last_year"}
+
+def fetch(handler):
+    result = handler.query(dict(QUERY), use_local_TF=True, level=EvidenceRetrieveHandler.ADVANCED)
+    if hasattr(result, "result"):
+        result = result.result()
+    return result
+
+def record_cassette(path, storage):
+    metrics = MetricsRegistry()
+    with Cassette(path, Cassette.RECORD) as cassette:
+        handler = EvidenceRetrieveHandler(
+            storage=storage,
+            retriever=Retriever(client=FakeTavilyClient(), metrics=metrics, cassette=cassette),
+            metrics=metrics,
+        )
+        try:
+            assert fetch(handler) is not None
+        finally:
+            handler.shutdown()
+
+def test_replay_does_not_touch_the_real_stores(tmp_path, monkeypatch, compact_storage):
+    cassette_path = tmp_path / "case.jsonl.gz"
+    record_cassette(cassette_path, compact_storage)
+
+    real_dir = tmp_path / "real_evidence"
+    real_index = tmp_path / "real_index.sqlite3"
+    monkeypatch.setattr(CompressedEvidenceHandler, "EVIDENCE_DIR", real_dir)
+    monkeypatch.setattr(LocalEvidenceIndex, "DB_PATH", real_index)
+    monkeypatch.setenv("CASSETTE_MODE", "replay")
+    monkeypatch.setenv("CASSETTE_PATH", str(cassette_path))
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+
+    checker, scraper, scheduler, evictor = backend.build_backend()
+    try:
+        assert evictor is None
+        assert checker.client.cache.cache_dir != CACHE_DIR
+        result = fetch(scraper)
+        assert result is not None
+        if hasattr(result, "close"):
+            result.close()
+        assert scraper.cache_stats()["api_calls"] == 1
+    finally:
+        scraper.shutdown()
+
+    assert not real_dir.exists()
+    assert not real_index.exists()
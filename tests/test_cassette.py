@@ -0,0 +1,37 @@
+import datetime
+
+from benchmark.FakeOllamaServer import FakeOllamaServer
+from fact_checking.FactChecker import FactChecker
+from fact_checking.OllamaClient import OllamaClient
+from runtime.Cassette import Cassette
+
+CLAIM = "台積電2024年營收成長10%"
+ARTICLE = "台積電今日公布財報，2024年營收成長10%。"
+
+class LaterDay(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2031, 1, 2, 9, 30)
+
+def test_replay_on_another_day_matches_the_recorded_prompts(tmp_path, monkeypatch):
+    path = tmp_path / "case.jsonl.gz"
+    with FakeOllamaServer() as server, Cassette(path, Cassette.RECORD) as cassette:
+        checker = FactChecker(OllamaClient(api_url=server.url, api_key="test", cassette=cassette))
+        recorded = checker.generate_search_questions(CLAIM, ARTICLE)
+    assert recorded["questions"]
+
+    monkeypatch.setattr(datetime, "datetime", LaterDay)
+    cassette = Cassette(path, Cassette.REPLAY, strict=True)
+    checker = FactChecker(OllamaClient(api_url="http://127.0.0.1:9", api_key="test", cassette=cassette))
+    assert checker.generate_search_questions(CLAIM, ARTICLE) == recorded
+    assert cassette.stats()["misses"] == 0
+
+def test_clock_is_pinned_while_recording(tmp_path):
+    with Cassette(tmp_path / "case.jsonl.gz", Cassette.RECORD) as cassette:
+        first = cassette.now()
+        assert cassette.now() == first
+
+    assert Cassette(tmp_path / "case.jsonl.gz", Cassette.REPLAY).now() == first
+
+def test_cassette_without_clock_uses_real_time(tmp_path):
+    assert abs((Cassette(tmp_path / "missing.jsonl.gz").now() - datetime.datetime.now()).total_seconds()) < 60
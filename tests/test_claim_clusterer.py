@@ -0,0 +1,41 @@
+import pytest
+
+from fact_checking.ClaimClusterer import ClaimClusterer
+
+ADVERSARIAL_PAIRS = [
+    ("美國對中國加徵百分之十的關稅", "中國對美國加徵百分之十的關稅"),
+    ("台積電2024年營收成長10%", "聯電2024年營收成長10%"),
+    ("政府今年的國防預算較去年增加", "政府今年的國防預算較去年減少"),
+    ("台電宣布下個月起電價調漲", "台電宣布下個月起電價調降"),
+    ("台積電2024年營收成長10%", "台積電2024年營收成長20%"),
+    ("行政院已經宣布延長補助方案", "行政院並未宣布延長補助方案"),
+]
+
+@pytest.mark.parametrize("a,b", ADVERSARIAL_PAIRS)
+def test_different_claims_are_not_merged(a, b):
+    # 門檻調到 0 也不能合併：差異由主詞、數字、否定與方向詞的檢查擋下
+    for clusterer in (ClaimClusterer(), ClaimClusterer(threshold=0.0)):
+        assert clusterer.cluster([a, b]) == [[0], [1]]
+
+def test_formatting_differences_are_merged():
+    claims = ["台積電2024年營收成長10%", "台積電 ２０２４ 年營收成長 10％！"]
+    assert ClaimClusterer().cluster(claims) == [[0, 1]]
+
+def test_restatement_is_merged_and_the_longest_wording_represents_it():
+    claims = [
+        "台積電2024年第三季營收成長10%",
+        "今天天氣晴朗",
+        "台積電2024年第三季營收成長10%，創下新高",
+    ]
+    clusterer = ClaimClusterer(threshold=0.6)
+    assert clusterer.cluster(claims) == [[2, 0], [1]]
+
+def test_default_threshold_keeps_loose_restatements_apart():
+    claims = ["台積電2024年第三季營收成長10%", "台積電2024年第三季營收成長10%，創下新高"]
+    assert ClaimClusterer().cluster(claims) == [[0], [1]]
+
+def test_every_index_appears_once():
+    claims = ["甲公司營收增加", "甲公司營收增加", "乙公司營收增加", "", ""]
+    clusters = ClaimClusterer().cluster(claims)
+    assert sorted(i for cluster in clusters for i in cluster) == list(range(len(claims)))
+    assert [0, 1] in clusters
@@ -0,0 +1,46 @@
+from scraper.EvidenceCacheEvictor import EvidenceCacheEvictor
+from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+
+def store(storage, index, query, article):
+    data = {"query": query, "results": [{"title": query, "link": f"https://example.com/{query}", "article": article}]}
+    handler = storage.store(data, key=query)
+    handler.close()
+    index.add_evidence(data, source=handler.get_filename())
+    return handler.get_filename()
+
+def test_eviction_purges_local_index(tmp_path, compact_storage):
+    index = LocalEvidenceIndex(tmp_path / "index.sqlite3", storage=compact_storage)
+    old = store(compact_storage, index, "舊新聞", "台積電營收成長。" * 50)
+    store(compact_storage, index, "新新聞", "聯電營收衰退。" * 50)
+
+    evictor = EvidenceCacheEvictor(compact_storage, max_entries=1, low_watermark=1.0,
+                                   stats_path=tmp_path / "access.json", local_index=index)
+    evictor.record_access("新新聞")
+    assert evictor.run_once() == 1
+
+    assert old not in compact_storage.list_entries()
+    assert [r["title"] for r in index.search("台積電營收")] == ["新新聞"]
+    assert index.stats()["sources"] == 1
+
+def test_index_counts_toward_byte_budget(tmp_path, compact_storage):
+    index = LocalEvidenceIndex(tmp_path / "index.sqlite3", storage=compact_storage)
+    store(compact_storage, index, "新聞", "台積電營收成長。")
+    evidence_bytes = sum(e["bytes"] for e in compact_storage.list_entries().values())
+
+    # 只看證據不會超過上限，加上索引才會
+    index_bytes = index.size_bytes()
+    evictor = EvidenceCacheEvictor(compact_storage, max_bytes=evidence_bytes + index_bytes // 2,
+                                   stats_path=tmp_path / "access.json", local_index=index)
+    assert evictor.run_once() == 1
+    assert index.stats()["documents"] == 0
+    assert evictor.stats()["bytes"] == index.size_bytes() <= index_bytes
+
+def test_store_does_not_mutate_the_shared_index(evidence_storage):
+    evidence_storage.store({"query": "第一筆", "results": []}).close()
+    shared = evidence_storage._load_index()
+    snapshot = dict(shared)
+
+    evidence_storage.store({"query": "第二筆", "results": []}).close()
+    # list_entries 可能正在走訪舊的快取，store 必須換一份新的 dict 而不是原地修改
+    assert shared == snapshot
+    assert len(evidence_storage.list_entries()) == 2
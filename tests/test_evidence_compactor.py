@@ -0,0 +1,43 @@
+from scraper.EvidenceCompactor import EvidenceCompactor
+
+def test_split_keeps_short_dense_chinese_sentences():
+    compactor = EvidenceCompactor()
+    sentences = compactor.split_sentences("第一句。營收創新高。好。\n— …")
+    assert sentences == ["第一句。", "營收創新高。"]
+
+def test_split_counts_words_not_punctuation():
+    compactor = EvidenceCompactor(min_sentence_chars=3)
+    assert compactor.split_sentences("「！」？台積電。") == ["台積電。"]
+    assert compactor.split_sentences("Up 5%. Ok.") == ["Up 5%."]
+
+def test_split_truncates_long_sentences():
+    compactor = EvidenceCompactor(max_sentence_chars=10)
+    assert compactor.split_sentences("甲" * 50 + "。") == ["甲" * 10]
+
+def test_compact_prefers_short_relevant_sentence():
+    evidence = {
+        "summary": None,
+        "results": [{
+            "title": "財報",
+            "link": "https://example.com/a",
+            "chunks": ["今天天氣晴朗，適合出遊，交通順暢。營收創新高。其他新聞與本案無關。"],
+        }],
+    }
+    block = EvidenceCompactor(token_budget=10).compact("台積電營收創新高", evidence)
+    assert block == "<source 1> 財報 (https://example.com/a):\n- 營收創新高。"
+
+def test_compact_groups_by_source_in_original_order():
+    evidence = {
+        "summary": "摘要",
+        "results": [
+            {"title": "A", "link": "a", "chunks": ["營收成長百分之十。其他。"]},
+            {"title": "B", "link": "b", "chunks": ["台積電公布營收。台積電營收成長。"]},
+        ],
+    }
+    block = EvidenceCompactor().compact("台積電營收成長", evidence)
+    assert block.startswith("<summary>:\n摘要\n\n<source 1> A (a):\n- 營收成長百分之十。")
+    assert block.endswith("<source 2> B (b):\n- 台積電公布營收。\n- 台積電營收成長。")
+
+def test_compact_without_evidence():
+    assert EvidenceCompactor().compact("任何主張", None) == ""
+    assert EvidenceCompactor().compact("任何主張", {"results": []}) == ""
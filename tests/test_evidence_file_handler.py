@@ -0,0 +1,56 @@
+from scraper.CompressedEvidenceHandler import CompressedEvidenceHandler
+from scraper.EvidenceFileHandler import EvidenceFileHandler
+
+def store(storage, query):
+    storage.store({"query": query, "results": []}).close()
+
+def reopen(storage):
+    """Another process's view of the same directory (no shared in-memory index)."""
+    return EvidenceFileHandler.in_directory(storage.EVIDENCE_DIR)
+
+def test_store_appends_to_the_log_instead_of_rewriting_the_index(evidence_storage):
+    for i in range(5):
+        store(evidence_storage, f"查詢{i}")
+
+    assert not evidence_storage._get_index_path().exists()
+    log = evidence_storage._get_index_log_path().read_text(encoding="utf-8").splitlines()
+    assert len(log) == 5
+    assert set(reopen(evidence_storage)._load_index()) == {f"查詢{i}" for i in range(5)}
+
+def test_restoring_the_same_mapping_writes_nothing(evidence_storage):
+    store(evidence_storage, "查詢")
+    size = evidence_storage._get_index_log_path().stat().st_size
+    store(evidence_storage, "查詢")
+    assert evidence_storage._get_index_log_path().stat().st_size == size
+
+def test_log_is_compacted_into_the_index(evidence_storage):
+    evidence_storage.INDEX_COMPACT_LINES = 3
+    for i in range(4):
+        store(evidence_storage, f"查詢{i}")
+
+    assert evidence_storage._get_index_path().exists()
+    assert not evidence_storage._get_index_log_path().exists()
+    store(evidence_storage, "查詢4")
+    assert len(evidence_storage._get_index_log_path().read_text(encoding="utf-8").splitlines()) == 1
+    assert len(reopen(evidence_storage)._load_index()) == 5
+
+def test_torn_last_log_line_is_ignored(evidence_storage):
+    store(evidence_storage, "查詢")
+    with open(evidence_storage._get_index_log_path(), "a", encoding="utf-8") as f:
+        f.write('["半行')
+    assert list(reopen(evidence_storage)._load_index()) == ["查詢"]
+
+def test_evict_and_rekey_rewrite_the_index(evidence_storage):
+    store(evidence_storage, "甲")
+    store(evidence_storage, "乙")
+    assert evidence_storage.rekey("甲", "丙")
+    assert not evidence_storage._get_index_log_path().exists()
+    assert set(reopen(evidence_storage)._load_index()) == {"乙", "丙"}
+
+def test_migration_reads_the_log(evidence_storage, compact_storage):
+    store(evidence_storage, "台積電營收")
+    assert not evidence_storage._get_index_path().exists()
+
+    assert compact_storage.migrate_from_json(evidence_storage.EVIDENCE_DIR) == 1
+    assert compact_storage.find_query("台積電營收") is not None
+    assert not evidence_storage.EVIDENCE_DIR.exists()
@@ -0,0 +1,190 @@
+from benchmark.FakeTavilyClient import FakeTavilyClient
+from runtime.MetricsRegistry import MetricsRegistry
+from scraper.EvidenceRetrieveHandler import EvidenceRetrieveHandler
+from scraper.QueryNormalizer import QueryNormalizer
+from scraper.Retriever import Retriever
+
+ARGS = {"search_region": "Taiwan", "search_duration": "last_year", "level": "advanced", "result_count": 3, "chunk_count": 3}
+
+def make_handler(storage):
+    metrics = MetricsRegistry()
+    return EvidenceRetrieveHandler(
+        storage=storage,
+        retriever=Retriever(client=FakeTavilyClient(), metrics=metrics),
+        metrics=metrics,
+    )
+
+def test_make_cache_key_includes_params():
+    key = EvidenceRetrieveHandler.make_cache_key("台 積 電", ARGS)
+    assert key == "台 積 電|region=Taiwan|duration=last_year|level=advanced|results=3|chunks=3"
+
+def test_make_cache_key_differs_per_param():
+    base = EvidenceRetrieveHandler.make_cache_key("q", ARGS)
+    for name, value in [("search_region", "Japan"), ("search_duration", "last_month"), ("level", "basic"),
+                        ("result_count", 5), ("chunk_count", 1)]:
+        assert EvidenceRetrieveHandler.make_cache_key("q", dict(ARGS, **{name: value})) != base
+
+def test_make_cache_key_defaults():
+    key = EvidenceRetrieveHandler.make_cache_key("q", {})
+    assert key == "q|region=Global|duration=all_time|level=basic|results=3|chunks=3"
+    ranged = EvidenceRetrieveHandler.make_cache_key("q", {"search_duration": ["2024-01-01", "2024-06-30"]})
+    assert "duration=2024-01-01~2024-06-30" in ranged
+
+def store(storage, raw_query):
+    canonical = QueryNormalizer().canonicalize(raw_query)
+    key = EvidenceRetrieveHandler.make_cache_key(canonical, ARGS)
+    storage.store({"query": raw_query, "results": []}, params=ARGS, key=key).close()
+
+def lookup(handler, raw_query):
+    result = handler.query(
+        {"query": raw_query, "search_region": "Taiwan", "search_duration": "last_year"},
+        use_local_TF=True, level=EvidenceRetrieveHandler.ADVANCED,
+    )
+    if hasattr(result, "close"):
+        result.close()
+    return result
+
+def test_reordered_query_does_not_hit(evidence_storage):
+    store(evidence_storage, "美國對中國加徵關稅")
+    handler = make_handler(evidence_storage)
+    try:
+        lookup(handler, "中國對美國加徵關稅").result()
+        stats = handler.cache_stats()
+        assert stats["hits"] == 0 and stats["misses"] == 1
+    finally:
+        handler.shutdown()
+
+def test_persisted_entry_is_not_a_normalized_hit(evidence_storage):
+    store(evidence_storage, "台積電 2024 營收")
+    handler = make_handler(evidence_storage)
+    try:
+        lookup(handler, "台積電 2024 營收")
+        stats = handler.cache_stats()
+        assert stats["hits"] == 1 and stats["normalized_hits"] == 0
+    finally:
+        handler.shutdown()
+
+def test_normalized_hit_counted_once(evidence_storage):
+    store(evidence_storage, "台積電 2024 營收")
+    handler = make_handler(evidence_storage)
+    try:
+        lookup(handler, "台積電２０２４營收！")
+        lookup(handler, "台積電２０２４營收！")
+        stats = handler.cache_stats()
+        assert stats["hits"] == 2 and stats["normalized_hits"] == 1
+    finally:
+        handler.shutdown()
+
+def test_legacy_raw_query_entry_is_rekeyed(evidence_storage):
+    # 舊版 index 以原始 query 為 key
+    evidence_storage.store({"query": "台積電 2024 營收", "results": []}, key="台積電 2024 營收").close()
+    handler = make_handler(evidence_storage)
+    try:
+        assert lookup(handler, "台積電 2024 營收") is not None
+        assert handler.cache_stats()["hits"] == 1
+        canonical = QueryNormalizer().canonicalize("台積電 2024 營收")
+        keys = list(evidence_storage._load_index())
+        assert keys == [EvidenceRetrieveHandler.make_cache_key(canonical, ARGS)]
+    finally:
+        handler.shutdown()
+
+def test_legacy_entry_rekeyed_in_database(tmp_path):
+    from scraper.EvidenceDatabaseHandler import EvidenceDatabaseHandler
+    storage = type("TmpDatabaseHandler", (EvidenceDatabaseHandler,), {"DB_PATH": tmp_path / "evidence.sqlite3"})
+    storage.store({"query": "舊查詢", "results": []}, key="舊查詢")
+
+    handler = make_handler(storage)
+    try:
+        assert lookup(handler, "舊查詢") is not None
+        assert storage.find_query("舊查詢") is None
+        key = EvidenceRetrieveHandler.make_cache_key(QueryNormalizer().canonicalize("舊查詢"), ARGS)
+        assert storage.find_query(key) is not None
+    finally:
+        handler.shutdown()
+
+def test_compressed_migration_runs_once(evidence_storage, compact_storage):
+    compact = compact_storage
+    evidence_storage.store({"query": "舊查詢", "results": [{"article": "內文"}]}, key="舊查詢").close()
+
+    assert compact.migrate_from_json(evidence_storage.EVIDENCE_DIR, remove_source=False) == 1
+    compact.rekey("舊查詢", "新 key")
+    assert compact.migrate_from_json(evidence_storage.EVIDENCE_DIR) == 0
+    assert list(compact._load_index()) == ["新 key"]
+
+def test_compressed_migration_removes_converted_json(evidence_storage, compact_storage):
+    evidence_storage.store({"query": "甲", "results": [{"article": "內文"}]}, key="甲").close()
+    legacy_dir = evidence_storage.EVIDENCE_DIR
+
+    assert compact_storage.migrate_from_json(legacy_dir) == 1
+    assert not legacy_dir.exists()
+    assert compact_storage.find_query("甲").read()["results"][0]["article"] == "內文"
+
+def test_compressed_migration_keeps_unreadable_json(evidence_storage, compact_storage):
+    evidence_storage.store({"query": "甲", "results": []}, key="甲").close()
+    broken = evidence_storage.store({"query": "乙", "results": []}, key="乙")
+    broken.close()
+    (evidence_storage.EVIDENCE_DIR / broken.get_filename()).write_text("{", encoding="utf-8")
+
+    assert compact_storage.migrate_from_json(evidence_storage.EVIDENCE_DIR) == 1
+    remaining = sorted(p.name for p in evidence_storage.EVIDENCE_DIR.iterdir())
+    assert remaining == sorted([broken.get_filename(), "index.json"])
+    evidence_storage.invalidate_index()
+    assert list(evidence_storage._load_index()) == ["乙"]
+
+def store_scored(storage, raw_query, score):
+    canonical = QueryNormalizer().canonicalize(raw_query)
+    key = EvidenceRetrieveHandler.make_cache_key(canonical, ARGS)
+    result = {"title": raw_query, "link": f"https://example.com/{raw_query}", "score": score}
+    storage.store({"query": raw_query, "results": [result], "summary": raw_query}, params=ARGS, key=key).close()
+
+def query_many(handler, raw_queries):
+    return handler.query_many(
+        [{"query": q, "search_region": "Taiwan", "search_duration": "last_year"} for q in raw_queries],
+        use_local_TF=True, level=EvidenceRetrieveHandler.ADVANCED,
+    )
+
+def test_query_many_low_scores_do_not_add_up(evidence_storage):
+    # 舊版以分數加總判斷：0.6 * 3 = 1.8 會提早停止
+    for q in ("甲", "乙", "丙"):
+        store_scored(evidence_storage, q, 0.6)
+    handler = make_handler(evidence_storage)
+    try:
+        merged = query_many(handler, ["甲", "乙", "丙"])
+        assert len(merged["results"]) == 3
+    finally:
+        handler.shutdown()
+
+def test_query_many_stops_on_one_relevant_result(evidence_storage):
+    for q in ("甲", "乙", "丙"):
+        store_scored(evidence_storage, q, 0.9)
+    handler = make_handler(evidence_storage)
+    try:
+        merged = query_many(handler, ["甲", "乙", "丙"])
+        assert len(merged["results"]) == 1
+    finally:
+        handler.shutdown()
+
+def test_database_store_overwrites_the_record_of_its_key(tmp_path):
+    import sqlite3
+    from scraper.EvidenceDatabaseHandler import EvidenceDatabaseHandler
+    storage = type("TmpDatabaseHandler", (EvidenceDatabaseHandler,), {"DB_PATH": tmp_path / "evidence.sqlite3"})
+    first = storage.store({"query": "台積電營收", "results": []}, key="k").get_filename()
+    second = storage.store({"query": "台積電營收", "results": [{"title": "新"}]}, key="k").get_filename()
+
+    assert first == second
+    assert storage.find_query("k").read()["results"] == [{"title": "新"}]
+    count = sqlite3.connect(storage.DB_PATH).execute("SELECT COUNT(*) FROM evidence").fetchone()[0]
+    assert count == 1
+
+def test_database_store_keeps_a_record_shared_with_another_key(tmp_path):
+    import sqlite3
+    from scraper.EvidenceDatabaseHandler import EvidenceDatabaseHandler
+    storage = type("TmpDatabaseHandler", (EvidenceDatabaseHandler,), {"DB_PATH": tmp_path / "evidence.sqlite3"})
+    shared = storage.store({"query": "舊", "results": []}, key="a").get_filename()
+    # 匯入舊版 index.json 時，多個 query 可能指向同一筆紀錄
+    with sqlite3.connect(storage.DB_PATH) as conn:
+        conn.execute("INSERT INTO query_index (query, evidence_id) VALUES ('b', ?)", (int(shared.split(":")[1]),))
+
+    assert storage.store({"query": "新", "results": []}, key="b").get_filename() != shared
+    assert storage.find_query("a").read()["query"] == "舊"
+    assert storage.find_query("b").read()["query"] == "新"
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from runtime.ExecutorRegistry import BoundedExecutor, QueueFullError
+
+def blocker():
+    """An executor with its only slot taken, and the event that frees it."""
+    release = threading.Event()
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    executor.submit(release.wait)
+    return executor, release
+
+def test_wait_without_timeout_waits_for_a_slot():
+    executor, release = blocker()
+    executor.wait_timeout = None
+    threading.Timer(0.1, release.set).start()
+    try:
+        # wait_timeout=None 要無限等待，不能立刻以 QueueFullError 放棄
+        assert executor.submit(lambda: "ok").result(timeout=5) == "ok"
+    finally:
+        executor.shutdown()
+
+def test_wait_timeout_rejects_after_waiting():
+    executor, release = blocker()
+    executor.wait_timeout = 0.1
+    try:
+        start = time.monotonic()
+        with pytest.raises(QueueFullError):
+            executor.submit(lambda: None)
+        assert time.monotonic() - start >= 0.1
+        assert executor.stats()["rejected"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+def test_submit_within_overrides_policy():
+    executor, release = blocker()
+    executor.wait_timeout = None
+    try:
+        with pytest.raises(QueueFullError):
+            executor.submit_within(0, lambda: None)
+    finally:
+        release.set()
+        executor.shutdown()
+
+def test_map_cancels_queued_tasks_when_a_submit_is_rejected():
+    release = threading.Event()
+    ran = []
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, policy=BoundedExecutor.REJECT)
+
+    def task(i):
+        release.wait()
+        ran.append(i)
+
+    try:
+        with pytest.raises(QueueFullError):
+            executor.map(task, range(3))
+        release.set()
+        executor.shutdown(wait=True)
+        # 第 3 個被拒絕；排隊中的都被取消，只有已開始執行的第 1 個會跑完
+        assert 1 not in ran and 2 not in ran
+    finally:
+        release.set()
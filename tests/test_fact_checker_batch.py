@@ -0,0 +1,91 @@
+import pytest
+
+from fact_checking.FactChecker import FactChecker
+
+class ScriptedClient:
+    """Returns the queued replies in order and records every request."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.options = []
+
+    def chat(self, messages, json_mode=False, **kwargs):
+        self.calls.append(messages)
+        self.options.append(kwargs)
+        return self.replies.pop(0) if self.replies else None
+
+def verdict(item_id, value="Correct"):
+    return {"id": item_id, "verdict": value, "confidence_score": 8, "reason": f"r{item_id}"}
+
+@pytest.fixture
+def checker():
+    return FactChecker(ScriptedClient())
+
+def test_match_one_based_ids_out_of_order(checker):
+    reply = {"results": [verdict(2), verdict(1)]}
+    matched = checker._match_batch_items(reply, "results", 2)
+    assert matched[0]["reason"] == "r1"
+    assert matched[1]["reason"] == "r2"
+
+def test_match_zero_based_ids_are_detected(checker):
+    reply = {"results": [verdict(0), verdict(2), verdict(1)]}
+    matched = checker._match_batch_items(reply, "results", 3)
+    assert [matched[i]["reason"] for i in range(3)] == ["r0", "r1", "r2"]
+
+def test_match_rejects_ambiguous_zero_id(checker):
+    # {0, 1} 對 3 筆輸入：不知道是 0-based 少一筆，還是 1-based 多了 0
+    reply = {"results": [verdict(0), verdict(1)]}
+    assert checker._match_batch_items(reply, "results", 3) == {}
+
+def test_match_falls_back_to_position_without_ids(checker):
+    reply = [{"verdict": "Correct"}, {"verdict": "Incorrect"}]
+    matched = checker._match_batch_items(reply, "results", 2)
+    assert matched[1]["verdict"] == "Incorrect"
+    assert checker._match_batch_items(reply, "results", 3) == {}
+
+def test_match_ignores_unusable_reply(checker):
+    assert checker._match_batch_items("not json", "results", 2) == {}
+    assert checker._match_batch_items({"plans": []}, "results", 2) == {}
+
+def test_verify_batch_zero_based_reply_keeps_order():
+    client = ScriptedClient({"results": [verdict(1, "Incorrect"), verdict(0, "Correct")]})
+    results = FactChecker(client).verify_claims_batch([("a", "ea"), ("b", "eb")])
+    assert [r["verdict"] for r in results] == ["Correct", "Incorrect"]
+    assert len(client.calls) == 1
+
+def test_verify_batch_invalid_verdict_falls_back_to_single_call():
+    client = ScriptedClient(
+        {"results": [verdict(1, " correct "), verdict(2, "Mostly true")]},
+        verdict(None, "Incorrect"),
+    )
+    results = FactChecker(client).verify_claims_batch([("a", "ea"), ("b", "eb")])
+    assert [r["verdict"] for r in results] == ["Correct", "Incorrect"]
+    # 第二項重新以 verify_claim 驗證
+    assert len(client.calls) == 2
+
+def test_batch_fallbacks_each_go_through_run():
+    client = ScriptedClient(
+        {"results": [verdict(1), {"id": 2}, {"id": 3, "verdict": "?"}]},
+        verdict(None, "Incorrect"),
+        verdict(None, "Unverifiable"),
+    )
+    calls = []
+
+    def run(index, fn, *args):
+        calls.append((index, fn.__name__))
+        return fn(*args)
+
+    results = FactChecker(client).verify_claims_batch([("a", "ea"), ("b", "eb"), ("c", "ec")], run=run)
+    assert [r["verdict"] for r in results] == ["Correct", "Incorrect", "Unverifiable"]
+    # 批次請求與兩個退回的請求各自經過 run (各取一個 rate-limit token)
+    assert calls == [(0, "_chat_json"), (1, "verify_claim"), (2, "verify_claim")]
+
+def test_use_cache_reaches_every_request():
+    client = ScriptedClient(
+        {"results": [verdict(1), {"id": 2}]},
+        verdict(None, "Incorrect"),
+    )
+    FactChecker(client).verify_claims_batch([("a", "ea"), ("b", "eb")], use_cache=False)
+    # 批次請求與退回的 verify_claim 都不使用快取
+    assert client.options == [{"use_cache": False}, {"use_cache": False}]
@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+
+from scraper.LocalEvidenceIndex import LocalEvidenceIndex
+
+ARTICLE = "台積電今日公布財報。台積電2024年營收成長百分之十，創下新高。法人看好後市。"
+SCATTERED = "台積電舉辦運動會。2024年營運平穩。收成不佳。營收部門成長百分比。百分之十的員工請假。"
+
+def record(query, *pages):
+    return {
+        "query": query,
+        "results": [
+            {"title": title, "link": f"https://example.com/{i}-{title}", "chunks": [], "article": article}
+            for i, (title, article) in enumerate(pages)
+        ],
+    }
+
+@pytest.fixture
+def index(tmp_path, evidence_storage):
+    return LocalEvidenceIndex(tmp_path / "index.sqlite3", storage=evidence_storage)
+
+def store_and_index(index, data):
+    handler = index.storage.store(data)
+    file_id = handler.get_filename()
+    handler.close()
+    index.add_evidence(data, source=file_id)
+    return file_id
+
+def test_article_is_referenced_not_copied(index):
+    store_and_index(index, record("台積電營收", ("財報", ARTICLE)))
+    stored = sqlite3.connect(index.db_path).execute("SELECT article, position FROM docs").fetchall()
+    assert stored == [(None, 0)]
+
+    results = index.search("台積電2024年營收成長百分之十")
+    assert results[0]["article"] == ARTICLE
+
+def test_evicted_record_leaves_empty_article(index):
+    file_id = store_and_index(index, record("台積電營收", ("財報", ARTICLE)))
+    index.storage.evict([file_id])
+    results = index.search("台積電2024年營收成長百分之十")
+    assert results[0]["article"] == ""
+
+def test_without_source_the_article_is_stored(index):
+    index.add_evidence(record("台積電營收", ("財報", ARTICLE)))
+    assert index.search("台積電營收成長")[0]["article"] == ARTICLE
+
+def test_scattered_terms_fail_the_proximity_check(index):
+    store_and_index(index, record("台積電營收", ("財報", ARTICLE), ("雜記", SCATTERED)))
+    query = "台積電2024年營收成長百分之十"
+
+    loose = index.search(query, min_relevance=0.7)
+    assert {r["title"] for r in loose} == {"財報", "雜記"}
+
+    strict = index.search(query, min_relevance=0.7, min_proximity=0.5)
+    assert [r["title"] for r in strict] == ["財報"]
+    assert strict[0]["proximity"] >= 0.5
+
+def test_index_storage_backfills_once(index):
+    data = record("台積電營收", ("財報", ARTICLE))
+    index.storage.store(data).close()
+
+    assert index.index_storage() == 1
+    assert index.index_storage() == 0
+    assert index.stats()["documents"] == 1
+    assert index.search("台積電營收成長")[0]["article"] == ARTICLE
+
+def test_restored_source_replaces_its_documents(index):
+    # 過期刷新會以相同 key 覆寫同一個紀錄，內容換成別的網頁
+    v1 = {"query": "新聞", "results": [{"title": "颱風", "link": "https://a", "chunks": [], "article": "颱風今晚登陸花蓮。"}]}
+    v2 = {"query": "新聞", "results": [{"title": "股市", "link": "https://b", "chunks": [], "article": "台股今日大漲三百點。"}]}
+    file_id = store_and_index(index, v1)
+    assert store_and_index(index, v2) == file_id
+
+    assert index.search("颱風登陸花蓮") == []
+    assert [(r["link"], r["article"]) for r in index.search("台股大漲")] == [("https://b", "台股今日大漲三百點。")]
+    assert index.stats()["documents"] == 1
+
+def test_document_pointing_at_another_page_is_dropped(index):
+    file_id = store_and_index(index, record("台積電營收", ("財報", ARTICLE)))
+    # 紀錄在索引之外被改寫 (例如舊版索引)：位置上已是別的網頁，不能拿來當證據
+    index.storage.store(record("台積電營收", ("雜記", SCATTERED))).close()
+    assert index.storage.open_entry(file_id) is not None
+    assert index.search("台積電2024年營收成長百分之十", min_proximity=0.1) == []
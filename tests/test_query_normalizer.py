@@ -0,0 +1,43 @@
+import pytest
+
+from scraper.QueryNormalizer import QueryNormalizer
+
+@pytest.fixture
+def normalizer():
+    return QueryNormalizer()
+
+@pytest.mark.parametrize("a, b", [
+    ("台積電 2024 營收", "台積電2024營收"),
+    ("台積電 2024 營收", "台積電２０２４營收！"),
+    ("TSMC  Revenue", "tsmc revenue"),
+    ("「台積電」營收？", "台積電 營收"),
+])
+def test_canonicalize_ignores_format(normalizer, a, b):
+    assert normalizer.canonicalize(a) == normalizer.canonicalize(b)
+
+@pytest.mark.parametrize("a, b", [
+    ("台積電 2024 營收", "2024 台積電營收"),
+    ("台積電 2024 Q3 營收", "Q3 台積電營收 2024"),
+    ("NVIDIA 輝達 財報", "輝達財報 nvidia"),
+])
+def test_canonicalize_ignores_latin_and_number_order(normalizer, a, b):
+    assert normalizer.canonicalize(a) == normalizer.canonicalize(b)
+
+@pytest.mark.parametrize("a, b", [
+    ("美國對中國加徵關稅", "中國對美國加徵關稅"),
+    ("狗咬人", "人咬狗"),
+    ("台積電 2024 營收", "營收台積電 2024"),
+    ("us tariffs on china", "china tariffs on us"),
+])
+def test_canonicalize_keeps_word_order(normalizer, a, b):
+    assert normalizer.canonicalize(a) != normalizer.canonicalize(b)
+
+def test_canonicalize_tokens(normalizer):
+    assert normalizer.canonicalize("台積電 2024營收") == "台積電營收|2024"
+    assert normalizer.canonicalize("台積電營收") == "台積電營收"
+    assert normalizer.canonicalize("TSMC Revenue") == "tsmc revenue"
+    assert normalizer.canonicalize("") == ""
+
+def test_char_ngrams(normalizer):
+    assert normalizer.char_ngrams("台積電 2024營收") == ["台積", "積電", "2024", "營收"]
+    assert normalizer.char_ngrams("台") == ["台"]
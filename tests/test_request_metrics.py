@@ -0,0 +1,51 @@
+import requests
+
+from benchmark.FakeOllamaServer import FakeOllamaServer
+from benchmark.FakeTavilyClient import FakeTavilyClient
+from fact_checking.OllamaClient import OllamaClient
+from runtime.MetricsRegistry import MetricsRegistry
+from runtime.RetryPolicy import RetryPolicy
+from scraper.Retriever import Retriever
+
+RETRY = RetryPolicy(max_attempts=3, base_delay=0.0, retry_exceptions=(requests.exceptions.ConnectionError,))
+
+class FlakyTavily:
+    """Fails the first `failures` searches with a connection error."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.fake = FakeTavilyClient()
+
+    def search(self, query, **kwargs):
+        if self.failures > 0:
+            self.failures -= 1
+            raise requests.exceptions.ConnectionError("reset")
+        return self.fake.search(query, **kwargs)
+
+def test_retriever_counts_every_attempt():
+    metrics = MetricsRegistry()
+    retriever = Retriever(client=FlakyTavily(failures=2), retry=RETRY, metrics=metrics)
+
+    assert retriever.retrieve({"query": "台積電營收", "level": Retriever.ADVANCED}) is not None
+    requests_total = metrics.get("factcheck_tavily_requests_total")
+    assert requests_total.value(outcome="error") == 2
+    assert requests_total.value(outcome="ok") == 1
+    assert metrics.get("factcheck_tavily_credits_total").value() == 2
+
+def test_retriever_counts_failed_attempts_when_giving_up():
+    metrics = MetricsRegistry()
+    retriever = Retriever(client=FlakyTavily(failures=5), retry=RETRY, metrics=metrics)
+
+    assert retriever.retrieve({"query": "台積電營收"}) is None
+    assert metrics.get("factcheck_tavily_requests_total").value(outcome="error") == 3
+    assert metrics.get("factcheck_tavily_credits_total").value() == 0
+
+def test_ollama_client_counts_every_attempt():
+    metrics = MetricsRegistry()
+    with FakeOllamaServer(error_rate=1.0) as server:
+        client = OllamaClient(api_url=server.url, api_key="test", retry=RETRY, metrics=metrics)
+        assert client.chat([{"role": "user", "content": "hello"}]) is None
+
+    requests_total = metrics.get("factcheck_llm_requests_total")
+    assert requests_total.value(outcome="error") == 3
+    assert requests_total.value(outcome="ok") == 0
@@ -0,0 +1,14 @@
+from fact_checking.ResponseCache import ResponseCache
+
+def test_overwriting_a_key_does_not_count_the_old_file(tmp_path, monkeypatch):
+    prunes = []
+    monkeypatch.setattr(ResponseCache, "_ResponseCache__prune_disk", lambda self: prunes.append(1))
+
+    cache = ResponseCache(tmp_path, max_memory_entries=0, max_disk_bytes=1000)
+    cache.set("old", "x" * 100)
+    for _ in range(20):
+        cache.set("hot", "x" * 100)
+
+    # 目錄裡只有兩個小檔案，重複覆寫 "hot" 不該讓累計大小超過上限
+    assert prunes == []
+    assert cache.get("old") == "x" * 100
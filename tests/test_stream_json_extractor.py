@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from fact_checking.StreamJsonExtractor import StreamJsonExtractor
+
+DOC = {
+    "verdict": "Correct",
+    "reason": "報導指出 \"營收\" 創新高，{不是} [括號]",
+    "claims": ["第一句。", {"text": "巢狀, 物件", "n": [1, 2]}, 3],
+    "score": 0.5,
+    "empty": [],
+}
+
+def feed_in_pieces(text, size, **kwargs):
+    extractor = StreamJsonExtractor(**kwargs)
+    for i in range(0, len(text), size):
+        extractor.feed(text[i:i + size])
+    return extractor
+
+@pytest.mark.parametrize("size", [1, 2, 7, 10000])
+def test_any_fragmentation_gives_same_values(size):
+    text = "```json\n" + json.dumps(DOC, ensure_ascii=False) + "\n```"
+    extractor = feed_in_pieces(text, size)
+    assert extractor.done
+    assert extractor.values == DOC
+    assert extractor.partial["claims"] == DOC["claims"]
+    assert "empty" not in extractor.partial
+
+def test_values_available_before_object_ends():
+    extractor = StreamJsonExtractor()
+    extractor.feed('{"verdict": "Incorrect", "reason": "還沒寫')
+    assert extractor.values == {"verdict": "Incorrect"}
+    assert extractor.has_keys(["verdict"])
+    assert not extractor.has_keys(["verdict", "reason"])
+    assert not extractor.done
+
+def test_on_item_fires_per_array_element():
+    seen = []
+    extractor = StreamJsonExtractor(on_item=lambda key, item: seen.append((key, item)))
+    extractor.feed('{"claims": ["a", "b"')
+    assert seen == [("claims", "a")]
+    extractor.feed('], "x": 1}')
+    assert seen == [("claims", "a"), ("claims", "b")]
+
+def test_python_literals():
+    extractor = feed_in_pieces('{"is_subjective": True, "other": None}', 3)
+    assert extractor.values == {"is_subjective": True, "other": None}
+
+def test_feed_after_done_is_ignored():
+    extractor = feed_in_pieces('{"a": 1} trailing {"b": 2}', 4)
+    assert extractor.values == {"a": 1}
+    extractor.feed('{"c": 3}')
+    assert extractor.values == {"a": 1}